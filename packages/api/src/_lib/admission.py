@@ -0,0 +1,183 @@
+import math
+import time
+from enum import IntEnum
+
+from config import Settings
+from shared.metrics import MetricsRegistry
+from src._lib.endpoints import ApiEndpoints
+from src._lib.responses import FastJSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class RouteGroup(IntEnum):
+    """Groups of routes admitted separately; lower values have priority."""
+
+    READ = 0
+    WRITE = 1
+    BULK = 2
+
+
+_users = ApiEndpoints.API.USERS
+# Streamed imports and exports, whatever the method
+BULK_PATHS = {f"{_users.path}{_users.IMPORT.path}", f"{_users.path}{_users.EXPORT.path}"}
+# Many documents per request, except for reads
+BULK_WRITE_PATHS = {f"{_users.path}{_users.BATCH.path}"}
+# Never shed, so overload stays observable
+EXEMPT_PATHS = {ApiEndpoints.API.METRICS.path}
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def route_group(method: str, path: str) -> RouteGroup | None:
+    """The group a request is admitted under, or None for exempt routes."""
+    path = path.rstrip("/") or "/"
+    if path in EXEMPT_PATHS:
+        return None
+    if path in BULK_PATHS or (path in BULK_WRITE_PATHS and method not in READ_METHODS):
+        return RouteGroup.BULK
+    return RouteGroup.READ if method in READ_METHODS else RouteGroup.WRITE
+
+
+class AdaptiveLimit:
+    """
+    Concurrency limit adjusted by AIMD on observed latency. Every response
+    within `target_latency` adds 1/limit (about +1 per limit's worth of
+    requests); a slower one multiplies the limit by `backoff`, at most once per
+    `target_latency`, so one slow burst is a single cut rather than many.
+    The limit stays between `min_limit` and `max_limit`.
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        target_latency: float,
+        min_limit: int = 1,
+        backoff: float = 0.9,
+    ):
+        self.max_limit = max_limit
+        self.min_limit = min(min_limit, max_limit)
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self._last_decrease = -math.inf
+
+    @property
+    def saturated(self) -> bool:
+        return self.in_flight >= int(self.limit)
+
+    def try_acquire(self) -> bool:
+        if self.saturated:
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self, latency: float) -> None:
+        self.in_flight -= 1
+        if latency <= self.target_latency:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            return
+        now = time.monotonic()
+        if now - self._last_decrease >= self.target_latency:
+            self.limit = max(self.min_limit, self.limit * self.backoff)
+            self._last_decrease = now
+
+
+class AdmissionController:
+    """
+    One AdaptiveLimit per route group. A request is shed when its group is at
+    its limit, or when a group with priority over it is: while reads queue up,
+    writes and bulk operations are turned away first.
+    """
+
+    def __init__(self, limits: dict[RouteGroup, AdaptiveLimit]):
+        self.limits = limits
+        self.shed = {group: 0 for group in limits}
+        # Its own registry, which /api/metrics renders after the shared one
+        self.metrics = MetricsRegistry()
+        self.metrics.gauge(
+            "admission_limit",
+            "Current adaptive concurrency limit per route group",
+            ("group",),
+            collect=lambda: self._by_group("limit"),
+        )
+        self.metrics.gauge(
+            "admission_in_flight",
+            "Requests being handled per route group",
+            ("group",),
+            collect=lambda: self._by_group("in_flight"),
+        )
+        self.metrics.counter(
+            "admission_shed_total",
+            "Requests rejected with 503 per route group",
+            ("group",),
+            collect=lambda: {(group.name.lower(),): count for group, count in self.shed.items()},
+        )
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "AdmissionController":
+        target = settings.admission_target_latency_ms / 1000
+        bulk_target = settings.admission_bulk_target_latency_ms / 1000
+        return cls(
+            {
+                RouteGroup.READ: AdaptiveLimit(settings.admission_read_limit, target),
+                RouteGroup.WRITE: AdaptiveLimit(settings.admission_write_limit, target),
+                RouteGroup.BULK: AdaptiveLimit(settings.admission_bulk_limit, bulk_target),
+            }
+        )
+
+    def try_acquire(self, group: RouteGroup) -> bool:
+        higher = (limit for other, limit in self.limits.items() if other < group)
+        if any(limit.saturated for limit in higher):
+            admitted = False
+        else:
+            admitted = self.limits[group].try_acquire()
+        if not admitted:
+            self.shed[group] += 1
+        return admitted
+
+    def release(self, group: RouteGroup, latency: float) -> None:
+        self.limits[group].release(latency)
+
+    def _by_group(self, attribute: str) -> dict[tuple[str, ...], float]:
+        return {
+            (group.name.lower(),): getattr(limit, attribute) for group, limit in self.limits.items()
+        }
+
+
+class AdmissionControlMiddleware:
+    """
+    Sheds load before it reaches routing: a request over its group's
+    concurrency limit gets an immediate 503 with Retry-After instead of
+    waiting for a pooled MongoDB connection behind everyone else. Pure ASGI,
+    like ApiVersionMiddleware.
+    """
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController, retry_after: int):
+        self.app = app
+        self.controller = controller
+        self.retry_after = str(retry_after)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"].removeprefix(scope.get("root_path", ""))
+        group = route_group(scope["method"], path)
+        if group is None:
+            await self.app(scope, receive, send)
+            return
+        if not self.controller.try_acquire(group):
+            response = FastJSONResponse(
+                {"detail": "Server is overloaded, retry later"},
+                status_code=503,
+                headers={"Retry-After": self.retry_after},
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(group, time.perf_counter() - started)
@@ -1,6 +1,12 @@
+import gzip
+import hashlib
 import logging
+from dataclasses import dataclass
+from pathlib import Path
 
-from fastapi import FastAPI
+import orjson
+from config import get_settings
+from fastapi import FastAPI, Request, Response
 from fastapi.openapi.utils import get_openapi
 from src._lib.shared import ApiVersion
 
@@ -8,61 +14,137 @@ from src._lib.shared import ApiVersion
 logger = logging.getLogger(__name__)
 
 
-def custom_openapi(app: FastAPI):
-    def custom_openapi_func():
-        try:
-            logger.debug("Generating custom OpenAPI schema")
-            if app.openapi_schema:
-                logger.debug("Returning cached OpenAPI schema")
-                return app.openapi_schema
-
-            openapi_schema = get_openapi(
-                title="Your API",
-                version="1.0.0",
-                description="Your API description",
-                routes=app.routes,
+def build_openapi_schema(app: FastAPI) -> dict:
+    """
+    Generate the OpenAPI schema for `app`, with the x-api-version header
+    declared once as a component and referenced from every operation.
+    """
+    openapi_schema = get_openapi(
+        title="Your API",
+        version="1.0.0",
+        description="Your API description",
+        routes=app.routes,
+    )
+
+    logger.debug("Adding version parameter to all endpoints")
+    # Define the version parameter once at the components level
+    openapi_schema["components"] = openapi_schema.get("components", {})
+    openapi_schema["components"]["parameters"] = {
+        "ApiVersionHeader": {
+            "name": "x-api-version",
+            "in": "header",
+            "required": True,
+            "schema": {
+                "type": "string",
+                "enum": [v.value for v in ApiVersion],
+                "default": ApiVersion.LATEST.value,
+            },
+            "description": "API Version to use",
+        }
+    }
+
+    # Reference the parameter in all paths
+    for path in openapi_schema["paths"].values():
+        for method in path.values():
+            # Remove any existing x-api-version parameters
+            if "parameters" in method:
+                method["parameters"] = [
+                    param
+                    for param in method["parameters"]
+                    if param.get("name", "").lower() != "x-api-version"
+                ]
+
+            # Add the reference to our component parameter
+            method["parameters"] = [{"$ref": "#/components/parameters/ApiVersionHeader"}] + (
+                method.get("parameters", [])
             )
 
-            logger.debug("Adding version parameter to all endpoints")
-            # Define the version parameter once at the components level
-            openapi_schema["components"] = openapi_schema.get("components", {})
-            openapi_schema["components"]["parameters"] = {
-                "ApiVersionHeader": {
-                    "name": "x-api-version",
-                    "in": "header",
-                    "required": True,
-                    "schema": {
-                        "type": "string",
-                        "enum": [v.value for v in ApiVersion],
-                        "default": ApiVersion.LATEST.value,
-                    },
-                    "description": "API Version to use",
-                }
-            }
-
-            # Reference the parameter in all paths
-            for path in openapi_schema["paths"].values():
-                for method in path.values():
-                    # Remove any existing x-api-version parameters
-                    if "parameters" in method:
-                        method["parameters"] = [
-                            param
-                            for param in method["parameters"]
-                            if param.get("name", "").lower() != "x-api-version"
-                        ]
-
-                    # Add the reference to our component parameter
-                    method["parameters"] = [
-                        {"$ref": "#/components/parameters/ApiVersionHeader"}
-                    ] + (method.get("parameters", []))
-
-            # Modify the servers to include the /api prefix
-            openapi_schema["servers"] = [{"url": "/api"}]
-            app.openapi_schema = openapi_schema
+    # Modify the servers to include the /api prefix
+    openapi_schema["servers"] = [{"url": "/api"}]
+    return openapi_schema
 
+
+def load_openapi_schema(app: FastAPI) -> dict:
+    """
+    Read the schema written by `python -m scripts.openapi` when OPENAPI_SCHEMA_FILE
+    points at one, otherwise build it from the app's routes.
+    """
+    schema_file = get_settings().openapi_schema_file
+    if schema_file and Path(schema_file).is_file():
+        logger.debug(f"Loading OpenAPI schema from {schema_file}")
+        return orjson.loads(Path(schema_file).read_bytes())
+    logger.debug("Generating custom OpenAPI schema")
+    return build_openapi_schema(app)
+
+
+def custom_openapi(app: FastAPI):
+    def custom_openapi_func():
+        try:
+            if not app.openapi_schema:
+                app.openapi_schema = load_openapi_schema(app)
             return app.openapi_schema
         except Exception as e:
             logger.error(f"Error generating OpenAPI schema: {str(e)}")
             raise
 
     return custom_openapi_func
+
+
+@dataclass(frozen=True)
+class OpenApiDocument:
+    """The schema serialized and compressed once, with a validator for revalidation."""
+
+    body: bytes
+    gzipped: bytes
+    etag: str
+
+    @classmethod
+    def from_schema(cls, schema: dict) -> "OpenApiDocument":
+        body = orjson.dumps(schema, option=orjson.OPT_SORT_KEYS)
+        return cls(
+            body=body,
+            # mtime=0 keeps the compressed bytes identical across processes
+            gzipped=gzip.compress(body, compresslevel=9, mtime=0),
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+        )
+
+    @property
+    def gzip_etag(self) -> str:
+        # Each encoding is a different representation, so it gets its own ETag
+        return f'{self.etag[:-1]}-gzip"'
+
+
+def get_openapi_document(app: FastAPI) -> OpenApiDocument:
+    """The app's OpenAPI document, built on first use; the lifespan warms it."""
+    document = getattr(app.state, "openapi_document", None)
+    if document is None:
+        document = OpenApiDocument.from_schema(app.openapi())
+        app.state.openapi_document = document
+    return document
+
+
+def _matches(if_none_match: str, document: OpenApiDocument) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return document.etag in tags or document.gzip_etag in tags
+
+
+def openapi_response(document: OpenApiDocument, request: Request) -> Response:
+    """
+    Serve the pre-rendered schema: 304 when the client's copy is current,
+    the gzipped bytes when the client accepts them, the plain JSON otherwise.
+    """
+    use_gzip = "gzip" in request.headers.get("accept-encoding", "").lower()
+    headers = {
+        "ETag": document.gzip_etag if use_gzip else document.etag,
+        "Cache-Control": "public, max-age=0, must-revalidate",
+        "Vary": "Accept-Encoding",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, document):
+        return Response(status_code=304, headers=headers)
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(document.gzipped, media_type="application/json", headers=headers)
+    return Response(document.body, media_type="application/json", headers=headers)
@@ -33,7 +33,14 @@ class ApiEndpoints:
         routes={
             "DOCS": Endpoint(path="/docs"),
             "OPENAPI": Endpoint(path="/openapi.json"),
-            "DEBUG": Endpoint(path="/debug"),
+            "DEBUG": Endpoint(
+                path="/debug",
+                routes={
+                    "SLOW_QUERIES": Endpoint(path="/slow-queries"),
+                    "INDEX_ADVICE": Endpoint(path="/index-advice"),
+                },
+            ),
+            "METRICS": Endpoint(path="/metrics"),
             "HELLO": Endpoint(
                 path="/hello",
                 routes={
@@ -45,6 +52,10 @@ class ApiEndpoints:
                 path="/users",
                 routes={
                     "ROOT": Endpoint(path="/"),
+                    "IMPORT": Endpoint(path="/import"),
+                    "EXPORT": Endpoint(path="/export"),
+                    "SEARCH": Endpoint(path="/search"),
+                    "BATCH": Endpoint(path="/batch"),
                 },
             ),
         },
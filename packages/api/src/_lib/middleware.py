@@ -0,0 +1,127 @@
+import time
+
+from shared.metrics import http_request_duration
+from shared.tracing import RequestTrace, current_trace
+from src._lib.responses import FastJSONResponse
+from src._lib.shared import (
+    RAW_VERSION_HEADERS,
+    current_api_version,
+    resolve_api_version,
+)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+API_VERSION_HEADER = b"x-api-version"
+
+
+class ApiVersionMiddleware:
+    """
+    Resolves the request's API version from the x-api-version header and adds
+    that version's lifecycle headers to the response. Unknown versions are
+    rejected with a 400 before routing and dependency resolution run.
+
+    Pure ASGI: headers are appended to `http.response.start` as it passes
+    through, so bodies, including streamed ones, are never buffered or wrapped.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        header = next(
+            (value for name, value in scope["headers"] if name == API_VERSION_HEADER),
+            None,
+        )
+        version = resolve_api_version(header)
+        if version is None:
+            response = FastJSONResponse({"detail": "Invalid API version"}, status_code=400)
+            await response(scope, receive, send)
+            return
+
+        # Also exposed as request.state.api_version
+        scope.setdefault("state", {})["api_version"] = version
+        extra = RAW_VERSION_HEADERS[version]
+
+        async def send_with_version_headers(message: Message):
+            if extra and message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", ()), *extra]}
+            await send(message)
+
+        token = current_api_version.set(version)
+        try:
+            await self.app(scope, receive, send_with_version_headers)
+        finally:
+            current_api_version.reset(token)
+
+
+class ServerTimingMiddleware:
+    """
+    Starts a RequestTrace for every request and reports it in a Server-Timing
+    header: validation, app, db (with the MongoDB command count), serialize
+    and total. Endpoints fill it in through TracedRoute, MongoDB commands
+    through the client's CommandTracer. Pure ASGI, like ApiVersionMiddleware.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace()
+
+        async def send_with_server_timing(message: Message):
+            if message["type"] == "http.response.start":
+                header = (b"server-timing", trace.server_timing().encode())
+                message = {**message, "headers": [*message.get("headers", ()), header]}
+            await send(message)
+
+        token = current_trace.set(trace)
+        try:
+            await self.app(scope, receive, send_with_server_timing)
+        finally:
+            current_trace.reset(token)
+
+
+class MetricsMiddleware:
+    """
+    Records every request's duration, up to the last body chunk, in the
+    http_request_duration_seconds histogram. Requests are labelled with the
+    route's path template (e.g. /users/{id}), never the raw path, so the
+    number of series stays bounded; unrouted requests share one label.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router leaves the matched route in the scope
+            route = scope.get("route")
+            http_request_duration.observe(
+                time.perf_counter() - started,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status),
+            )
@@ -0,0 +1,47 @@
+from functools import cache
+from typing import Any
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+from typeid import TypeID
+
+
+@cache
+def _list_adapter(model_class: type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[model_class])
+
+
+def _default(value: Any) -> Any:
+    # Only reached for types orjson doesn't handle natively (models, TypeIDs, ...)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", by_alias=True)
+    if isinstance(value, TypeID):
+        return str(value)
+    return jsonable_encoder(value)
+
+
+def dump_json(content: Any) -> bytes:
+    """
+    Serialize response content to JSON bytes. Pydantic models, and lists of a
+    single model class, are dumped by pydantic-core in one call; everything
+    else goes through orjson.
+    """
+    if isinstance(content, BaseModel):
+        return content.__pydantic_serializer__.to_json(content, by_alias=True)
+    if isinstance(content, list) and content and isinstance(content[0], BaseModel):
+        model_class = type(content[0])
+        if all(type(item) is model_class for item in content):
+            return _list_adapter(model_class).dump_json(content, by_alias=True)
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered by `dump_json`. Return it from an endpoint to send
+    an already-built model without FastAPI re-validating it.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
@@ -0,0 +1,43 @@
+import functools
+import inspect
+import time
+from collections.abc import Callable
+from typing import Any
+
+from fastapi.routing import APIRoute
+from shared.tracing import current_trace
+
+
+def _is_async(endpoint: Callable[..., Any]) -> bool:
+    return inspect.iscoroutinefunction(endpoint) or inspect.iscoroutinefunction(
+        getattr(endpoint, "__call__", None)
+    )
+
+
+def traced(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Wrap an async endpoint to mark when it starts and returns on the request's
+    trace, splitting request handling into validation, app and serialize time.
+    """
+    if not _is_async(endpoint):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        trace = current_trace.get()
+        if trace is None:
+            return await endpoint(*args, **kwargs)
+        trace.endpoint_started = time.perf_counter()
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            trace.endpoint_finished = time.perf_counter()
+
+    return wrapper
+
+
+class TracedRoute(APIRoute):
+    """APIRoute whose endpoint reports its timing to the request's trace."""
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, traced(endpoint), **kwargs)
@@ -1,8 +1,11 @@
+import functools
+import inspect
 import logging
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
 from datetime import datetime
 from enum import Enum
-
-from fastapi import Header, HTTPException, Request
+from typing import Any
 
 
 logger = logging.getLogger(__name__)
@@ -22,32 +25,90 @@ class ApiVersion(str, Enum):
         return obj
 
 
-async def get_api_version(request: Request, x_api_version: str | None = Header(None)) -> ApiVersion:
-    if x_api_version is None or x_api_version == ApiVersion.LATEST:
-        api_version = ApiVersion.LATEST
-    else:
-        try:
-            api_version = ApiVersion(x_api_version)
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid API version")
+# Header value -> version, so resolving a request's version is one dict lookup
+VERSIONS_BY_HEADER: dict[bytes, ApiVersion] = {
+    version.value.encode(): version for version in ApiVersion
+}
 
-    request.state.api_version = api_version  # Store api_version in request.state
-    return api_version
+current_api_version: ContextVar[ApiVersion] = ContextVar(
+    "current_api_version", default=ApiVersion.LATEST
+)
 
 
-def add_version_headers(response, current_version: ApiVersion):
-    if current_version.deprecated:
-        response.headers["Deprecation"] = "true"
-        response.headers["Link"] = (
-            '<https://api.example.com/docs>; rel="deprecation"; type="text/html"'
+def resolve_api_version(header: bytes | None) -> ApiVersion | None:
+    """Version named by an x-api-version header value; None if unknown."""
+    if header is None:
+        return ApiVersion.LATEST
+    return VERSIONS_BY_HEADER.get(header)
+
+
+async def get_api_version() -> ApiVersion:
+    """API version of the current request, resolved by ApiVersionMiddleware."""
+    return current_api_version.get()
+
+
+class VersionedHandler:
+    """
+    Route endpoint that dispatches on the request's API version through a
+    table filled at import time; versions without their own handler use the
+    default. Handlers share the default's signature, which FastAPI reads to
+    build the route's parameters.
+    """
+
+    def __init__(self, default: Callable[..., Awaitable[Any]]):
+        functools.update_wrapper(self, default)
+        self.__signature__ = inspect.signature(default)
+        self.handlers = dict.fromkeys(ApiVersion, default)
+
+    def register(self, *versions: ApiVersion):
+        """Decorator registering a handler for the given versions."""
+
+        def decorator(handler: Callable[..., Awaitable[Any]]):
+            for version in versions:
+                self.handlers[version] = handler
+            return handler
+
+        return decorator
+
+    async def __call__(self, **kwargs: Any) -> Any:
+        return await self.handlers[current_api_version.get()](**kwargs)
+
+
+def versioned(default: Callable[..., Awaitable[Any]]) -> VersionedHandler:
+    return VersionedHandler(default)
+
+
+def version_headers(version: ApiVersion) -> list[tuple[str, str]]:
+    """Response headers announcing the lifecycle status of an API version."""
+    headers = []
+    if version.deprecated:
+        headers.append(("Deprecation", "true"))
+        headers.append(
+            ("Link", '<https://api.example.com/docs>; rel="deprecation"; type="text/html"')
         )
-        response.headers["Warning"] = (
-            f'299 - "This version is deprecated. Please upgrade to {ApiVersion.LATEST.value}"'
+        headers.append(
+            (
+                "Warning",
+                f'299 - "This version is deprecated. Please upgrade to {ApiVersion.LATEST.value}"',
+            )
         )
 
-    if current_version.sunset_date:
-        sunset_date = datetime.strptime(current_version.sunset_date, "%Y-%m-%d")
-        response.headers["Sunset"] = sunset_date.strftime("%a, %d %b %Y %H:%M:%S GMT")
+    if version.sunset_date:
+        sunset_date = datetime.strptime(version.sunset_date, "%Y-%m-%d")
+        headers.append(("Sunset", sunset_date.strftime("%a, %d %b %Y %H:%M:%S GMT")))
 
-    if current_version.preview:
-        response.headers["X-Version-Status"] = "Preview"
+    if version.preview:
+        headers.append(("X-Version-Status", "Preview"))
+    return headers
+
+
+# Versions never change at runtime, so their headers are built once here
+VERSION_HEADERS = {version: version_headers(version) for version in ApiVersion}
+RAW_VERSION_HEADERS = {
+    version: [(name.lower().encode(), value.encode()) for name, value in headers]
+    for version, headers in VERSION_HEADERS.items()
+}
+
+
+def add_version_headers(response, current_version: ApiVersion):
+    response.headers.update(dict(VERSION_HEADERS[current_version]))
@@ -0,0 +1,88 @@
+import csv
+import json
+from collections.abc import AsyncIterable, AsyncIterator
+
+
+# Longest accepted line; longer lines are reported as row errors instead of buffered
+MAX_LINE_BYTES = 64 * 1024
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/jsonl", "application/ndjson")
+CSV_MEDIA_TYPES = ("text/csv",)
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes | None]:
+    """
+    Split a byte stream into lines without reading it all into memory.
+    Yields None in place of a line longer than MAX_LINE_BYTES.
+    """
+    buffer = bytearray()
+    overflow = False
+    async for chunk in chunks:
+        start = 0
+        while (end := chunk.find(b"\n", start)) != -1:
+            if not overflow:
+                buffer += chunk[start:end]
+            yield None if overflow or len(buffer) > MAX_LINE_BYTES else bytes(buffer)
+            buffer.clear()
+            overflow = False
+            start = end + 1
+        if not overflow:
+            buffer += chunk[start:]
+            if len(buffer) > MAX_LINE_BYTES:
+                buffer.clear()
+                overflow = True
+    if overflow:
+        yield None
+    elif buffer:
+        yield bytes(buffer)
+
+
+async def iter_ndjson_records(
+    lines: AsyncIterable[bytes | None],
+) -> AsyncIterator[tuple[int, dict | Exception]]:
+    """Yield (line number, record) pairs; malformed lines yield a ValueError."""
+    row = 0
+    async for line in lines:
+        row += 1
+        if line is None:
+            yield row, ValueError(f"Line exceeds {MAX_LINE_BYTES} bytes")
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row, ValueError(f"Invalid JSON: {e}")
+            continue
+        yield row, record
+
+
+async def iter_csv_records(
+    lines: AsyncIterable[bytes | None],
+) -> AsyncIterator[tuple[int, dict | Exception]]:
+    """
+    Yield (line number, record) pairs keyed by the header row.
+    Quoted values may contain commas but not newlines.
+    """
+    header = None
+    row = 0
+    async for line in lines:
+        row += 1
+        if line is None:
+            yield row, ValueError(f"Line exceeds {MAX_LINE_BYTES} bytes")
+            continue
+        try:
+            text = line.decode("utf-8-sig" if row == 1 else "utf-8").rstrip("\r")
+        except UnicodeDecodeError as e:
+            yield row, ValueError(f"Invalid UTF-8: {e}")
+            continue
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield row, ValueError(f"Expected {len(header)} columns, got {len(values)}")
+            continue
+        yield row, dict(zip(header, values, strict=True))
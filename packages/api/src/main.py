@@ -1,25 +1,92 @@
+import asyncio
+import contextlib
+from contextlib import asynccontextmanager
+
+from config import get_settings, install_reload_signal_handler, remove_reload_signal_handler
 from fastapi import FastAPI, Request
-from src._lib.custom_openapi import custom_openapi
+from fastapi.datastructures import Default
+from fastapi.openapi.docs import get_swagger_ui_html
+from fastapi.responses import HTMLResponse, PlainTextResponse
+from models.user import User
+from repositories.index_advisor import advise, query_shape_recorder
+from repositories.index_registry import index_registry
+from services.dependencies import get_slow_query_log, get_user_cache, get_user_repository
+from shared.database import close_database_settings, get_database_settings
+from shared.metrics import monitor_event_loop_lag, registry
+from src._lib.admission import AdmissionController, AdmissionControlMiddleware
+from src._lib.custom_openapi import custom_openapi, get_openapi_document, openapi_response
 from src._lib.endpoints import ApiEndpoints
-from src._lib.shared import ApiVersion, add_version_headers
+from src._lib.middleware import ApiVersionMiddleware, MetricsMiddleware, ServerTimingMiddleware
+from src._lib.responses import FastJSONResponse
 from src.routes import hello, users
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Owns all warm-up, so importing the app stays cheap and nothing is left
+    for the first request to pay for.
+    """
+    # One MongoDB client (and connection pool) per process, shared by all requests
+    database = get_database_settings()
+    await database.initialize()
+    # Open the first pooled connection (DNS, TLS, handshake) before serving
+    await database.client.admin.command("ping")
+    # Recording query shapes costs a little per query, so it is opt-in
+    query_shape_recorder.enabled = get_settings().index_advisor
+    # Indexes are created once here, never on the request path
+    await index_registry.bootstrap(database.db, [User])
+    # Render the schema before serving so no request pays for generating it
+    get_openapi_document(app)
+    get_user_repository()
+    # `kill -HUP` re-reads settings; dependencies rebuild what they affect
+    install_reload_signal_handler()
+    lag_monitor = asyncio.create_task(monitor_event_loop_lag()) if get_settings().metrics else None
+    yield
+    if lag_monitor is not None:
+        lag_monitor.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await lag_monitor
+    remove_reload_signal_handler()
+    # Let explains of queries from the last requests finish on the open client
+    slow_query_log = get_slow_query_log()
+    if slow_query_log is not None:
+        await slow_query_log.drain()
+    await close_database_settings()
+
+
 def create_app() -> FastAPI:
     app = FastAPI(
         title="Your API",
         description="API routes and mappings",
+        lifespan=lifespan,
+        # Kept as a Default placeholder so routes with a response model still
+        # take FastAPI's direct pydantic-to-JSON path; other content uses orjson
+        default_response_class=Default(FastJSONResponse),
         root_path=ApiEndpoints.API.path,
-        docs_url=ApiEndpoints.API.DOCS.path,
-        openapi_url=ApiEndpoints.API.OPENAPI.path,
+        # Both are served below from pre-rendered bytes
+        docs_url=None,
+        openapi_url=None,
     )
 
-    @app.middleware("http")
-    async def version_headers_middleware(request: Request, call_next):
-        response = await call_next(request)
-        api_version = getattr(request.state, "api_version", ApiVersion.LATEST)
-        add_version_headers(response, api_version)
-        return response
+    settings = get_settings()
+    app.add_middleware(ApiVersionMiddleware)
+    if settings.request_tracing:
+        # Outside the version middleware, so the total covers it too
+        app.add_middleware(ServerTimingMiddleware)
+    # Kept on the app so /api/metrics reports this app's limits
+    app.state.admission_controller = None
+    if settings.admission_control:
+        app.state.admission_controller = AdmissionController.from_settings(settings)
+        # Before the rest, so shed requests cost as little as possible
+        app.add_middleware(
+            AdmissionControlMiddleware,
+            controller=app.state.admission_controller,
+            retry_after=settings.admission_retry_after_seconds,
+        )
+    if settings.metrics:
+        # Outermost, so recorded durations include every other middleware
+        app.add_middleware(MetricsMiddleware)
 
     @app.get(ApiEndpoints.ROOT.path)
     async def root():
@@ -27,18 +94,64 @@ def create_app() -> FastAPI:
 
     @app.get(ApiEndpoints.API.DEBUG.path)
     async def debug_info():
+        user_cache = get_user_cache()
         return {
-            "openapi_url": app.openapi_url,
-            "docs_url": app.docs_url,
+            "openapi_url": ApiEndpoints.API.OPENAPI.path,
+            "docs_url": ApiEndpoints.API.DOCS.path,
             "routes": [{"path": route.path, "name": route.name} for route in app.routes],
+            "user_cache": user_cache.stats() if user_cache else None,
+        }
+
+    @app.get(f"{ApiEndpoints.API.DEBUG.path}{ApiEndpoints.API.DEBUG.SLOW_QUERIES.path}")
+    async def slow_queries():
+        slow_query_log = get_slow_query_log()
+        return {
+            "threshold_ms": slow_query_log.threshold_ms if slow_query_log else None,
+            "queries": slow_query_log.recent() if slow_query_log else [],
         }
 
+    @app.get(f"{ApiEndpoints.API.DEBUG.path}{ApiEndpoints.API.DEBUG.INDEX_ADVICE.path}")
+    async def index_advice(format: str = "json"):
+        advice = await advise(get_database_settings().db, User)
+        if format == "patch":
+            return PlainTextResponse(advice.patch(User.__name__))
+        return {"recording": query_shape_recorder.enabled, **advice.as_dict()}
+
+    docs_html = get_swagger_ui_html(
+        openapi_url=f"{ApiEndpoints.API.path}{ApiEndpoints.API.OPENAPI.path}",
+        title=f"{app.title} - Swagger UI",
+    ).body
+
+    @app.get(ApiEndpoints.API.OPENAPI.path, include_in_schema=False)
+    async def openapi(request: Request):
+        return openapi_response(get_openapi_document(app), request)
+
+    @app.get(ApiEndpoints.API.DOCS.path, include_in_schema=False)
+    async def docs():
+        return HTMLResponse(docs_html)
+
+    if settings.metrics:
+
+        @app.get(ApiEndpoints.API.METRICS.path, include_in_schema=False)
+        async def metrics(request: Request):
+            text = registry.render()
+            controller = request.app.state.admission_controller
+            if controller is not None:
+                text += controller.metrics.render()
+            return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
+
     # Include the routers from the routes package
     app.include_router(hello.router)
     app.include_router(users.router)
 
+    app.openapi = custom_openapi(app)
     return app
 
 
-app = create_app()
-app.openapi = custom_openapi(app)
+def __getattr__(name: str):
+    # `app` is built on first access (e.g. by uvicorn's "src.main:app"), so
+    # importing this module for create_app() alone doesn't build a second app
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter
 from src._lib.endpoints import ApiEndpoints
-from src._lib.shared import ApiVersion, get_api_version
+from src._lib.routing import TracedRoute
+from src._lib.shared import ApiVersion, versioned
 
 
 router = APIRouter(
     prefix=ApiEndpoints.API.HELLO.path,
     tags=["hello"],
     responses={404: {"description": "Not found"}},
+    route_class=TracedRoute,
 )
 
 
@@ -21,10 +23,8 @@ async def hello_world():
 
 
 @router.get(ApiEndpoints.API.HELLO.NAME.path)
-async def hello_name(
-    name: str,
-    api_version: ApiVersion = Depends(get_api_version),
-):
+@versioned
+async def hello_name(name: str):
     """
     Personalized greeting endpoint.
     Args:
@@ -32,7 +32,9 @@ async def hello_name(
     Returns:
         dict: A personalized greeting message
     """
-
-    if api_version == ApiVersion.V2024_10_PREVIEW:
-        return {"message": f"Hello, {name}! (Preview)"}
     return {"message": f"Hello, {name}!"}
+
+
+@hello_name.register(ApiVersion.V2024_10_PREVIEW)
+async def hello_name_preview(name: str):
+    return {"message": f"Hello, {name}! (Preview)"}
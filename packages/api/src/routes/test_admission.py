@@ -0,0 +1,99 @@
+from fastapi.testclient import TestClient
+from src._lib.admission import (
+    AdaptiveLimit,
+    AdmissionController,
+    AdmissionControlMiddleware,
+    RouteGroup,
+    route_group,
+)
+from src._lib.endpoints import ApiEndpoints
+from src.main import app
+from src.test_utils.api_path import get_api_path
+from starlette.responses import PlainTextResponse
+
+
+client = TestClient(app)
+
+
+def make_controller(read: int = 10, write: int = 10, bulk: int = 2) -> AdmissionController:
+    return AdmissionController(
+        {
+            RouteGroup.READ: AdaptiveLimit(read, 0.1),
+            RouteGroup.WRITE: AdaptiveLimit(write, 0.1),
+            RouteGroup.BULK: AdaptiveLimit(bulk, 1.0),
+        }
+    )
+
+
+def test_route_groups():
+    """Test requests are grouped by cost"""
+    users = ApiEndpoints.API.USERS
+    assert route_group("GET", users.path) == RouteGroup.READ
+    assert route_group("GET", f"{users.path}{users.BATCH.path}") == RouteGroup.READ
+    assert route_group("POST", users.path) == RouteGroup.WRITE
+    assert route_group("PATCH", f"{users.path}{users.BATCH.path}") == RouteGroup.BULK
+    assert route_group("POST", f"{users.path}{users.IMPORT.path}") == RouteGroup.BULK
+    assert route_group("GET", f"{users.path}{users.EXPORT.path}") == RouteGroup.BULK
+    assert route_group("GET", ApiEndpoints.API.METRICS.path) is None
+
+
+def test_limit_adapts_to_latency():
+    """Test the limit grows additively when fast and shrinks multiplicatively when slow"""
+    limit = AdaptiveLimit(max_limit=10, target_latency=0.1, backoff=0.5)
+    assert limit.try_acquire()
+    limit.release(0.5)
+    assert limit.limit == 5
+    # Further slow responses within the same window don't cut it again
+    limit.try_acquire()
+    limit.release(0.5)
+    assert limit.limit == 5
+
+    for _ in range(5):
+        limit.try_acquire()
+        limit.release(0.01)
+    assert 5.9 < limit.limit < 6.1
+
+    for _ in range(int(limit.limit)):
+        assert limit.try_acquire()
+    assert limit.saturated
+    assert not limit.try_acquire()
+
+
+def test_reads_have_priority():
+    """Test writes and bulk operations are shed while reads are saturated"""
+    controller = make_controller(read=1)
+    assert controller.try_acquire(RouteGroup.READ)
+
+    assert not controller.try_acquire(RouteGroup.READ)
+    assert not controller.try_acquire(RouteGroup.WRITE)
+    assert not controller.try_acquire(RouteGroup.BULK)
+    assert controller.shed == {RouteGroup.READ: 1, RouteGroup.WRITE: 1, RouteGroup.BULK: 1}
+
+    controller.release(RouteGroup.READ, 0.01)
+    assert controller.try_acquire(RouteGroup.BULK)
+
+
+def test_shed_requests_get_503_with_retry_after():
+    """Test requests over the limit are rejected before reaching the app"""
+    controller = make_controller(bulk=1)
+    shed_app = AdmissionControlMiddleware(PlainTextResponse("ok"), controller, retry_after=2)
+    shed_client = TestClient(shed_app)
+    import_path = f"{ApiEndpoints.API.USERS.path}{ApiEndpoints.API.USERS.IMPORT.path}"
+
+    assert shed_client.post(import_path).status_code == 200
+    controller.try_acquire(RouteGroup.BULK)
+    response = shed_client.post(import_path)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "2"
+    # Reads still get through
+    assert shed_client.get(ApiEndpoints.API.USERS.path).status_code == 200
+
+
+def test_admission_metrics():
+    """Test the app reports its own admission limits, not other controllers'"""
+    make_controller(read=3)
+    client.get(get_api_path(f"{ApiEndpoints.API.HELLO.path}/Alice"))
+    response = client.get(get_api_path(ApiEndpoints.API.METRICS.path))
+    limit = app.state.admission_controller.limits[RouteGroup.READ].limit
+    assert f'admission_limit{{group="read"}} {limit!r}' in response.text
+    assert 'admission_limit{group="read"} 3.0' not in response.text
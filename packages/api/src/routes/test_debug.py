@@ -0,0 +1,37 @@
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from repositories.index_advisor import advise_indexes
+from src import main
+from src._lib.endpoints import ApiEndpoints
+from src.main import app
+from src.test_utils.api_path import get_api_path
+
+
+client = TestClient(app)
+
+
+def test_slow_queries():
+    """Test the slow query log is exposed with its threshold"""
+    path = f"{ApiEndpoints.API.DEBUG.path}{ApiEndpoints.API.DEBUG.SLOW_QUERIES.path}"
+    response = client.get(get_api_path(path))
+    assert response.status_code == 200
+    assert response.json()["threshold_ms"] == 100.0
+    assert isinstance(response.json()["queries"], list)
+
+
+def test_index_advice(monkeypatch):
+    """Test the index advisor reports on the users collection"""
+
+    async def advise(db, model_class):
+        return advise_indexes(model_class.get_collection_name(), {}, [])
+
+    monkeypatch.setattr(main, "advise", advise)
+    monkeypatch.setattr(main, "get_database_settings", lambda: SimpleNamespace(db=None))
+    path = f"{ApiEndpoints.API.DEBUG.path}{ApiEndpoints.API.DEBUG.INDEX_ADVICE.path}"
+    response = client.get(get_api_path(path))
+    assert response.status_code == 200
+    assert response.json()["collection"] == "users"
+
+    response = client.get(get_api_path(path), params={"format": "patch"})
+    assert response.text.startswith("# Suggested changes to User.get_indexes()")
@@ -1,5 +1,6 @@
 from fastapi.testclient import TestClient
 from src._lib.endpoints import ApiEndpoints
+from src._lib.shared import ApiVersion
 from src.main import app
 from src.test_utils.api_path import get_api_path
 
@@ -20,3 +21,40 @@ def test_hello_name():
     response = client.get(get_api_path(f"{ApiEndpoints.API.HELLO.path}/{name}"))
     assert response.status_code == 200
     assert response.json() == {"message": f"Hello, {name}!"}
+
+
+def test_preview_version_headers():
+    """Test version lifecycle headers are added to the response"""
+    name = "Alice"
+    response = client.get(
+        get_api_path(f"{ApiEndpoints.API.HELLO.path}/{name}"),
+        headers={"x-api-version": ApiVersion.V2024_10_PREVIEW.value},
+    )
+    assert response.status_code == 200
+    assert response.json() == {"message": f"Hello, {name}! (Preview)"}
+    assert response.headers["x-version-status"] == "Preview"
+
+    response = client.get(get_api_path(f"{ApiEndpoints.API.HELLO.path}/{name}"))
+    assert "x-version-status" not in response.headers
+
+
+def test_unknown_version_is_rejected():
+    """Test an unknown API version is rejected before the route runs"""
+    response = client.get(
+        get_api_path(ApiEndpoints.API.HELLO.path), headers={"x-api-version": "1999-01-01"}
+    )
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid API version"}
+
+
+def test_server_timing_header():
+    """Test requests report where their time went"""
+    response = client.get(get_api_path(f"{ApiEndpoints.API.HELLO.path}/Alice"))
+    metrics = [metric.split(";")[0] for metric in response.headers["server-timing"].split(", ")]
+    assert metrics == ["validation", "app", "serialize", "total"]
+
+    response = client.get(
+        get_api_path(ApiEndpoints.API.HELLO.path), headers={"x-api-version": "1999-01-01"}
+    )
+    assert response.status_code == 400
+    assert response.headers["server-timing"].startswith("total;dur=")
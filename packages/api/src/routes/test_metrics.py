@@ -0,0 +1,22 @@
+from fastapi.testclient import TestClient
+from src._lib.endpoints import ApiEndpoints
+from src.main import app
+from src.test_utils.api_path import get_api_path
+
+
+client = TestClient(app)
+
+
+def test_metrics_endpoint():
+    """Test request latency is exposed per route template"""
+    client.get(get_api_path(f"{ApiEndpoints.API.HELLO.path}/Alice"))
+
+    response = client.get(get_api_path(ApiEndpoints.API.METRICS.path))
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="/hello/{name}",status="200"}'
+        in response.text
+    )
+    assert "# TYPE mongodb_pool_connections_in_use gauge" in response.text
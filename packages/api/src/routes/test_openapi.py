@@ -0,0 +1,72 @@
+import json
+from dataclasses import replace
+
+from config import get_settings
+from fastapi.testclient import TestClient
+from src._lib import custom_openapi
+from src._lib.custom_openapi import build_openapi_schema
+from src._lib.endpoints import ApiEndpoints
+from src.main import app, create_app
+from src.test_utils.api_path import get_api_path
+
+
+client = TestClient(app)
+
+
+def test_openapi_schema_is_served_with_etag():
+    """Test the schema is served as JSON with a validator"""
+    response = client.get(
+        get_api_path(ApiEndpoints.API.OPENAPI.path), headers={"accept-encoding": "identity"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"]
+    schema = response.json()
+    assert schema["servers"] == [{"url": "/api"}]
+    assert "ApiVersionHeader" in schema["components"]["parameters"]
+
+
+def test_openapi_schema_is_gzipped_when_accepted():
+    """Test clients accepting gzip get the precompressed schema"""
+    response = client.get(
+        get_api_path(ApiEndpoints.API.OPENAPI.path), headers={"accept-encoding": "gzip"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.json() == app.openapi()
+
+
+def test_openapi_schema_not_modified():
+    """Test a matching If-None-Match is answered with 304 and no body"""
+    path = get_api_path(ApiEndpoints.API.OPENAPI.path)
+    etag = client.get(path).headers["etag"]
+
+    response = client.get(path, headers={"if-none-match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    response = client.get(path, headers={"if-none-match": '"stale"'})
+    assert response.status_code == 200
+
+
+def test_openapi_schema_loaded_from_file(tmp_path, monkeypatch):
+    """Test a prebuilt schema file is served instead of generating one"""
+    schema = build_openapi_schema(create_app())
+    schema["info"]["title"] = "Prebuilt"
+    schema_file = tmp_path / "openapi.json"
+    schema_file.write_text(json.dumps(schema))
+    settings = replace(get_settings(), openapi_schema_file=str(schema_file))
+    monkeypatch.setattr(custom_openapi, "get_settings", lambda: settings)
+
+    response = TestClient(create_app()).get(get_api_path(ApiEndpoints.API.OPENAPI.path))
+    assert response.status_code == 200
+    assert response.json()["info"]["title"] == "Prebuilt"
+
+
+def test_docs_point_at_schema():
+    """Test the Swagger UI page loads the schema from its public URL"""
+    response = client.get(get_api_path(ApiEndpoints.API.DOCS.path))
+    assert response.status_code == 200
+    assert "/api/openapi.json" in response.text
@@ -0,0 +1,35 @@
+import json
+from datetime import datetime
+
+from dto.user_dto import UserResponse
+from src._lib.responses import FastJSONResponse, dump_json
+from typeid import TypeID
+
+
+def make_user(i: int) -> UserResponse:
+    return UserResponse(
+        id=TypeID(prefix="user"),
+        name=f"User {i}",
+        email=f"user{i}@example.com",
+        created_at=datetime(2024, 1, 1),
+    )
+
+
+def test_models_and_lists_render_like_model_dump_json():
+    """Test models, lists of models and mixed content all render as JSON"""
+    users = [make_user(i) for i in range(3)]
+
+    assert json.loads(dump_json(users[0])) == json.loads(users[0].model_dump_json())
+    assert json.loads(dump_json(users)) == [json.loads(u.model_dump_json()) for u in users]
+    mixed = json.loads(dump_json({"user": users[0], "id": users[1].id, "n": 1}))
+    assert mixed["user"]["id"] == str(users[0].id)
+    assert mixed["id"] == str(users[1].id)
+
+
+def test_fast_json_response_sets_body_and_media_type():
+    """Test the response class renders through dump_json"""
+    user = make_user(0)
+    response = FastJSONResponse(user, status_code=201)
+    assert response.status_code == 201
+    assert response.media_type == "application/json"
+    assert response.body == dump_json(user)
@@ -1,3 +1,5 @@
+import json
+
 import pytest
 from fastapi.testclient import TestClient
 from services.dependencies import get_user_service
@@ -60,6 +62,20 @@ def test_create_user_preview_version():
     assert data["updated_at"] is None
 
 
+def test_create_user_duplicate_email():
+    """Test user creation with an email that is already registered"""
+    user_data = {
+        "name": "Anna Lee",
+        "email": "anna.lee@company.com",
+    }
+    first = client.post(get_api_path(ApiEndpoints.API.USERS.path), json=user_data)
+    assert first.status_code == 200
+
+    response = client.post(get_api_path(ApiEndpoints.API.USERS.path), json=user_data)
+    assert response.status_code == 409
+    assert "already exists" in response.json()["detail"]
+
+
 def test_create_user_invalid_email():
     """Test user creation with invalid email format"""
     user_data = {
@@ -115,3 +131,188 @@ def test_create_user_invalid_json():
     assert response.status_code == 422
     data = response.json()
     assert "json" in str(data["detail"]).lower()
+
+
+def test_import_users_ndjson():
+    """Test bulk import from NDJSON with a malformed and a duplicate row"""
+    body = "\n".join(
+        [
+            '{"name": "Ada Lovelace", "email": "ada@example.com"}',
+            "not json",
+            '{"name": "Alan Turing", "email": "alan@example.com"}',
+            '{"name": "Ada Again", "email": "ada@example.com"}',
+        ]
+    )
+    response = client.post(
+        get_api_path(f"{ApiEndpoints.API.USERS.path}{ApiEndpoints.API.USERS.IMPORT.path}"),
+        content=body,
+        headers={"content-type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["inserted"] == 2
+    assert data["failed"] == 2
+    assert [error["row"] for error in data["errors"]] == [2, 4]
+
+
+def test_import_users_csv():
+    """Test bulk import from CSV with a header row"""
+    body = "name,email\nGrace Hopper,grace@example.com\nLinus,linus@incomplete\n"
+    response = client.post(
+        get_api_path(f"{ApiEndpoints.API.USERS.path}{ApiEndpoints.API.USERS.IMPORT.path}"),
+        content=body,
+        headers={"content-type": "text/csv"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["inserted"] == 1
+    assert data["errors"][0]["row"] == 3
+
+
+def test_import_users_unsupported_media_type():
+    """Test bulk import rejects bodies that are not NDJSON or CSV"""
+    response = client.post(
+        get_api_path(f"{ApiEndpoints.API.USERS.path}{ApiEndpoints.API.USERS.IMPORT.path}"),
+        json=[{"name": "Ada", "email": "ada@example.com"}],
+    )
+    assert response.status_code == 415
+
+
+def test_list_users_paginates_with_cursor():
+    """Test keyset pagination walks every user exactly once"""
+    emails = [f"page.user{i}@example.com" for i in range(5)]
+    for i, email in enumerate(emails):
+        client.post(
+            get_api_path(ApiEndpoints.API.USERS.path),
+            json={"name": f"Page User {i}", "email": email},
+        )
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get(get_api_path(ApiEndpoints.API.USERS.path), params=params)
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["items"]) <= 2
+        seen.extend(item["email"] for item in data["items"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+
+    assert sorted(set(seen) & set(emails)) == sorted(emails)
+    assert len(seen) == len(set(seen))
+
+
+def test_list_users_invalid_cursor():
+    """Test a malformed cursor is rejected"""
+    response = client.get(
+        get_api_path(ApiEndpoints.API.USERS.path), params={"cursor": "not-a-cursor"}
+    )
+    assert response.status_code == 400
+
+
+def test_export_users_ndjson():
+    """Test the export streams one JSON document per line"""
+    user_data = {"name": "Export User", "email": "export.user@example.com"}
+    client.post(get_api_path(ApiEndpoints.API.USERS.path), json=user_data)
+
+    response = client.get(
+        get_api_path(f"{ApiEndpoints.API.USERS.path}{ApiEndpoints.API.USERS.EXPORT.path}")
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    users = [json.loads(line) for line in response.text.splitlines()]
+    exported = next(user for user in users if user["email"] == user_data["email"])
+    assert exported["name"] == user_data["name"]
+    assert set(exported) == {"id", "name", "email", "created_at", "updated_at"}
+
+
+def test_search_users_by_prefix_and_substring():
+    """Test name search is case-insensitive and treats input literally"""
+    for name, email in [
+        ("Searchable Ada", "search.ada@example.com"),
+        ("Searchable Adam", "search.adam@example.com"),
+        ("Other Person", "search.other@example.com"),
+    ]:
+        client.post(get_api_path(ApiEndpoints.API.USERS.path), json={"name": name, "email": email})
+    path = get_api_path(f"{ApiEndpoints.API.USERS.path}{ApiEndpoints.API.USERS.SEARCH.path}")
+
+    response = client.get(path, params={"q": "SEARCHABLE ad"})
+    assert response.status_code == 200
+    assert [user["name"] for user in response.json()] == ["Searchable Ada", "Searchable Adam"]
+
+    response = client.get(path, params={"q": "able adam", "mode": "contains"})
+    assert [user["name"] for user in response.json()] == ["Searchable Adam"]
+
+    response = client.get(path, params={"q": "Search.*", "mode": "contains"})
+    assert response.json() == []
+
+    response = client.get(path, params={"q": "searchable", "limit": 1})
+    assert len(response.json()) == 1
+
+
+def test_batch_get_update_and_delete_users():
+    """Test batch routes preserve order and report missing ids and errors"""
+    ids = [
+        client.post(
+            get_api_path(ApiEndpoints.API.USERS.path),
+            json={"name": f"Batch User {i}", "email": f"batch.user{i}@example.com"},
+        ).json()["id"]
+        for i in range(3)
+    ]
+    unknown = "user_01h455vb4pex5vsknk084sn02q"
+    path = get_api_path(f"{ApiEndpoints.API.USERS.path}{ApiEndpoints.API.USERS.BATCH.path}")
+
+    response = client.get(path, params={"ids": ",".join([ids[2], unknown, ids[0]])})
+    assert response.status_code == 200
+    data = response.json()
+    assert [user["id"] for user in data["items"]] == [ids[2], ids[0]]
+    assert data["missing"] == [unknown]
+
+    response = client.patch(
+        path,
+        json={
+            "items": [
+                {"id": ids[0], "name": "Renamed Batch User"},
+                {"id": ids[1], "email": "batch.user2@example.com"},
+                {"id": unknown, "name": "Nobody"},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [user["name"] for user in data["items"]] == ["Renamed Batch User"]
+    assert data["missing"] == [unknown]
+    assert [error["id"] for error in data["errors"]] == [ids[1]]
+    assert "already exists" in data["errors"][0]["error"]
+
+    response = client.delete(path, params={"ids": ",".join([ids[1], unknown])})
+    assert response.json() == {"deleted": [ids[1]], "missing": [unknown]}
+    assert client.get(path, params={"ids": ids[1]}).json()["missing"] == [ids[1]]
+
+
+def test_batch_routes_reject_invalid_ids():
+    """Test malformed ids are rejected before touching the database"""
+    path = get_api_path(f"{ApiEndpoints.API.USERS.path}{ApiEndpoints.API.USERS.BATCH.path}")
+    assert client.get(path, params={"ids": "user_bad"}).status_code == 400
+    assert client.get(path, params={"ids": ""}).status_code == 400
+    response = client.patch(path, json={"items": [{"id": "user_bad", "name": "X"}]})
+    assert response.status_code == 422
+
+
+def test_batch_update_rejects_null_fields():
+    """Test explicit nulls are rejected rather than stored"""
+    user_id = client.post(
+        get_api_path(ApiEndpoints.API.USERS.path),
+        json={"name": "Null Batch User", "email": "null.batch.user@example.com"},
+    ).json()["id"]
+    path = get_api_path(f"{ApiEndpoints.API.USERS.path}{ApiEndpoints.API.USERS.BATCH.path}")
+
+    for field in ("name", "email"):
+        response = client.patch(path, json={"items": [{"id": user_id, field: None}]})
+        assert response.status_code == 422
+
+    (user,) = client.get(path, params={"ids": user_id}).json()["items"]
+    assert user["name"] == "Null Batch User"
+    assert user["email"] == "null.batch.user@example.com"
@@ -1,15 +1,40 @@
-from dto.user_dto import CreateUserRequest, UserResponse
-from fastapi import APIRouter, Depends
+from typing import Literal
+
+from dto.user_dto import (
+    MAX_BATCH_IDS,
+    BatchUpdateUsersRequest,
+    CreateUserRequest,
+    DeleteUsersResponse,
+    ImportUsersResponse,
+    UserBatchResponse,
+    UserPageResponse,
+    UserResponse,
+)
+from exceptions.user_errors import DuplicateEmailError
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from models.typeid_codec import InvalidTypeIDError, parse_typeid
+from repositories.base_repository import DEFAULT_BATCH_SIZE
+from repositories.pagination import InvalidCursorError
 from services.dependencies import get_user_service
 from services.user_service import UserService
 from src._lib.endpoints import ApiEndpoints
-from src._lib.shared import ApiVersion, get_api_version
+from src._lib.routing import TracedRoute
+from src._lib.streaming import (
+    CSV_MEDIA_TYPES,
+    NDJSON_MEDIA_TYPES,
+    iter_csv_records,
+    iter_lines,
+    iter_ndjson_records,
+)
+from typeid import TypeID
 
 
 router = APIRouter(
     prefix=ApiEndpoints.API.USERS.path,
     tags=["users"],
     responses={404: {"description": "Not found"}},
+    route_class=TracedRoute,
 )
 
 
@@ -17,8 +42,127 @@ router = APIRouter(
 async def create_user(
     user_request: CreateUserRequest,
     user_service: UserService = Depends(get_user_service),
-    api_version: ApiVersion = Depends(get_api_version),
 ):
-    if api_version == ApiVersion.V2024_10_PREVIEW:
+    try:
         return await user_service.create_user(user_request)
-    return await user_service.create_user(user_request)
+    except DuplicateEmailError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+
+
+@router.get("", response_model=UserPageResponse)
+async def list_users(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = None,
+    user_service: UserService = Depends(get_user_service),
+):
+    """
+    List users newest first. Pass the returned `next_cursor` as `cursor`
+    to fetch the following page; it is null on the last page.
+    """
+    try:
+        return await user_service.list_users(limit=limit, cursor=cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+def batch_ids(
+    ids: str = Query(..., description=f"Up to {MAX_BATCH_IDS} comma-separated user ids"),
+) -> list[TypeID]:
+    values = [value.strip() for value in ids.split(",") if value.strip()]
+    if not values or len(values) > MAX_BATCH_IDS:
+        raise HTTPException(
+            status_code=400, detail=f"Expected 1 to {MAX_BATCH_IDS} ids, got {len(values)}"
+        )
+    try:
+        return [parse_typeid(value) for value in values]
+    except InvalidTypeIDError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+@router.get(ApiEndpoints.API.USERS.BATCH.path, response_model=UserBatchResponse)
+async def get_users(
+    ids: list[TypeID] = Depends(batch_ids),
+    user_service: UserService = Depends(get_user_service),
+):
+    """
+    Fetch many users in one call. Users are returned in the order requested;
+    ids with no user are listed in `missing`.
+    """
+    return await user_service.get_users(ids)
+
+
+@router.patch(ApiEndpoints.API.USERS.BATCH.path, response_model=UserBatchResponse)
+async def update_users(
+    request: BatchUpdateUsersRequest,
+    user_service: UserService = Depends(get_user_service),
+):
+    """
+    Partially update many users in one call. Updates are applied
+    independently: a rejected one (e.g. a taken email) is reported in
+    `errors` while the others still apply.
+    """
+    return await user_service.update_users(request)
+
+
+@router.delete(ApiEndpoints.API.USERS.BATCH.path, response_model=DeleteUsersResponse)
+async def delete_users(
+    ids: list[TypeID] = Depends(batch_ids),
+    user_service: UserService = Depends(get_user_service),
+):
+    """Delete many users in one call; ids with no user are listed in `missing`."""
+    return await user_service.delete_users(ids)
+
+
+@router.get(ApiEndpoints.API.USERS.SEARCH.path, response_model=list[UserResponse])
+async def search_users(
+    q: str = Query(..., min_length=1, max_length=100),
+    mode: Literal["prefix", "contains"] = "prefix",
+    limit: int = Query(20, ge=1, le=100),
+    user_service: UserService = Depends(get_user_service),
+):
+    """
+    Case-insensitive name search, ordered by name. `prefix` matches names
+    starting with `q`; `contains` matches `q` anywhere in the name.
+    """
+    return await user_service.search_users(q, contains=mode == "contains", limit=limit)
+
+
+@router.post(ApiEndpoints.API.USERS.IMPORT.path, response_model=ImportUsersResponse)
+async def import_users(
+    request: Request,
+    ordered: bool = False,
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=10_000),
+    user_service: UserService = Depends(get_user_service),
+):
+    """
+    Bulk-create users from an NDJSON or CSV (header: name,email) request body.
+    The body is streamed and inserted in batches; per-row errors are reported.
+    """
+    media_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if media_type in NDJSON_MEDIA_TYPES:
+        rows = iter_ndjson_records(iter_lines(request.stream()))
+    elif media_type in CSV_MEDIA_TYPES:
+        rows = iter_csv_records(iter_lines(request.stream()))
+    else:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Expected one of {', '.join(NDJSON_MEDIA_TYPES + CSV_MEDIA_TYPES)}",
+        )
+    return await user_service.import_users(rows, ordered=ordered, batch_size=batch_size)
+
+
+@router.get(ApiEndpoints.API.USERS.EXPORT.path)
+async def export_users(
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=10_000),
+    user_service: UserService = Depends(get_user_service),
+):
+    """
+    Export every user as NDJSON. Documents are streamed from a cursor as they
+    are serialized, so memory use does not grow with the collection.
+    """
+
+    async def lines():
+        async for user in user_service.stream_users(batch_size=batch_size):
+            yield user.model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPES[0])
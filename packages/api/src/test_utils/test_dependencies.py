@@ -1,10 +1,12 @@
 from repositories.user_repo import UserRepository
 from services.user_service import UserService
+from shared.database import DatabaseSettings
 from testcontainers.mongodb import MongoDbContainer
 
 
 class TestDependencies:
     _container = None
+    _database = None
     _user_service = None
 
     @classmethod
@@ -15,10 +17,19 @@ class TestDependencies:
         return cls._container
 
     @classmethod
-    def get_user_service(cls) -> UserService:
-        if not cls._user_service:
+    async def get_database(cls) -> DatabaseSettings:
+        if not cls._database:
             mongodb_url = cls.get_container().get_connection_url()
-            repository = UserRepository(mongodb_url=mongodb_url, db_name="test_db")
+            cls._database = DatabaseSettings(mongodb_url=mongodb_url, db_name="test_db")
+        await cls._database.initialize()
+        return cls._database
+
+    @classmethod
+    async def get_user_service(cls) -> UserService:
+        if not cls._user_service:
+            database = await cls.get_database()
+            repository = UserRepository(database.db)
+            await repository.initialize()
             cls._user_service = UserService(repository)
         return cls._user_service
 
@@ -27,4 +38,5 @@ class TestDependencies:
         if cls._container:
             cls._container.stop()
             cls._container = None
+        cls._database = None
         cls._user_service = None
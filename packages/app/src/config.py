@@ -1,36 +1,307 @@
+import asyncio
+import logging
 import os
-from functools import lru_cache
+import signal
+from collections.abc import Mapping
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Optional
 
-from dotenv import load_dotenv
+logger = logging.getLogger(__name__)
 
-# Load environment variables from .env file
 env_path = Path(__file__).parent.parent / ".env"
-load_dotenv(env_path)
+
+ID_STORAGES = ("string", "uuid")
+
+
+def read_environment() -> dict[str, str]:
+    """
+    Variables from the .env file overlaid with the process environment, which
+    wins. Read fresh on every call, so edits to .env are seen on reload.
+    """
+    values: dict[str, str] = {}
+    if env_path.is_file():
+        from dotenv import dotenv_values
+
+        values = {k: v for k, v in dotenv_values(env_path).items() if v is not None}
+    return {**values, **os.environ}
 
 
-@lru_cache()
 def get_env(key: str, default: Any = None, required: bool = False) -> Optional[str]:
     """
-    Get environment variable with caching and validation.
+    Get a single environment variable with validation. Prefer `get_settings()`,
+    which parses everything once.
     """
-    value = os.getenv(key, default)
+    value = read_environment().get(key, default)
     if required and value is None:
         raise ValueError(f"Required environment variable '{key}' is not set")
     return value
 
 
-def get_debug() -> bool:
-    """Get DEBUG flag as boolean"""
-    return get_env("DEBUG", "false").lower() in {"1", "yes", "true"}
+def _bool(env: Mapping[str, str], key: str, default: bool) -> bool:
+    value = env.get(key)
+    if value is None:
+        return default
+    return value.lower() in {"1", "yes", "true"}
+
+
+def _number(env: Mapping[str, str], key: str, default: Any, parse=int, minimum=0):
+    value = env.get(key)
+    if value is None:
+        return default
+    try:
+        number = parse(value)
+    except ValueError:
+        raise ValueError(f"{key} must be a number, got {value!r}") from None
+    if number < minimum:
+        raise ValueError(f"{key} must be at least {minimum}, got {number}")
+    return number
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Every tunable, parsed and validated once. Instances are immutable; call
+    `reload_settings()` (or send SIGHUP to the API) to swap in a fresh one.
+    """
+
+    debug: bool = False
+
+    # Database
+    mongodb_url: Optional[str] = None
+    app_db_name: Optional[str] = None
+    mongodb_id_storage: str = "string"
+    # Records bootstrapped indexes so other processes skip creating them
+    mongodb_index_marker_collection: Optional[str] = None
+    # Start even if an index differs from its declaration or a unique one is missing
+    mongodb_allow_index_conflicts: bool = False
+
+    # Connection pool and timeouts (applied when a client is created)
+    mongodb_min_pool_size: int = 10
+    mongodb_max_pool_size: int = 100
+    mongodb_max_idle_time_ms: int = 60_000
+    mongodb_wait_queue_timeout_ms: int = 5_000
+    mongodb_connect_timeout_ms: int = 20_000
+    mongodb_server_selection_timeout_ms: int = 30_000
+
+    # Caching; a TTL of 0 disables the user lookup cache
+    user_cache_ttl_seconds: float = 5.0
+    cache_max_entries: int = 10_000
+
+    # Repository reads
+    repository_batch_reads: bool = True
+    repository_trusted_reads: bool = True
+    repository_read_batch_size: int = 500
+    # Queries at least this slow are logged and explained; 0 turns it off
+    slow_query_threshold_ms: float = 100.0
+    slow_query_explain: bool = True
+    slow_query_log_size: int = 100
+    # Record query shapes for the index advisor (/api/debug/index-advice)
+    index_advisor: bool = False
 
+    # Per-request MongoDB command timing, reported in Server-Timing headers
+    request_tracing: bool = True
+    # Prometheus metrics at /api/metrics: routes, repositories, pool, event loop
+    metrics: bool = True
 
-def get_mongodb_url() -> str:
-    """Get MongoDB connection URL"""
-    return get_env("MONGODB_URL", required=True)
+    # Admission control: per route group concurrency limits, adapted (AIMD) to
+    # keep latency near the target; requests over the limit get a 503
+    admission_control: bool = True
+    admission_read_limit: int = 200
+    admission_write_limit: int = 100
+    admission_bulk_limit: int = 4
+    admission_target_latency_ms: float = 250.0
+    admission_bulk_target_latency_ms: float = 30_000.0
+    admission_retry_after_seconds: int = 1
+
+    # Serving (scripts/serve.py)
+    web_concurrency: int = 1
+    web_backlog: int = 2048
+    web_keep_alive_seconds: int = 5
+    # Recycle a worker after this many requests (plus up to the jitter); 0 never
+    web_max_requests: int = 0
+    web_max_requests_jitter: int = 0
+    web_graceful_timeout_seconds: int = 30
+    openapi_schema_file: Optional[str] = None
+
+    @classmethod
+    def from_env(cls, env: Mapping[str, str]) -> "Settings":
+        """Parse settings from environment variables. Raises ValueError when invalid."""
+        settings = cls(
+            debug=_bool(env, "DEBUG", cls.debug),
+            mongodb_url=env.get("MONGODB_URL"),
+            app_db_name=env.get("MONGODB_APP_DB_NAME"),
+            mongodb_id_storage=env.get("MONGODB_ID_STORAGE", cls.mongodb_id_storage),
+            mongodb_index_marker_collection=(
+                env.get("MONGODB_INDEX_MARKER_COLLECTION") or None
+            ),
+            mongodb_allow_index_conflicts=_bool(
+                env, "MONGODB_ALLOW_INDEX_CONFLICTS", cls.mongodb_allow_index_conflicts
+            ),
+            mongodb_min_pool_size=_number(
+                env, "MONGODB_MIN_POOL_SIZE", cls.mongodb_min_pool_size
+            ),
+            mongodb_max_pool_size=_number(
+                env, "MONGODB_MAX_POOL_SIZE", cls.mongodb_max_pool_size, minimum=1
+            ),
+            mongodb_max_idle_time_ms=_number(
+                env, "MONGODB_MAX_IDLE_TIME_MS", cls.mongodb_max_idle_time_ms
+            ),
+            mongodb_wait_queue_timeout_ms=_number(
+                env, "MONGODB_WAIT_QUEUE_TIMEOUT_MS", cls.mongodb_wait_queue_timeout_ms
+            ),
+            mongodb_connect_timeout_ms=_number(
+                env, "MONGODB_CONNECT_TIMEOUT_MS", cls.mongodb_connect_timeout_ms
+            ),
+            mongodb_server_selection_timeout_ms=_number(
+                env,
+                "MONGODB_SERVER_SELECTION_TIMEOUT_MS",
+                cls.mongodb_server_selection_timeout_ms,
+            ),
+            user_cache_ttl_seconds=_number(
+                env, "USER_CACHE_TTL_SECONDS", cls.user_cache_ttl_seconds, parse=float
+            ),
+            cache_max_entries=_number(
+                env, "CACHE_MAX_ENTRIES", cls.cache_max_entries, minimum=1
+            ),
+            repository_batch_reads=_bool(
+                env, "REPOSITORY_BATCH_READS", cls.repository_batch_reads
+            ),
+            repository_trusted_reads=_bool(
+                env, "REPOSITORY_TRUSTED_READS", cls.repository_trusted_reads
+            ),
+            repository_read_batch_size=_number(
+                env,
+                "REPOSITORY_READ_BATCH_SIZE",
+                cls.repository_read_batch_size,
+                minimum=1,
+            ),
+            slow_query_threshold_ms=_number(
+                env,
+                "SLOW_QUERY_THRESHOLD_MS",
+                cls.slow_query_threshold_ms,
+                parse=float,
+            ),
+            slow_query_explain=_bool(env, "SLOW_QUERY_EXPLAIN", cls.slow_query_explain),
+            slow_query_log_size=_number(
+                env, "SLOW_QUERY_LOG_SIZE", cls.slow_query_log_size, minimum=1
+            ),
+            index_advisor=_bool(env, "INDEX_ADVISOR", cls.index_advisor),
+            request_tracing=_bool(env, "REQUEST_TRACING", cls.request_tracing),
+            metrics=_bool(env, "METRICS", cls.metrics),
+            admission_control=_bool(env, "ADMISSION_CONTROL", cls.admission_control),
+            admission_read_limit=_number(
+                env, "ADMISSION_READ_LIMIT", cls.admission_read_limit, minimum=1
+            ),
+            admission_write_limit=_number(
+                env, "ADMISSION_WRITE_LIMIT", cls.admission_write_limit, minimum=1
+            ),
+            admission_bulk_limit=_number(
+                env, "ADMISSION_BULK_LIMIT", cls.admission_bulk_limit, minimum=1
+            ),
+            admission_target_latency_ms=_number(
+                env,
+                "ADMISSION_TARGET_LATENCY_MS",
+                cls.admission_target_latency_ms,
+                parse=float,
+            ),
+            admission_bulk_target_latency_ms=_number(
+                env,
+                "ADMISSION_BULK_TARGET_LATENCY_MS",
+                cls.admission_bulk_target_latency_ms,
+                parse=float,
+            ),
+            admission_retry_after_seconds=_number(
+                env,
+                "ADMISSION_RETRY_AFTER_SECONDS",
+                cls.admission_retry_after_seconds,
+            ),
+            web_concurrency=_number(
+                env, "WEB_CONCURRENCY", os.process_cpu_count() or 1, minimum=1
+            ),
+            web_backlog=_number(env, "WEB_BACKLOG", cls.web_backlog, minimum=1),
+            web_keep_alive_seconds=_number(
+                env, "WEB_KEEP_ALIVE_SECONDS", cls.web_keep_alive_seconds
+            ),
+            web_max_requests=_number(env, "WEB_MAX_REQUESTS", cls.web_max_requests),
+            web_max_requests_jitter=_number(
+                env, "WEB_MAX_REQUESTS_JITTER", cls.web_max_requests_jitter
+            ),
+            web_graceful_timeout_seconds=_number(
+                env, "WEB_GRACEFUL_TIMEOUT_SECONDS", cls.web_graceful_timeout_seconds
+            ),
+            openapi_schema_file=env.get("OPENAPI_SCHEMA_FILE"),
+        )
+        if settings.mongodb_id_storage not in ID_STORAGES:
+            raise ValueError(
+                f"MONGODB_ID_STORAGE must be one of {ID_STORAGES}, "
+                f"got {settings.mongodb_id_storage!r}"
+            )
+        marker_collection = settings.mongodb_index_marker_collection
+        if marker_collection and (
+            marker_collection.startswith("system.") or "$" in marker_collection
+        ):
+            raise ValueError(
+                "MONGODB_INDEX_MARKER_COLLECTION must be a valid collection name, "
+                f"got {marker_collection!r}"
+            )
+        if settings.mongodb_min_pool_size > settings.mongodb_max_pool_size:
+            raise ValueError(
+                "MONGODB_MIN_POOL_SIZE must not exceed MONGODB_MAX_POOL_SIZE"
+            )
+        return settings
+
+
+_settings: Optional[Settings] = None
+
+
+def load_settings() -> Settings:
+    """Parse a new Settings from the .env file and the process environment."""
+    return Settings.from_env(read_environment())
+
+
+def get_settings() -> Settings:
+    """The current settings, parsed on first use."""
+    global _settings
+    if _settings is None:
+        _settings = load_settings()
+    return _settings
+
+
+def reload_settings() -> Settings:
+    """
+    Re-read the environment and swap in new settings. Invalid values are logged
+    and the current settings are kept, so a bad edit can't take the process down.
+    Consumers that hold a Settings (the shared MongoDB client, for one) keep it
+    until they are rebuilt; see `services.dependencies` for what is rebuilt.
+    """
+    global _settings
+    try:
+        _settings = load_settings()
+    except ValueError as e:
+        logger.error(f"Keeping current settings, reload failed: {e}")
+        return get_settings()
+    logger.info("Settings reloaded")
+    return _settings
+
+
+def install_reload_signal_handler() -> bool:
+    """
+    Reload settings on SIGHUP. Must be called from the running event loop in
+    the main thread; returns False where that isn't possible.
+    """
+    if not hasattr(signal, "SIGHUP"):
+        return False
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, reload_settings)
+    except (NotImplementedError, RuntimeError, ValueError):
+        return False
+    return True
 
 
-def get_app_db_name() -> str:
-    """Get MongoDB database name"""
-    return get_env("MONGODB_APP_DB_NAME", required=True)
+def remove_reload_signal_handler() -> None:
+    if hasattr(signal, "SIGHUP"):
+        try:
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGHUP)
+        except (NotImplementedError, RuntimeError, ValueError):
+            pass
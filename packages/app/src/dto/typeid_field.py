@@ -2,6 +2,8 @@ from pydantic import WithJsonSchema
 from pydantic_core import CoreSchema, core_schema
 from typeid import TypeID
 
+from models.typeid_codec import parse_typeid
+
 
 class TypeIDField(TypeID):
     @classmethod
@@ -9,14 +11,14 @@ class TypeIDField(TypeID):
         cls, _source_type: type[TypeID], _handler: WithJsonSchema
     ) -> CoreSchema:
         return core_schema.json_or_python_schema(
-            json_schema=core_schema.str_schema(),
+            json_schema=core_schema.no_info_after_validator_function(
+                parse_typeid, core_schema.str_schema()
+            ),
             python_schema=core_schema.union_schema(
                 [
                     core_schema.is_instance_schema(TypeID),
-                    core_schema.no_info_plain_validator_function(TypeID.from_string),
+                    core_schema.no_info_plain_validator_function(parse_typeid),
                 ]
             ),
-            serialization=core_schema.plain_serializer_function_ser_schema(
-                lambda x: str(x)
-            ),
+            serialization=core_schema.to_string_ser_schema(),
         )
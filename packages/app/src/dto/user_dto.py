@@ -2,10 +2,13 @@
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel, ConfigDict, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
 
 from .typeid_field import TypeIDField
 
+# Most ids accepted by one batch request
+MAX_BATCH_IDS = 500
+
 
 class CreateUserRequest(BaseModel):
     name: str = Field(..., min_length=1)
@@ -25,3 +28,54 @@ class UserResponse(BaseModel):
     updated_at: Optional[datetime] = None
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
+
+
+class BatchUpdateUserItem(UpdateUserRequest):
+    id: TypeIDField
+
+    @field_validator("name", "email")
+    @classmethod
+    def not_null(cls, value):
+        # Omit a field to leave it unchanged; null would be stored as is
+        if value is None:
+            raise ValueError("must not be null")
+        return value
+
+
+class BatchUpdateUsersRequest(BaseModel):
+    items: list[BatchUpdateUserItem] = Field(
+        ..., min_length=1, max_length=MAX_BATCH_IDS
+    )
+
+
+class BatchItemError(BaseModel):
+    id: str
+    error: str
+
+
+class UserBatchResponse(BaseModel):
+    items: list[UserResponse]
+    missing: list[str] = []
+    errors: list[BatchItemError] = []
+
+
+class DeleteUsersResponse(BaseModel):
+    deleted: list[str]
+    missing: list[str] = []
+
+
+class UserPageResponse(BaseModel):
+    items: list[UserResponse]
+    next_cursor: Optional[str] = None
+
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+
+class ImportUsersResponse(BaseModel):
+    inserted: int = 0
+    failed: int = 0
+    errors: list[ImportRowError] = []
+    errors_truncated: bool = False
@@ -14,8 +14,18 @@ class BaseDocument(BaseModel):
     def get_collection_name(cls) -> str:
         raise NotImplementedError
 
+    @classmethod
+    def get_id_prefix(cls) -> str:
+        """TypeID prefix of the collection's ids, e.g. "user"."""
+        return ""
+
     @classmethod
     def get_indexes(cls) -> list:
+        """
+        Indexes for the collection. Entries are either a key list such as
+        `[("created_at", -1)]` or a `pymongo.IndexModel` when options like
+        unique, partialFilterExpression, expireAfterSeconds or collation are needed.
+        """
         return []
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -0,0 +1,45 @@
+from bson.binary import Binary
+from typeid import TypeID
+
+from .typeid_codec import IdCodec, UuidIdCodec, make_id_codec, parse_typeid
+
+
+class TestTypeIDCodec:
+    def test_parse_is_memoized(self):
+        value = str(TypeID(prefix="user"))
+
+        assert parse_typeid(value) is parse_typeid(value)
+        assert parse_typeid(value) == TypeID.from_string(value)
+
+    def test_string_codec_round_trips(self):
+        codec = IdCodec()
+        id = TypeID(prefix="user")
+
+        assert codec.encode(id) == str(id)
+        assert codec.decode(codec.encode(id)) == id
+        assert codec.match_values(id) == [str(id)]
+
+    def test_uuid_codec_round_trips_and_reads_legacy_strings(self):
+        codec = UuidIdCodec(prefix="user")
+        id = TypeID(prefix="user")
+        encoded = codec.encode(id)
+
+        assert isinstance(encoded, Binary)
+        assert encoded.subtype == 4
+        assert len(encoded) == 16
+        assert codec.decode(encoded) == id
+        assert codec.decode(str(id)) == id
+        assert codec.is_legacy(str(id)) and not codec.is_legacy(encoded)
+        assert codec.match_values(id) == [encoded, str(id)]
+
+    def test_uuid_bytes_sort_like_strings(self):
+        ids = [TypeID(prefix="user") for _ in range(50)]
+        codec = UuidIdCodec(prefix="user")
+
+        by_string = sorted(ids, key=str)
+        by_bytes = sorted(ids, key=lambda id: bytes(codec.encode(id)))
+        assert by_string == by_bytes
+
+    def test_make_id_codec(self):
+        assert isinstance(make_id_codec("string"), IdCodec)
+        assert make_id_codec("uuid", "user").prefix == "user"
@@ -0,0 +1,114 @@
+from functools import lru_cache
+from typing import Any
+
+from bson.binary import Binary, UuidRepresentation
+from typeid import TypeID
+from typeid.errors import (
+    InvalidTypeIDStringException,
+    PrefixValidationException,
+    SuffixValidationException,
+    TypeIDException,
+)
+
+# Ids memoized by parse/format; bounds memory while hot ids stay cached
+TYPEID_CACHE_SIZE = 65_536
+
+ID_STORAGE_STRING = "string"
+ID_STORAGE_UUID = "uuid"
+
+
+class InvalidTypeIDError(ValueError):
+    pass
+
+
+@lru_cache(maxsize=TYPEID_CACHE_SIZE)
+def parse_typeid(value: str) -> TypeID:
+    """
+    TypeID.from_string with memoization; TypeIDs are never mutated.
+    Raises InvalidTypeIDError, a ValueError, for malformed ids.
+    """
+    try:
+        return TypeID.from_string(value)
+    except (
+        InvalidTypeIDStringException,
+        PrefixValidationException,
+        SuffixValidationException,
+        TypeIDException,
+    ) as e:
+        raise InvalidTypeIDError(f"Invalid id: {value}") from e
+
+
+@lru_cache(maxsize=TYPEID_CACHE_SIZE)
+def _from_uuid(value: Binary, prefix: str) -> TypeID:
+    return TypeID.from_uuid(value.as_uuid(UuidRepresentation.STANDARD), prefix)
+
+
+@lru_cache(maxsize=TYPEID_CACHE_SIZE)
+def _to_uuid(id: TypeID) -> Binary:
+    return Binary.from_uuid(id.uuid, UuidRepresentation.STANDARD)
+
+
+def to_typeid(value: TypeID | str) -> TypeID:
+    return value if isinstance(value, TypeID) else parse_typeid(value)
+
+
+class IdCodec:
+    """Stores TypeIDs as their string form, e.g. "user_01h455vb4pex5vsknk084sn02q"."""
+
+    storage = ID_STORAGE_STRING
+
+    def encode(self, id: TypeID | str) -> Any:
+        return str(id)
+
+    def decode(self, value: Any) -> TypeID:
+        return to_typeid(value)
+
+    def match_values(self, id: TypeID | str) -> list:
+        """Stored values that may represent `id`, for use in filters."""
+        return [self.encode(id)]
+
+    def is_legacy(self, value: Any) -> bool:
+        """Whether a stored id still needs rewriting into this codec's form."""
+        return False
+
+
+class UuidIdCodec(IdCodec):
+    """
+    Stores TypeIDs as a 16-byte BSON UUID (binary subtype 4); the prefix is
+    fixed per collection and restored on read. UUIDv7 bytes sort by creation
+    time just like the string form, so range queries keep working.
+
+    String ids written before switching are still read, and `match_values`
+    covers both forms until the collection has been migrated. Keyset
+    pagination only orders ids of the same form, so migrate before relying on it.
+    """
+
+    storage = ID_STORAGE_UUID
+
+    def __init__(self, prefix: str = "", accept_legacy: bool = True):
+        self.prefix = prefix
+        self.accept_legacy = accept_legacy
+
+    def encode(self, id: TypeID | str) -> Binary:
+        return _to_uuid(to_typeid(id))
+
+    def decode(self, value: Any) -> TypeID:
+        if isinstance(value, Binary):
+            return _from_uuid(value, self.prefix)
+        return super().decode(value)
+
+    def match_values(self, id: TypeID | str) -> list:
+        if self.accept_legacy:
+            return [self.encode(id), str(id)]
+        return [self.encode(id)]
+
+    def is_legacy(self, value: Any) -> bool:
+        return isinstance(value, str)
+
+
+def make_id_codec(storage: str, prefix: str = "") -> IdCodec:
+    if storage == ID_STORAGE_STRING:
+        return IdCodec()
+    if storage == ID_STORAGE_UUID:
+        return UuidIdCodec(prefix)
+    raise ValueError(f"Unknown id storage: {storage!r}")
@@ -1,4 +1,5 @@
 from pydantic import EmailStr, Field
+from pymongo import IndexModel
 
 from .base_model import BaseDocument
 
@@ -11,6 +12,18 @@ class User(BaseDocument):
     def get_collection_name(cls) -> str:
         return "users"
 
+    @classmethod
+    def get_id_prefix(cls) -> str:
+        return "user"
+
     @classmethod
     def get_indexes(cls) -> list:
-        return [[("id", 1)], [("email", 1)], [("created_at", -1)]]
+        return [
+            [("id", 1)],
+            IndexModel([("email", 1)], unique=True),
+            # Serves newest-first listing and keyset pagination
+            [("created_at", -1), ("id", -1)],
+            # Name search: prefix seeks and substring candidates (see UserRepository)
+            [("name_key", 1)],
+            [("name_ngrams", 1)],
+        ]
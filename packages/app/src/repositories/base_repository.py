@@ -1,81 +1,452 @@
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass, field
 from datetime import UTC, datetime
-from typing import Generic, List, Optional, TypeVar
+from itertools import islice
+from typing import Any, Generic, List, Optional, TypeVar
 
-from motor.motor_asyncio import AsyncIOMotorClient
+import bson
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import BaseModel
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+from pymongo.results import BulkWriteResult
 from typeid import TypeID
 
 from models.base_model import BaseDocument
+from models.typeid_codec import IdCodec
+
+from .cache import RepositoryCache
+from .hydration import get_decoder
+from .index_advisor import query_shape_recorder
+from .index_registry import index_registry
+from .instrumentation import instrumented
+from .pagination import PAGE_SORT, Page, after_cursor, encode_cursor
+from .single_flight import BatchLoader, single_flight
+from .slow_queries import SlowQueryLog
 
 D = TypeVar("D", bound=BaseDocument)
+M = TypeVar("M", bound=BaseModel)
+T = TypeVar("T")
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+@dataclass
+class BulkInsertResult:
+    inserted_count: int = 0
+    # (position in the input sequence, server error) for every rejected document;
+    # the error's "op" is the document as sent
+    errors: list[tuple[int, dict]] = field(default_factory=list)
+
+
+@dataclass
+class BatchResult(Generic[T]):
+    # Results in request order
+    items: list[T] = field(default_factory=list)
+    # Requested ids that matched no document
+    missing: list[str] = field(default_factory=list)
+    # id -> server error, for writes the server rejected
+    errors: dict[str, dict] = field(default_factory=dict)
 
 
 class BaseRepository(Generic[D]):
-    def __init__(self, mongodb_url: str, db_name: str, model_class: type[D]):
-        self.client = AsyncIOMotorClient(mongodb_url)
-        self.db = self.client[db_name]
+    # Fields `_cache_keys` reads; an update changing one drops old-value entries
+    cache_key_fields: tuple[str, ...] = ("id",)
+
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        model_class: type[D],
+        cache: Optional[RepositoryCache] = None,
+        batch_reads: bool = False,
+        trusted_reads: bool = False,
+        id_codec: Optional[IdCodec] = None,
+        read_batch_size: int = 500,
+        slow_queries: Optional[SlowQueryLog] = None,
+    ):
+        """
+        With `batch_reads`, concurrent `get_by_id` calls on this repository are
+        merged into `{"id": {"$in": [...]}}` queries of up to `read_batch_size`
+        ids. With
+        `trusted_reads`, stored documents are hydrated without validation.
+        `id_codec` picks how ids are stored; strings by default.
+        Queries slower than its threshold are recorded in `slow_queries`.
+        """
+        self.db = db
         self.model_class = model_class
         self.collection = self.db[model_class.get_collection_name()]
-        self._initialized = False
+        self.cache = cache
+        self.trusted_reads = trusted_reads
+        self.id_codec = id_codec or IdCodec()
+        self.slow_queries = slow_queries
+        self._id_loader: Optional[BatchLoader[str, dict]] = (
+            BatchLoader(self._fetch_by_ids, max_batch_size=read_batch_size)
+            if batch_reads
+            else None
+        )
 
     async def initialize(self):
-        if not self._initialized:
-            for index in self.model_class.get_indexes():
-                await self.collection.create_index(index)
-            self._initialized = True
+        # Indexes are bootstrapped once per process at startup; this is a no-op
+        # once the registry has seen the model
+        await index_registry.ensure_indexes(self.db, self.model_class)
 
-    async def create(self, document: D) -> D:
-        await self.initialize()  # Ensure initialization
+    def _to_document(self, document: D) -> dict:
         doc_dict = document.model_dump()
-        doc_dict["id"] = str(doc_dict["id"])  # Convert TypeID to string
-        await self.collection.insert_one(doc_dict)
+        doc_dict["id"] = self.id_codec.encode(doc_dict["id"])
+        return doc_dict
+
+    @instrumented
+    async def create(self, document: D) -> D:
+        await self.collection.insert_one(self._to_document(document))
+        await self._invalidate()
         return document
 
-    async def get_by_id(self, id: TypeID) -> Optional[D]:
-        await self.initialize()  # Ensure initialization
-        doc = await self.collection.find_one(
-            {"id": str(id)}
-        )  # Convert TypeID to string
-        if doc:
-            doc["id"] = TypeID.from_string(doc["id"])  # Convert string back to TypeID
-        return self.model_class(**doc) if doc else None
-
-    async def find_one(self, query: dict) -> Optional[D]:
-        await self.initialize()  # Ensure initialization
-        doc = await self.collection.find_one(query)
-        if doc and "id" in doc:
-            doc["id"] = TypeID.from_string(doc["id"])  # Convert string back to TypeID
-        return self.model_class(**doc) if doc else None
-
-    async def find_many(self, query: dict, skip: int = 0, limit: int = 100) -> List[D]:
-        await self.initialize()  # Ensure initialization
+    @instrumented
+    async def create_many(
+        self,
+        documents: Iterable[D],
+        ordered: bool = True,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> BulkInsertResult:
+        """
+        Insert documents with one `insert_many` per batch.
+        Ordered inserts stop at the first rejected document; unordered inserts
+        keep going and report every rejected position.
+        """
+        result = BulkInsertResult()
+        iterator = iter(documents)
+        offset = 0
+        while batch := [self._to_document(doc) for doc in islice(iterator, batch_size)]:
+            try:
+                inserted = await self.collection.insert_many(batch, ordered=ordered)
+                result.inserted_count += len(inserted.inserted_ids)
+            except BulkWriteError as e:
+                result.inserted_count += e.details.get("nInserted", 0)
+                for error in e.details["writeErrors"]:
+                    error.setdefault("op", batch[error["index"]])
+                    result.errors.append((offset + error["index"], error))
+                if ordered:
+                    break
+            finally:
+                await self._invalidate()
+            offset += len(batch)
+        return result
+
+    @instrumented
+    async def bulk_write(
+        self, operations: list, ordered: bool = True
+    ) -> BulkWriteResult:
+        """
+        Run pymongo write operations (InsertOne, UpdateOne, ...) in one call.
+        Coalesced reads still in flight are dropped, so later reads see the
+        writes, but cache entries are left as they are: the operations do not
+        say which documents changed, so callers must invalidate those.
+        """
+        try:
+            return await self.collection.bulk_write(operations, ordered=ordered)
+        finally:
+            await self._invalidate()
+
+    def _to_model(self, doc: dict, into: Optional[type[M]] = None) -> D | M:
+        """
+        Hydrate a stored document into the repository's model, or directly
+        into `into` (e.g. a response model) without the intermediate model.
+        """
+        return get_decoder(into or self.model_class, self.trusted_reads, self.id_codec)(
+            doc
+        )
+
+    def _id_filter(self, *ids: TypeID | str) -> dict:
+        values = [value for id in ids for value in self.id_codec.match_values(id)]
+        return {"id": values[0] if len(values) == 1 else {"$in": values}}
+
+    @instrumented
+    async def migrate_ids(self, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """
+        Rewrite ids stored in an older form (e.g. strings before switching to
+        UUID storage) into the codec's current form. Safe to re-run; returns
+        the number of documents rewritten.
+        """
+
+        def rewrite(doc: dict) -> Optional[dict]:
+            if not self.id_codec.is_legacy(doc["id"]):
+                return None
+            return {"id": self.id_codec.encode(doc["id"])}
+
+        return await self._rewrite({}, {"id": 1}, rewrite, batch_size)
+
+    async def _rewrite(
+        self,
+        query: dict,
+        projection: dict,
+        rewrite: Callable[[dict], Optional[dict]],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> int:
+        """
+        `$set` the fields returned by `rewrite(doc)` on every matching document,
+        one unordered bulk write per batch; None leaves a document unchanged.
+        Returns the number of documents modified.
+        """
+        modified = 0
+        cursor = self.collection.find(query, projection).batch_size(batch_size)
+        batch = []
+        async for doc in cursor:
+            fields = rewrite(doc)
+            if fields is None:
+                continue
+            batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": fields}))
+            if len(batch) >= batch_size:
+                modified += (await self.bulk_write(batch, ordered=False)).modified_count
+                batch = []
+        if batch:
+            modified += (await self.bulk_write(batch, ordered=False)).modified_count
+        return modified
+
+    def _cache_key(self, field_name: str, value: Any) -> str:
+        return f"{self.collection.name}:{field_name}:{value}"
+
+    def _cache_keys(self, doc: dict) -> list[str]:
+        """Cache entries that may hold `doc`; extend when caching other lookups."""
+        return [self._cache_key("id", self.id_codec.decode(doc["id"]))]
+
+    def _flight_key(self, method: str, query: dict) -> tuple:
+        return (self.db.name, self.collection.name, method, bson.encode(query))
+
+    def _watch(
+        self,
+        operation: str,
+        query: dict,
+        sort: Any = None,
+        limit: int = 0,
+        projection: Optional[dict] = None,
+    ) -> AbstractContextManager:
+        """
+        Time a query run inside the block against the slow query threshold,
+        and record its shape for the index advisor when that is enabled.
+        """
+        if query_shape_recorder.enabled:
+            query_shape_recorder.record(self.collection.name, query, sort, projection)
+        if self.slow_queries is None:
+            return nullcontext()
+        return self.slow_queries.watch(self.collection, operation, query, sort, limit)
+
+    async def _fetch_one(self, query: dict) -> Optional[dict]:
+        """find_one where concurrent identical queries share one round-trip."""
+
+        async def load() -> Optional[dict]:
+            with self._watch("find_one", query, limit=1):
+                return await self.collection.find_one(query)
+
+        return await single_flight.do(self._flight_key("find_one", query), load)
+
+    async def _fetch_by_ids(
+        self, ids: list[str], projection: Optional[dict] = None
+    ) -> dict[str, dict]:
+        query = self._id_filter(*ids)
+        with self._watch("find_by_ids", query, projection=projection):
+            docs = await self.collection.find(query, projection).to_list(None)
+        return {str(self.id_codec.decode(doc["id"])): doc for doc in docs}
+
+    async def _fetch_by_id(self, id: str) -> Optional[dict]:
+        if self._id_loader is not None:
+            return await self._id_loader.load(id)
+        return await self._fetch_one(self._id_filter(id))
+
+    async def _read(
+        self,
+        loader: Callable[[], Awaitable[Optional[dict]]],
+        cache_key: Optional[str] = None,
+    ) -> Optional[dict]:
+        if self.cache is not None and cache_key is not None:
+            return await self.cache.get_or_load(cache_key, loader)
+        # May be shared with concurrent callers; hydration never mutates it
+        return await loader()
+
+    async def _invalidate(self, *docs: Optional[dict]):
+        # Reads issued after a write must not join one that started before it
+        single_flight.forget_prefix((self.db.name, self.collection.name))
+        if self.cache is not None:
+            keys = [key for doc in docs if doc for key in self._cache_keys(doc)]
+            await self.cache.invalidate(*keys)
+
+    @instrumented
+    async def get_by_id(
+        self, id: TypeID, into: Optional[type[M]] = None
+    ) -> Optional[D | M]:
+        key = str(id)  # Convert TypeID to string
+        doc = await self._read(
+            lambda: self._fetch_by_id(key), self._cache_key("id", key)
+        )
+        return self._to_model(doc, into) if doc else None
+
+    @instrumented
+    async def get_many_by_ids(
+        self, ids: Iterable[TypeID | str], into: Optional[type[M]] = None
+    ) -> BatchResult[D | M]:
+        """
+        Fetch the documents for many ids with a single `$in` query. Items follow
+        the order of `ids` with duplicates collapsed.
+        """
+        keys = list(dict.fromkeys(map(str, ids)))
+        found = await self._fetch_by_ids(keys) if keys else {}
+        result = BatchResult()
+        for key in keys:
+            if key in found:
+                result.items.append(self._to_model(found[key], into))
+            else:
+                result.missing.append(key)
+        return result
+
+    @instrumented
+    async def find_one(
+        self, query: dict, into: Optional[type[M]] = None
+    ) -> Optional[D | M]:
+        doc = await self._read(lambda: self._fetch_one(query))
+        return self._to_model(doc, into) if doc else None
+
+    @instrumented
+    async def find_many(
+        self,
+        query: dict,
+        skip: int = 0,
+        limit: int = 100,
+        into: Optional[type[M]] = None,
+    ) -> List[D | M]:
         cursor = self.collection.find(query).skip(skip).limit(limit)
-        results = []
+        with self._watch("find_many", query, limit=limit):
+            docs = await cursor.to_list(None)
+        return [self._to_model(doc, into) for doc in docs]
+
+    async def stream(
+        self,
+        query: dict,
+        projection: Optional[dict] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        raw: bool = False,
+        into: Optional[type[M]] = None,
+    ) -> AsyncIterator[D | M | dict]:
+        """
+        Yield matching documents lazily, fetching `batch_size` per round-trip.
+        A projection is applied server-side; projected documents are usually
+        incomplete models, so pair it with `raw=True` to get plain dicts or
+        with an `into` model covering just the projected fields.
+        """
+        cursor = self.collection.find(query, projection).batch_size(batch_size)
         async for doc in cursor:
-            if "id" in doc:
-                doc["id"] = TypeID.from_string(
-                    doc["id"]
-                )  # Convert string back to TypeID
-            results.append(self.model_class(**doc))
-        return results
+            yield doc if raw else self._to_model(doc, into)
 
-    async def update(self, id: TypeID, update_dict: dict) -> Optional[D]:
-        await self.initialize()  # Ensure initialization
+    @instrumented
+    async def find_page(
+        self,
+        query: dict,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        into: Optional[type[M]] = None,
+    ) -> Page[D | M]:
+        """
+        Keyset pagination, newest first. Each page costs the same regardless of
+        depth because it seeks on the (created_at, id) index instead of skipping.
+        Raises InvalidCursorError for a malformed cursor.
+        """
+        if cursor:
+            after = after_cursor(cursor, self.id_codec.encode)
+            query = {"$and": [query, after]} if query else after
+        with self._watch("find_page", query, PAGE_SORT, limit + 1):
+            docs = await self.collection.find(query).sort(PAGE_SORT).to_list(limit + 1)
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            last = docs[-1]
+            next_cursor = encode_cursor(
+                last["created_at"], str(self.id_codec.decode(last["id"]))
+            )
+        return Page(
+            items=[self._to_model(doc, into) for doc in docs], next_cursor=next_cursor
+        )
 
+    @instrumented
+    async def update(self, id: TypeID, update_dict: dict) -> Optional[D]:
         update_dict["updated_at"] = datetime.now(UTC)
+        previous = None
+        if self.cache is not None and any(
+            name.split(".")[0] in self.cache_key_fields for name in update_dict
+        ):
+            # Entries keyed on values being replaced (e.g. an old email) must be
+            # dropped too, so read just those fields first
+            previous = await self.collection.find_one(
+                self._id_filter(id), dict.fromkeys(self.cache_key_fields, 1)
+            )
         result = await self.collection.find_one_and_update(
-            {"id": str(id)},
+            self._id_filter(id),
             {"$set": update_dict},
-            return_document=True,  # Convert TypeID to string
+            return_document=ReturnDocument.AFTER,
+        )
+        await self._invalidate(previous, result)
+        return self._to_model(result) if result else None
+
+    @instrumented
+    async def update_many(
+        self, updates: dict[TypeID | str, dict], into: Optional[type[M]] = None
+    ) -> BatchResult[D | M]:
+        """
+        Apply a partial `$set` per id in one unordered bulk write and return
+        the updated documents. An update the server rejects (e.g. a duplicate
+        key) is reported in `errors` without stopping the others.
+        """
+        updates = {str(id): update for id, update in updates.items()}
+        if not updates:
+            return BatchResult()
+        # Previous versions are needed to drop cache entries keyed on old values
+        previous = await self._fetch_by_ids(list(updates))
+        found = [key for key in updates if key in previous]
+        now = datetime.now(UTC)
+        operations = [
+            UpdateOne(
+                self._id_filter(key), {"$set": {**updates[key], "updated_at": now}}
+            )
+            for key in found
+        ]
+        result = BatchResult()
+        if operations:
+            try:
+                await self.bulk_write(operations, ordered=False)
+            except BulkWriteError as e:
+                result.errors = {
+                    found[error["index"]]: error for error in e.details["writeErrors"]
+                }
+        current = await self._fetch_by_ids(found) if found else {}
+        await self._invalidate(*previous.values(), *current.values())
+        for key in updates:
+            if key in result.errors:
+                continue
+            if key in current:
+                result.items.append(self._to_model(current[key], into))
+            else:
+                result.missing.append(key)
+        return result
+
+    @instrumented
+    async def delete_many(self, ids: Iterable[TypeID | str]) -> BatchResult[str]:
+        """Delete many documents by id; `items` holds the ids that were deleted."""
+        keys = list(dict.fromkeys(map(str, ids)))
+        # Whole documents are only needed to find their cache entries
+        projection = None if self.cache is not None else {"id": 1}
+        found = await self._fetch_by_ids(keys, projection) if keys else {}
+        if found:
+            await self.collection.delete_many(self._id_filter(*found))
+        await self._invalidate(*found.values())
+        return BatchResult(
+            items=[key for key in keys if key in found],
+            missing=[key for key in keys if key not in found],
         )
-        if result and "id" in result:
-            result["id"] = TypeID.from_string(
-                result["id"]
-            )  # Convert string back to TypeID
-        return self.model_class(**result) if result else None
 
+    @instrumented
     async def delete(self, id: TypeID) -> bool:
-        await self.initialize()  # Ensure initialization
-        result = await self.collection.delete_one(
-            {"id": str(id)}
-        )  # Convert TypeID to string
-        return result.deleted_count > 0
+        if self.cache is None:
+            result = await self.collection.delete_one(self._id_filter(id))
+            await self._invalidate()
+            return result.deleted_count > 0
+        deleted = await self.collection.find_one_and_delete(self._id_filter(id))
+        await self._invalidate(deleted)
+        return deleted is not None
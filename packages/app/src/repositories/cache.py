@@ -0,0 +1,110 @@
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Optional, Protocol
+
+import bson
+
+from .single_flight import SingleFlight
+
+
+class CacheBackend(Protocol):
+    """
+    Storage for cached documents. Values are BSON-encoded bytes, so the same
+    interface fits in-process dictionaries and external stores such as Redis.
+    """
+
+    async def get(self, key: str) -> Optional[bytes]: ...
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None: ...
+
+    async def delete(self, *keys: str) -> None: ...
+
+
+class LocalCacheBackend:
+    """In-process backend with per-entry TTL and least-recently-used eviction."""
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RepositoryCache:
+    """
+    Read-through document cache for repository lookups.
+    Concurrent misses on the same key share a single load, and a load that
+    overlaps an invalidation is not written back.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float = 5.0):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._flight = SingleFlight()
+        # Bumped on every invalidation; loads that started earlier may be stale
+        self._epoch = 0
+
+    async def get_or_load(
+        self, key: str, loader: Callable[[], Awaitable[Optional[dict]]]
+    ) -> Optional[dict]:
+        """Return the cached document for `key`, loading and caching it on a miss."""
+        cached = await self.backend.get(key)
+        if cached is not None:
+            self.hits += 1
+            return bson.decode(cached)
+
+        self.misses += 1
+        encoded = await self._flight.do(key, lambda: self._load(key, loader))
+        # Every caller decodes its own copy, so callers never share a dict
+        return bson.decode(encoded) if encoded is not None else None
+
+    async def _load(
+        self, key: str, loader: Callable[[], Awaitable[Optional[dict]]]
+    ) -> Optional[bytes]:
+        epoch = self._epoch
+        doc = await loader()
+        encoded = bson.encode(doc) if doc is not None else None
+        if encoded is not None and epoch == self._epoch:
+            await self.backend.set(key, encoded, self.ttl)
+        return encoded
+
+    async def invalidate(self, *keys: str) -> None:
+        self.invalidations += len(keys)
+        self._epoch += 1
+        # Callers arriving after the write must not join a load that started before it
+        self._flight.forget(*keys)
+        await self.backend.delete(*keys)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "collapsed": self._flight.shared,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,49 @@
+from collections.abc import Callable
+from functools import lru_cache
+from typing import Any, TypeVar
+
+from pydantic import BaseModel
+from typeid import TypeID
+
+from models.typeid_codec import IdCodec, to_typeid
+
+M = TypeVar("M", bound=BaseModel)
+
+STRING_IDS = IdCodec()
+
+
+def _is_typeid(annotation: Any) -> bool:
+    return isinstance(annotation, type) and issubclass(annotation, TypeID)
+
+
+@lru_cache(maxsize=None)
+def get_decoder(
+    model_class: type[M], trusted: bool = False, id_codec: IdCodec = STRING_IDS
+) -> Callable[[dict], M]:
+    """
+    Build, once per model class, the function that turns a stored document
+    into `model_class`. Only the model's fields are read, so the same document
+    can be decoded straight into a response model, and the document itself is
+    never mutated. The `id` field is read through `id_codec`.
+
+    Trusted decoders skip validation via `model_construct`; use them only for
+    documents this application wrote itself.
+    """
+    fields = tuple(model_class.model_fields)
+    converters = {
+        name: id_codec.decode if name == "id" else to_typeid
+        for name, info in model_class.model_fields.items()
+        if _is_typeid(info.annotation)
+    }
+    construct = model_class.model_construct
+    validate = model_class.model_validate
+
+    def decode(doc: dict) -> M:
+        values = {name: doc[name] for name in fields if name in doc}
+        for name, convert in converters.items():
+            value = values.get(name)
+            if value is not None:
+                values[name] = convert(value)
+        return construct(**values) if trusted else validate(values)
+
+    return decode
@@ -0,0 +1,337 @@
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from bson.regex import Regex
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import OperationFailure
+
+from models.base_model import BaseDocument
+
+from .index_registry import IndexKeys, index_keys, index_name
+
+# Filter operators that bound a range of values; the rest of the filter's
+# fields are matched by equality ($eq, $in, $all, $elemMatch or a literal)
+RANGE_OPERATORS = {
+    "$gt",
+    "$gte",
+    "$lt",
+    "$lte",
+    "$ne",
+    "$nin",
+    "$regex",
+    "$exists",
+    "$not",
+    "$type",
+}
+
+
+@dataclass(frozen=True)
+class QueryShape:
+    """How a query uses its fields, which is all an index choice depends on."""
+
+    collection: str
+    equality: tuple[str, ...] = ()
+    sort: IndexKeys = ()
+    range: tuple[str, ...] = ()
+    projection: tuple[str, ...] = ()
+
+    def recommended_keys(self) -> IndexKeys:
+        """
+        The compound index for this shape in equality, sort, range order:
+        equality fields narrow to one contiguous run of keys, which is then
+        already in sort order, and the range bounds apply last.
+        """
+        keys = [(name, 1) for name in self.equality]
+        seen = set(self.equality)
+        keys += [(name, direction) for name, direction in self.sort if name not in seen]
+        seen |= {name for name, _ in self.sort}
+        keys += [(name, 1) for name in self.range if name not in seen]
+        return tuple(keys)
+
+    def describe(self) -> str:
+        parts = [f"equality={list(self.equality)}"] if self.equality else []
+        if self.sort:
+            parts.append(f"sort={dict(self.sort)}")
+        if self.range:
+            parts.append(f"range={list(self.range)}")
+        if self.projection:
+            parts.append(f"projection={list(self.projection)}")
+        return ", ".join(parts) or "unfiltered"
+
+
+def _is_range(value: Any) -> bool:
+    if isinstance(value, (re.Pattern, Regex)):
+        return True
+    return isinstance(value, dict) and any(op in RANGE_OPERATORS for op in value)
+
+
+def _fields(query: dict) -> tuple[list[str], list[str]]:
+    equality, ranges = [], []
+    for name, value in query.items():
+        if name == "$and":
+            for clause in value:
+                more_equality, more_ranges = _fields(clause)
+                equality += more_equality
+                ranges += more_ranges
+        elif name.startswith("$"):
+            continue
+        elif _is_range(value):
+            ranges.append(name)
+        else:
+            equality.append(name)
+    return equality, ranges
+
+
+def _sort_keys(sort: Any) -> IndexKeys:
+    if not sort:
+        return ()
+    if isinstance(sort, str):
+        return ((sort, 1),)
+    items = sort.items() if isinstance(sort, dict) else sort
+    return tuple((name, direction) for name, direction in items)
+
+
+def query_shapes(
+    collection: str,
+    query: dict,
+    sort: Any = None,
+    projection: Optional[dict] = None,
+) -> list[QueryShape]:
+    """
+    Shapes of a find: one, or one per branch of a top-level $or, since the
+    server plans each branch separately.
+    """
+    branches = query.get("$or") or [{}]
+    rest = {name: value for name, value in query.items() if name != "$or"}
+    fields = tuple(name for name, include in (projection or {}).items() if include)
+    shapes = []
+    for branch in branches:
+        equality, ranges = _fields({**rest, **branch})
+        shapes.append(
+            QueryShape(
+                collection=collection,
+                equality=tuple(dict.fromkeys(equality)),
+                sort=_sort_keys(sort),
+                range=tuple(name for name in dict.fromkeys(ranges)),
+                projection=fields,
+            )
+        )
+    return shapes
+
+
+class QueryShapeRecorder:
+    """
+    Counts the query shapes repositories run. Off by default; turned on with
+    INDEX_ADVISOR=true at runtime, or by setting `enabled` in a test session.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.counts: Counter[QueryShape] = Counter()
+
+    def record(
+        self,
+        collection: str,
+        query: dict,
+        sort: Any = None,
+        projection: Optional[dict] = None,
+    ) -> None:
+        for shape in query_shapes(collection, query, sort, projection):
+            self.counts[shape] += 1
+
+    def for_collection(self, collection: str) -> dict[QueryShape, int]:
+        return {
+            shape: count
+            for shape, count in self.counts.items()
+            if shape.collection == collection
+        }
+
+    def reset(self):
+        self.counts.clear()
+
+
+query_shape_recorder = QueryShapeRecorder()
+
+
+@dataclass(frozen=True)
+class ExistingIndex:
+    keys: IndexKeys
+    name: str
+    unique: bool = False
+    # Operations that used the index since the server started; None if unknown
+    ops: Optional[int] = None
+
+
+def supports(index: ExistingIndex, shape: QueryShape) -> bool:
+    """Whether `index` serves `shape` as well as its recommended index would."""
+    names = [name for name, _ in index.keys]
+    equality = set(shape.equality)
+    # A unique index on equality fields alone finds at most one document
+    if index.unique and equality and set(names) <= equality:
+        return True
+    if set(names[: len(equality)]) != equality:
+        return False
+    rest = index.keys[len(equality) :]
+    sort = tuple(item for item in shape.sort if item[0] not in equality)
+    if sort:
+        reversed_sort = tuple((name, -direction) for name, direction in sort)
+        if rest[: len(sort)] not in (sort, reversed_sort):
+            return False
+        rest = rest[len(sort) :]
+    # Ranges on fields the equality and sort keys already cover are served too
+    covered = equality | {name for name, _ in sort}
+    ranges = [name for name in shape.range if name not in covered]
+    if ranges and (not rest or rest[0][0] not in ranges):
+        return False
+    return True
+
+
+@dataclass
+class Recommendation:
+    keys: IndexKeys
+    shapes: list[QueryShape]
+    queries: int
+
+    @property
+    def name(self) -> str:
+        return index_name(self.keys)
+
+
+@dataclass
+class IndexAdvice:
+    collection: str
+    # Indexes for shapes no existing index supports, most used first
+    missing: list[Recommendation] = field(default_factory=list)
+    # Existing indexes no operation has used since the server started
+    unused: list[ExistingIndex] = field(default_factory=list)
+    # (index, wider index whose leading keys are the same) pairs
+    redundant: list[tuple[ExistingIndex, ExistingIndex]] = field(default_factory=list)
+    shapes: dict[QueryShape, int] = field(default_factory=dict)
+
+    def as_dict(self) -> dict:
+        return {
+            "collection": self.collection,
+            "missing": [
+                {
+                    "keys": list(rec.keys),
+                    "queries": rec.queries,
+                    "shapes": [shape.describe() for shape in rec.shapes],
+                }
+                for rec in self.missing
+            ],
+            "unused": [index.name for index in self.unused],
+            "redundant": [
+                {"index": index.name, "covered_by": wider.name}
+                for index, wider in self.redundant
+            ],
+            "shapes": [
+                {"shape": shape.describe(), "queries": count}
+                for shape, count in self.shapes.items()
+            ],
+        }
+
+    def patch(self, model_name: str) -> str:
+        """The advice as edits to `<model_name>.get_indexes()`."""
+        lines = [f"# Suggested changes to {model_name}.get_indexes()"]
+        for rec in self.missing:
+            lines.append(f"+ {list(rec.keys)},  # {rec.queries} queries")
+            lines += [f"+     # {shape.describe()}" for shape in rec.shapes]
+        for index, wider in self.redundant:
+            lines.append(f"- {list(index.keys)},  # prefix of {wider.name}")
+        redundant = {index.name for index, _ in self.redundant}
+        for index in self.unused:
+            if index.name not in redundant:
+                lines.append(f"- {list(index.keys)},  # unused since server start")
+        if len(lines) == 1:
+            lines.append("# none: every recorded query shape has a supporting index")
+        return "\n".join(lines) + "\n"
+
+
+def advise_indexes(
+    collection: str, shapes: dict[QueryShape, int], indexes: list[ExistingIndex]
+) -> IndexAdvice:
+    """Compare recorded shapes with existing indexes; pure, for tests and tooling."""
+    advice = IndexAdvice(collection=collection, shapes=shapes)
+    needed: dict[IndexKeys, Recommendation] = {}
+    for shape, count in sorted(shapes.items(), key=lambda item: -item[1]):
+        keys = shape.recommended_keys()
+        if not keys or any(supports(index, shape) for index in indexes):
+            continue
+        rec = needed.setdefault(keys, Recommendation(keys, [], 0))
+        rec.shapes.append(shape)
+        rec.queries += count
+    # An index also serves every shape whose recommendation is a prefix of it
+    for keys in list(needed):
+        wider = next(
+            (other for other in needed if other != keys and other[: len(keys)] == keys),
+            None,
+        )
+        if wider is not None:
+            rec = needed.pop(keys)
+            needed[wider].shapes += rec.shapes
+            needed[wider].queries += rec.queries
+    # `supports` errs towards "no", so never suggest an index that already
+    # exists, in either direction
+    existing = {index.keys for index in indexes}
+    existing |= {
+        tuple((name, -direction) for name, direction in keys) for keys in existing
+    }
+    advice.missing = sorted(
+        (rec for rec in needed.values() if rec.keys not in existing),
+        key=lambda rec: -rec.queries,
+    )
+
+    advice.unused = [index for index in indexes if index.ops == 0]
+    for index in indexes:
+        if index.unique:
+            continue
+        wider = next(
+            (
+                other
+                for other in indexes
+                if len(other.keys) > len(index.keys)
+                and other.keys[: len(index.keys)] == index.keys
+            ),
+            None,
+        )
+        if wider is not None:
+            advice.redundant.append((index, wider))
+    return advice
+
+
+async def existing_indexes(
+    db: AsyncIOMotorDatabase, collection: str
+) -> list[ExistingIndex]:
+    """Indexes on `collection` except _id, with usage from $indexStats if allowed."""
+    information = await db[collection].index_information()
+    try:
+        stats = await db[collection].aggregate([{"$indexStats": {}}]).to_list(None)
+        ops = {stat["name"]: stat["accesses"]["ops"] for stat in stats}
+    except (OperationFailure, NotImplementedError):
+        ops = {}
+    return [
+        ExistingIndex(
+            keys=index_keys(info["key"]),
+            name=name,
+            unique=bool(info.get("unique")),
+            ops=ops.get(name),
+        )
+        for name, info in information.items()
+        if name != "_id_"
+    ]
+
+
+async def advise(
+    db: AsyncIOMotorDatabase,
+    model_class: type[BaseDocument],
+    recorder: QueryShapeRecorder = query_shape_recorder,
+) -> IndexAdvice:
+    """Advice for `model_class`'s collection from the shapes `recorder` has seen."""
+    collection = model_class.get_collection_name()
+    return advise_indexes(
+        collection,
+        recorder.for_collection(collection),
+        await existing_indexes(db, collection),
+    )
@@ -0,0 +1,279 @@
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import Any, Optional
+
+import bson
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure
+
+from config import get_settings
+from models.base_model import BaseDocument
+
+logger = logging.getLogger(__name__)
+
+IndexKeys = tuple[tuple[str, int], ...]
+
+# Options compared when checking drift; anything else is left to the server
+MANAGED_OPTIONS = (
+    "unique",
+    "sparse",
+    "partialFilterExpression",
+    "expireAfterSeconds",
+    "collation",
+)
+
+# Server codes for "an index with these keys already exists with other options"
+INDEX_CONFLICT_CODES = {85, 86}
+
+
+def to_index_model(index: list | IndexModel) -> IndexModel:
+    """Accept either a plain key list or an IndexModel from `get_indexes()`."""
+    return index if isinstance(index, IndexModel) else IndexModel(list(index))
+
+
+def index_keys(index: list | IndexModel) -> IndexKeys:
+    """Normalize an index entry from `get_indexes()` into a hashable key spec."""
+    keys = to_index_model(index).document["key"]
+    return tuple((field_name, direction) for field_name, direction in keys.items())
+
+
+def index_options(index: list | IndexModel) -> dict[str, Any]:
+    document = to_index_model(index).document
+    return {
+        option: document[option] for option in MANAGED_OPTIONS if option in document
+    }
+
+
+def index_name(keys: IndexKeys) -> str:
+    """Default MongoDB name for an index, e.g. `created_at_-1`."""
+    return "_".join(f"{field_name}_{direction}" for field_name, direction in keys)
+
+
+def marker_id(collection: str, index: IndexModel) -> str:
+    """
+    Marker for `index` as declared: a change to its keys or options gives a
+    new marker, so the changed index is created again.
+    """
+    digest = hashlib.sha256(bson.encode(index.document)).hexdigest()[:16]
+    return f"{collection}:{index.document['name']}:{digest}"
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _options_match(expected: dict[str, Any], actual: dict[str, Any]) -> bool:
+    for option in MANAGED_OPTIONS:
+        if option == "collation" and option in expected:
+            # The server fills in collation defaults, so only compare what we set
+            actual_collation = actual.get("collation") or {}
+            if any(
+                actual_collation.get(k) != v for k, v in expected["collation"].items()
+            ):
+                return False
+        elif bool(expected.get(option)) != bool(actual.get(option)) or (
+            option in expected and expected[option] != actual.get(option)
+        ):
+            return False
+    return True
+
+
+class IndexConflictError(Exception):
+    pass
+
+
+@dataclass
+class IndexDrift:
+    collection: str
+    missing: list[IndexKeys] = field(default_factory=list)
+    # Exist with other options than declared, e.g. an old non-unique email_1
+    mismatched: list[IndexKeys] = field(default_factory=list)
+    unexpected: list[IndexKeys] = field(default_factory=list)
+    # The unique ones among `missing`
+    missing_unique: list[IndexKeys] = field(default_factory=list)
+
+    @property
+    def has_drift(self) -> bool:
+        return bool(self.missing or self.mismatched or self.unexpected)
+
+    @property
+    def has_errors(self) -> bool:
+        """
+        Whether a declared index is not in effect in a way that changes what
+        the app accepts: it exists with other options, or it is a missing
+        unique index. Code relying on it (e.g. a unique email caught as
+        DuplicateKeyError) would silently misbehave.
+        """
+        return bool(self.mismatched or self.missing_unique)
+
+
+class IndexRegistry:
+    """
+    Creates model indexes once per process instead of on every repository call.
+    With a marker collection, other processes skip indexes already bootstrapped.
+    Unless one is given, it is MONGODB_INDEX_MARKER_COLLECTION from the current
+    settings.
+    """
+
+    def __init__(self, marker_collection: Optional[str] = None):
+        self._marker_collection = marker_collection
+        self._ensured: set[tuple[str, str, IndexKeys, Any]] = set()
+
+    @property
+    def marker_collection(self) -> Optional[str]:
+        if self._marker_collection is not None:
+            return self._marker_collection
+        return get_settings().mongodb_index_marker_collection
+
+    def _registry_key(
+        self, db: AsyncIOMotorDatabase, collection: str, index: IndexModel
+    ) -> tuple[str, str, IndexKeys, Any]:
+        return (db.name, collection, index_keys(index), _freeze(index_options(index)))
+
+    def is_ensured(
+        self, db: AsyncIOMotorDatabase, model_class: type[BaseDocument]
+    ) -> bool:
+        collection = model_class.get_collection_name()
+        return all(
+            self._registry_key(db, collection, to_index_model(index)) in self._ensured
+            for index in model_class.get_indexes()
+        )
+
+    async def ensure_indexes(
+        self, db: AsyncIOMotorDatabase, model_class: type[BaseDocument]
+    ) -> list[str]:
+        """Create indexes of `model_class` not yet bootstrapped; returns new names."""
+        collection_name = model_class.get_collection_name()
+        collection = db[collection_name]
+        markers = db[self.marker_collection] if self.marker_collection else None
+        existing: Optional[set[IndexKeys]] = None
+        created = []
+        for index in map(to_index_model, model_class.get_indexes()):
+            registry_key = self._registry_key(db, collection_name, index)
+            if registry_key in self._ensured:
+                continue
+
+            name = index.document["name"]
+            marker = marker_id(collection_name, index)
+            if markers is not None and existing is None:
+                # A marker outlives a dropped index, so only trust it while the
+                # index is still there
+                information = await collection.index_information()
+                existing = {index_keys(info["key"]) for info in information.values()}
+            if (
+                markers is None
+                or index_keys(index) not in existing
+                or not await markers.find_one({"_id": marker})
+            ):
+                try:
+                    created.extend(await collection.create_indexes([index]))
+                except OperationFailure as e:
+                    if e.code not in INDEX_CONFLICT_CODES:
+                        raise
+                    # Changing options of an existing index needs a manual drop
+                    # first; the drift report flags it and bootstrap fails on it
+                    logger.error(
+                        f"Index '{name}' on '{collection_name}' exists with different "
+                        f"options; drop it to apply {index_options(index)}: {e}"
+                    )
+                    continue
+                if markers is not None:
+                    await markers.update_one(
+                        {"_id": marker},
+                        {"$set": {"created_at": datetime.now(UTC)}},
+                        upsert=True,
+                    )
+            self._ensured.add(registry_key)
+
+        if created:
+            logger.info(f"Created indexes on '{collection_name}': {', '.join(created)}")
+        return created
+
+    async def check_drift(
+        self, db: AsyncIOMotorDatabase, model_class: type[BaseDocument]
+    ) -> IndexDrift:
+        """Compare `get_indexes()` against the indexes that exist in the database."""
+        collection_name = model_class.get_collection_name()
+        information = await db[collection_name].index_information()
+        existing = {
+            index_keys(info["key"]): info
+            for name, info in information.items()
+            if name != "_id_"
+        }
+        drift = IndexDrift(collection=collection_name)
+        expected = set()
+        for index in model_class.get_indexes():
+            keys = index_keys(index)
+            expected.add(keys)
+            if keys not in existing:
+                drift.missing.append(keys)
+                if index_options(index).get("unique"):
+                    drift.missing_unique.append(keys)
+            elif not _options_match(index_options(index), existing[keys]):
+                drift.mismatched.append(keys)
+        drift.unexpected = sorted(set(existing) - expected)
+        return drift
+
+    async def bootstrap(
+        self,
+        db: AsyncIOMotorDatabase,
+        model_classes: list[type[BaseDocument]],
+        allow_conflicts: Optional[bool] = None,
+    ) -> list[IndexDrift]:
+        """
+        Ensure indexes for every model and log any drift. Run once at startup.
+        Declared indexes found missing (e.g. dropped since they were ensured)
+        are created again. Raises IndexConflictError when an index exists with
+        other options than declared or a unique index is still missing, unless
+        `allow_conflicts` (default: the MONGODB_ALLOW_INDEX_CONFLICTS setting)
+        is set.
+        """
+        if allow_conflicts is None:
+            allow_conflicts = get_settings().mongodb_allow_index_conflicts
+        drifts = []
+        for model_class in model_classes:
+            await self.ensure_indexes(db, model_class)
+            drift = await self.check_drift(db, model_class)
+            if drift.missing:
+                collection = model_class.get_collection_name()
+                for index in map(to_index_model, model_class.get_indexes()):
+                    if index_keys(index) in drift.missing:
+                        registry_key = self._registry_key(db, collection, index)
+                        self._ensured.discard(registry_key)
+                await self.ensure_indexes(db, model_class)
+                drift = await self.check_drift(db, model_class)
+            if drift.has_errors:
+                logger.error(
+                    f"Indexes on '{drift.collection}' are not as declared: "
+                    f"mismatched={drift.mismatched} "
+                    f"missing_unique={drift.missing_unique}"
+                )
+            if drift.has_drift:
+                logger.warning(
+                    f"Index drift on '{drift.collection}': missing={drift.missing} "
+                    f"mismatched={drift.mismatched} unexpected={drift.unexpected}"
+                )
+            drifts.append(drift)
+        conflicts = [drift for drift in drifts if drift.has_errors]
+        if conflicts and not allow_conflicts:
+            raise IndexConflictError(
+                "Indexes exist with other options than declared, or unique indexes "
+                "are missing, on "
+                f"{', '.join(drift.collection for drift in conflicts)}; "
+                "drop the conflicting ones so they can be recreated, or set "
+                "MONGODB_ALLOW_INDEX_CONFLICTS=true to start anyway"
+            )
+        return drifts
+
+    def reset(self):
+        self._ensured.clear()
+
+
+index_registry = IndexRegistry()
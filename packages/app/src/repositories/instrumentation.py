@@ -0,0 +1,71 @@
+import functools
+import time
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
+from typing import Any, ParamSpec, TypeVar
+
+from pymongo.results import BulkWriteResult
+
+from shared.metrics import repository_documents, repository_operation_duration
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+# Set while an instrumented method runs, so the calls it makes internally
+# (e.g. create_user -> create) are part of its measurement, not new ones
+_in_operation: ContextVar[bool] = ContextVar("in_repository_operation", default=False)
+
+
+def count_documents(result: Any) -> int:
+    """Documents read or written, going by what a repository method returned."""
+    if result is None or result is False:
+        return 0
+    if isinstance(result, bool):
+        return 1
+    if isinstance(result, int):
+        return result
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, BulkWriteResult):
+        return (
+            result.inserted_count
+            + result.upserted_count
+            + result.modified_count
+            + result.deleted_count
+        )
+    if hasattr(result, "inserted_count"):
+        return result.inserted_count
+    if hasattr(result, "items"):
+        return len(result.items)
+    return 1
+
+
+def instrumented(
+    method: Callable[P, Awaitable[R]],
+) -> Callable[P, Awaitable[R]]:
+    """
+    Record a repository method's latency and document count, labelled with the
+    collection and method name. Failed calls count towards latency only.
+    """
+    operation = method.__name__
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        if _in_operation.get():
+            return await method(self, *args, **kwargs)
+        token = _in_operation.set(True)
+        started = time.perf_counter()
+        collection = self.collection.name
+        try:
+            result = await method(self, *args, **kwargs)
+            repository_documents.inc(
+                collection, operation, amount=count_documents(result)
+            )
+            return result
+        finally:
+            repository_operation_duration.observe(
+                time.perf_counter() - started, collection, operation
+            )
+            _in_operation.reset(token)
+
+    return wrapper
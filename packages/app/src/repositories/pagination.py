@@ -0,0 +1,49 @@
+import base64
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Newest first; `id` breaks ties between documents created in the same millisecond
+PAGE_SORT = [("created_at", -1), ("id", -1)]
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+@dataclass
+class Page(Generic[T]):
+    items: list[T] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(created_at: datetime, id: str) -> str:
+    """Opaque continuation token pointing just past the given document."""
+    payload = json.dumps([created_at.isoformat(), id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), str(id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Invalid pagination cursor") from e
+
+
+def after_cursor(cursor: str, encode_id: Callable[[str], Any] = str) -> dict:
+    """
+    Filter matching documents that sort after the cursor under PAGE_SORT.
+    `encode_id` converts the cursor's id into its stored form.
+    """
+    created_at, id = decode_cursor(cursor)
+    return {
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "id": {"$lt": encode_id(id)}},
+        ]
+    }
@@ -0,0 +1,32 @@
+import re
+import unicodedata
+
+# Length of the substrings indexed for "contains" search
+NGRAM_SIZE = 3
+
+
+def normalize(text: str) -> str:
+    """Casefolded, NFKC-normalized text with whitespace runs collapsed."""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def ngrams(normalized: str, size: int = NGRAM_SIZE) -> list[str]:
+    """Distinct substrings of `size` characters, in order of first appearance."""
+    return list(
+        dict.fromkeys(
+            normalized[i : i + size] for i in range(len(normalized) - size + 1)
+        )
+    )
+
+
+def prefix_filter(normalized: str) -> dict:
+    """
+    Anchored, case-sensitive regex on a normalized field; MongoDB turns it into
+    tight index bounds. User input is escaped, so it can't inject a pattern.
+    """
+    return {"$regex": f"^{re.escape(normalized)}"}
+
+
+def contains_filter(normalized: str) -> dict:
+    # Only evaluated against documents already narrowed down by the n-gram index
+    return {"$regex": re.escape(normalized)}
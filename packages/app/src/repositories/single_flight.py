@@ -0,0 +1,128 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable, Iterable
+from typing import Generic, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key onto one in-flight call.
+    Every caller receives the same result object, so callers that mutate it
+    must copy it first.
+    """
+
+    def __init__(self):
+        self.shared = 0
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            return await self._run(key, fn)
+
+        self.shared += 1
+        try:
+            return await asyncio.shield(inflight)
+        except asyncio.CancelledError:
+            if not inflight.cancelled():
+                raise
+            # The caller that started the call went away; run it ourselves
+            return await self._run(key, fn)
+
+    async def _run(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Waiters re-raise it; don't log it as unretrieved
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def forget(self, *keys: Hashable):
+        """Later callers start a new call instead of joining one already running."""
+        for key in keys:
+            self._inflight.pop(key, None)
+
+    def forget_prefix(self, prefix: tuple):
+        """Forget every tuple key starting with `prefix`, e.g. after a write."""
+        size = len(prefix)
+        for key in [
+            k for k in self._inflight if isinstance(k, tuple) and k[:size] == prefix
+        ]:
+            del self._inflight[key]
+
+
+class BatchLoader(Generic[K, T]):
+    """
+    DataLoader-style batcher. Keys requested in the same event-loop tick are
+    resolved together by one `batch_fn(keys) -> {key: value}` call; keys absent
+    from the result resolve to None.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[list[K]], Awaitable[dict[K, T]]],
+        max_batch_size: int = 500,
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.batches = 0
+        self._pending: dict[K, asyncio.Future] = {}
+        self._dispatch_scheduled = False
+        self._tasks: set[asyncio.Task] = set()
+
+    async def load(self, key: K) -> Optional[T]:
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[key] = future
+            if len(self._pending) >= self.max_batch_size:
+                self._dispatch()
+            elif not self._dispatch_scheduled:
+                self._dispatch_scheduled = True
+                loop.call_soon(self._dispatch)
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: Iterable[K]) -> list[Optional[T]]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _dispatch(self):
+        self._dispatch_scheduled = False
+        pending, self._pending = self._pending, {}
+        if pending:
+            task = asyncio.ensure_future(self._resolve(pending))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _resolve(self, pending: dict[K, asyncio.Future]):
+        self.batches += 1
+        try:
+            results = await self.batch_fn(list(pending))
+        except asyncio.CancelledError:
+            for future in pending.values():
+                future.cancel()
+            raise
+        except Exception as e:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+                    future.exception()
+            return
+        for key, future in pending.items():
+            if not future.done():
+                future.set_result(results.get(key))
+
+
+single_flight = SingleFlight()
@@ -0,0 +1,240 @@
+import asyncio
+import contextvars
+import json
+import logging
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from typing import Any, Optional
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from shared.metrics import slow_queries_total
+
+logger = logging.getLogger(__name__)
+
+# Plan stages that read an index rather than every document
+INDEX_SCAN_STAGES = {"IXSCAN", "EXPRESS_IXSCAN", "IDHACK", "EXPRESS_IDHACK"}
+
+
+def query_shape(value: Any) -> Any:
+    """
+    `value` with every literal replaced by "?", keeping field names and
+    operators, so queries that differ only in their values share a shape and
+    no user data ends up in logs. Lists of values collapse to ["?"] whatever
+    their length; lists of sub-queries ($and, $or) keep each one's shape.
+    """
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(item, dict) for item in value):
+            return [query_shape(item) for item in value]
+        return ["?"]
+    return "?"
+
+
+def sort_shape(sort: Any) -> Optional[dict]:
+    if not sort:
+        return None
+    if isinstance(sort, str):
+        return {sort: 1}
+    return dict(sort)
+
+
+@dataclass
+class PlanSummary:
+    """The parts of an `explain("executionStats")` that say how a query ran."""
+
+    # COLLSCAN when any stage read the whole collection, else the first scan stage
+    stage: str
+    indexes: list[str]
+    docs_examined: int
+    keys_examined: int
+    returned: int
+    execution_ms: int
+
+    @property
+    def docs_examined_per_returned(self) -> float:
+        return self.docs_examined / max(self.returned, 1)
+
+    @classmethod
+    def from_explain(cls, explain: dict) -> "PlanSummary":
+        winning = explain.get("queryPlanner", {}).get("winningPlan", {})
+        # Plans run by the slot-based engine nest the stage tree one level down
+        stages = list(_plan_stages(winning.get("queryPlan", winning)))
+        names = [stage.get("stage", "") for stage in stages]
+        if "COLLSCAN" in names:
+            stage = "COLLSCAN"
+        else:
+            stage = next(
+                (name for name in names if name in INDEX_SCAN_STAGES),
+                names[0] if names else "UNKNOWN",
+            )
+        stats = explain.get("executionStats", {})
+        return cls(
+            stage=stage,
+            indexes=[stage["indexName"] for stage in stages if "indexName" in stage],
+            docs_examined=stats.get("totalDocsExamined", 0),
+            keys_examined=stats.get("totalKeysExamined", 0),
+            returned=stats.get("nReturned", 0),
+            execution_ms=stats.get("executionTimeMillis", 0),
+        )
+
+
+def _plan_stages(plan: dict) -> Iterator[dict]:
+    yield plan
+    for key in ("inputStage", "outerStage", "innerStage"):
+        if key in plan:
+            yield from _plan_stages(plan[key])
+    for child in plan.get("inputStages", ()):
+        yield from _plan_stages(child)
+
+
+@dataclass
+class SlowQuery:
+    collection: str
+    operation: str
+    shape: dict
+    sort: Optional[dict]
+    duration_ms: float
+    at: datetime = field(default_factory=lambda: datetime.now(UTC))
+    plan: Optional[PlanSummary] = None
+
+    def as_dict(self) -> dict:
+        entry = asdict(self)
+        entry["at"] = self.at.isoformat()
+        if self.plan is not None:
+            entry["plan"]["docs_examined_per_returned"] = round(
+                self.plan.docs_examined_per_returned, 2
+            )
+        return entry
+
+
+class SlowQueryLog:
+    """
+    Keeps the most recent repository queries that took `threshold_ms` or
+    longer. With `explain`, each new query shape is explained once with
+    executionStats in a background task, so the request that was slow does
+    not also wait for the explain; entries with that shape recorded while it
+    runs wait for the same explain, and later ones reuse its plan.
+    """
+
+    def __init__(
+        self, threshold_ms: float = 100.0, explain: bool = True, max_entries: int = 100
+    ):
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self.entries: deque[SlowQuery] = deque(maxlen=max_entries)
+        self._plans: dict[str, PlanSummary] = {}
+        # Shape key -> entries waiting for the explain already running for it
+        self._pending: dict[str, list[SlowQuery]] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    @contextmanager
+    def watch(
+        self,
+        collection: AsyncIOMotorCollection,
+        operation: str,
+        query: dict,
+        sort: Any = None,
+        limit: int = 0,
+    ) -> Iterator[None]:
+        """Time the block; if it is slow, record `query` as run on `collection`."""
+        started = time.perf_counter()
+        yield
+        duration_ms = (time.perf_counter() - started) * 1000
+        if duration_ms >= self.threshold_ms:
+            self.record(collection, operation, query, sort, limit, duration_ms)
+
+    def record(
+        self,
+        collection: AsyncIOMotorCollection,
+        operation: str,
+        query: dict,
+        sort: Any,
+        limit: int,
+        duration_ms: float,
+    ) -> SlowQuery:
+        entry = SlowQuery(
+            collection=collection.name,
+            operation=operation,
+            shape=query_shape(query),
+            sort=sort_shape(sort),
+            duration_ms=round(duration_ms, 2),
+        )
+        self.entries.append(entry)
+        slow_queries_total.inc(entry.collection, operation)
+
+        key = json.dumps([entry.collection, entry.shape, entry.sort], default=str)
+        entry.plan = self._plans.get(key)
+        if entry.plan is not None or not self.explain:
+            self._log(entry)
+            return entry
+        if key in self._pending:
+            self._pending[key].append(entry)
+            return entry
+        self._pending[key] = [entry]
+        # An empty context keeps the explain out of the request's trace
+        task = asyncio.get_running_loop().create_task(
+            self._explain(key, collection, query, entry.sort, limit),
+            context=contextvars.Context(),
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return entry
+
+    async def _explain(
+        self,
+        key: str,
+        collection: AsyncIOMotorCollection,
+        query: dict,
+        sort: Optional[dict],
+        limit: int,
+    ) -> None:
+        command: dict[str, Any] = {"find": collection.name, "filter": query}
+        if sort:
+            command["sort"] = sort
+        if limit:
+            command["limit"] = limit
+        plan = None
+        try:
+            explain = await collection.database.command(
+                {"explain": command, "verbosity": "executionStats"}
+            )
+            plan = PlanSummary.from_explain(explain)
+            if len(self._plans) >= self.entries.maxlen:
+                self._plans.clear()
+            self._plans[key] = plan
+        except Exception as e:
+            logger.warning(f"Could not explain slow query on {collection.name}: {e}")
+        finally:
+            waiting = self._pending.pop(key, [])
+        for entry in waiting:
+            entry.plan = plan
+            self._log(entry)
+
+    def _log(self, entry: SlowQuery) -> None:
+        plan = entry.plan
+        summary = (
+            f"{plan.stage}, {plan.docs_examined} docs examined for "
+            f"{plan.returned} returned"
+            if plan
+            else "not explained"
+        )
+        logger.warning(
+            f"Slow query: {entry.collection}.{entry.operation} took "
+            f"{entry.duration_ms}ms ({summary}) shape={json.dumps(entry.shape)}",
+            extra={"slow_query": entry.as_dict()},
+        )
+
+    async def drain(self) -> None:
+        """Wait for pending explains; used at shutdown and in tests."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def recent(self) -> list[dict]:
+        """Entries newest first, as plain dicts."""
+        return [entry.as_dict() for entry in reversed(self.entries)]
@@ -0,0 +1,116 @@
+import asyncio
+from typing import Optional
+
+import pytest
+
+from .cache import LocalCacheBackend, RepositoryCache
+
+
+class FakeExternalBackend:
+    """Stands in for a networked cache such as Redis; ignores TTLs."""
+
+    def __init__(self):
+        self.store: dict[str, bytes] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self.store.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.store[key] = value
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.store.pop(key, None)
+
+
+class TestRepositoryCache:
+    @pytest.fixture(params=["local", "external"])
+    def cache(self, request):
+        backend = (
+            LocalCacheBackend() if request.param == "local" else FakeExternalBackend()
+        )
+        return RepositoryCache(backend, ttl=60)
+
+    @pytest.mark.asyncio
+    async def test_read_through_counts_hits_and_misses(self, cache):
+        loads = 0
+
+        async def loader():
+            nonlocal loads
+            loads += 1
+            return {"id": "user_1", "name": "Ada"}
+
+        first = await cache.get_or_load("users:id:user_1", loader)
+        second = await cache.get_or_load("users:id:user_1", loader)
+
+        assert first == second == {"id": "user_1", "name": "Ada"}
+        assert first is not second
+        assert loads == 1
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_missing_documents_are_not_cached(self, cache):
+        async def loader():
+            return None
+
+        assert await cache.get_or_load("users:id:missing", loader) is None
+        assert await cache.get_or_load("users:id:missing", loader) is None
+        assert cache.stats()["misses"] == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_load(self, cache):
+        loads = 0
+        release = asyncio.Event()
+
+        async def loader():
+            nonlocal loads
+            loads += 1
+            await release.wait()
+            return {"id": "user_1"}
+
+        tasks = [
+            asyncio.create_task(cache.get_or_load("users:id:user_1", loader))
+            for _ in range(10)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+
+        results = await asyncio.gather(*tasks)
+        assert loads == 1
+        assert all(result == {"id": "user_1"} for result in results)
+        assert cache.stats()["collapsed"] == 9
+
+    @pytest.mark.asyncio
+    async def test_invalidation_during_load_is_not_written_back(self, cache):
+        release = asyncio.Event()
+
+        async def stale_loader():
+            await release.wait()
+            return {"id": "user_1", "name": "Old"}
+
+        task = asyncio.create_task(cache.get_or_load("users:id:user_1", stale_loader))
+        await asyncio.sleep(0)
+        await cache.invalidate("users:id:user_1")
+        release.set()
+        await task
+
+        async def fresh_loader():
+            return {"id": "user_1", "name": "New"}
+
+        fresh = await cache.get_or_load("users:id:user_1", fresh_loader)
+        assert fresh["name"] == "New"
+
+    @pytest.mark.asyncio
+    async def test_local_backend_expires_and_evicts(self):
+        backend = LocalCacheBackend(max_entries=2)
+        await backend.set("a", b"1", ttl=60)
+        await backend.set("b", b"2", ttl=60)
+        await backend.get("a")
+        await backend.set("c", b"3", ttl=60)
+
+        assert await backend.get("b") is None
+        assert await backend.get("a") == b"1"
+
+        await backend.set("short", b"4", ttl=0)
+        assert await backend.get("short") is None
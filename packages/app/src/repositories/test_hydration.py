@@ -0,0 +1,51 @@
+from datetime import datetime
+
+import pytest
+from pydantic import ValidationError
+from typeid import TypeID
+
+from ..dto.user_dto import UserResponse
+from ..models.user import User
+from .hydration import get_decoder
+
+
+class TestHydration:
+    @pytest.fixture
+    def document(self):
+        return {
+            "_id": "65f000000000000000000000",
+            "id": str(TypeID(prefix="user")),
+            "name": "Ada",
+            "email": "ada@example.com",
+            "created_at": datetime(2024, 1, 1),
+            "updated_at": None,
+        }
+
+    def test_decoders_are_built_once_per_model(self):
+        assert get_decoder(User, True) is get_decoder(User, True)
+        assert get_decoder(User, True) is not get_decoder(UserResponse, True)
+
+    @pytest.mark.parametrize("trusted", [True, False])
+    def test_trusted_and_validated_decoding_agree(self, document, trusted):
+        user = get_decoder(User, trusted)(document)
+
+        assert user == User.model_validate(
+            {**document, "id": TypeID.from_string(document["id"])}
+        )
+        assert isinstance(user.id, TypeID)
+        # The stored document is left untouched for other readers
+        assert isinstance(document["id"], str)
+
+    def test_documents_decode_directly_into_response_models(self, document):
+        response = get_decoder(UserResponse, True)(document)
+
+        assert isinstance(response, UserResponse)
+        assert str(response.id) == document["id"]
+        assert response.model_dump(mode="json")["id"] == document["id"]
+
+    def test_only_untrusted_decoding_validates(self, document):
+        document["email"] = "not-an-email"
+
+        assert get_decoder(User, True)(document).email == "not-an-email"
+        with pytest.raises(ValidationError):
+            get_decoder(User, False)(document)
@@ -0,0 +1,117 @@
+import re
+from datetime import UTC, datetime
+
+from ..models.user import User
+from . import search
+from .index_advisor import (
+    ExistingIndex,
+    QueryShapeRecorder,
+    advise_indexes,
+    index_keys,
+    query_shapes,
+    supports,
+)
+from .pagination import PAGE_SORT, after_cursor, encode_cursor
+
+
+def index(*keys, name=None, unique=False, ops=None) -> ExistingIndex:
+    keys = tuple(keys)
+    name = name or "_".join(f"{field}_{direction}" for field, direction in keys)
+    return ExistingIndex(keys=keys, name=name, unique=unique, ops=ops)
+
+
+class TestQueryShapes:
+    def test_classifies_fields(self):
+        (shape,) = query_shapes(
+            "users",
+            {
+                "status": "active",
+                "id": {"$in": ["a", "b"]},
+                "age": {"$gte": 18},
+                "name": re.compile("^al"),
+            },
+            sort=[("created_at", -1)],
+            projection={"email": 1},
+        )
+
+        assert shape.equality == ("status", "id")
+        assert shape.range == ("age", "name")
+        assert shape.sort == (("created_at", -1),)
+        assert shape.projection == ("email",)
+
+    def test_recommends_equality_sort_range_order(self):
+        (shape,) = query_shapes(
+            "users", {"age": {"$gt": 30}, "status": "active"}, sort={"name": 1}
+        )
+
+        assert shape.recommended_keys() == (("status", 1), ("name", 1), ("age", 1))
+
+    def test_or_branches_are_separate_shapes(self):
+        shapes = query_shapes("users", {"active": True, "$or": [{"a": 1}, {"b": 2}]})
+
+        assert [shape.equality for shape in shapes] == [
+            ("active", "a"),
+            ("active", "b"),
+        ]
+
+
+class TestAdviseIndexes:
+    def test_supported_shapes_need_no_index(self):
+        (email,) = query_shapes("users", {"email": "a@b.c"})
+        (page,) = query_shapes("users", {}, sort=PAGE_SORT)
+
+        assert supports(index(("email", 1), unique=True), email)
+        # Traversed backwards for the opposite direction
+        assert supports(index(("created_at", 1), ("id", 1)), page)
+        assert not supports(index(("created_at", -1)), page)
+
+    def test_recommends_missing_indexes_and_merges_prefixes(self):
+        recorder = QueryShapeRecorder()
+        recorder.record("users", {"status": "active"})
+        recorder.record("users", {"status": "active"}, sort={"created_at": -1})
+        recorder.record("users", {"status": "active"}, sort={"created_at": -1})
+        recorder.record("users", {"email": "a@b.c"})
+        recorder.record("users", {})
+
+        advice = advise_indexes(
+            "users",
+            recorder.for_collection("users"),
+            [index(("email", 1), unique=True)],
+        )
+
+        (rec,) = advice.missing
+        assert rec.keys == (("status", 1), ("created_at", -1))
+        assert rec.queries == 3
+        assert "+ [('status', 1), ('created_at', -1)],  # 3 queries" in advice.patch(
+            "User"
+        )
+
+    def test_flags_unused_and_redundant_indexes(self):
+        name = index(("name_key", 1), ops=5)
+        compound = index(("name_key", 1), ("created_at", -1), ops=3)
+        unused = index(("name_ngrams", 1), ops=0)
+        email = index(("email", 1), unique=True, ops=0)
+
+        advice = advise_indexes("users", {}, [name, compound, unused, email])
+
+        assert advice.redundant == [(name, compound)]
+        assert advice.unused == [unused, email]
+        assert advice.as_dict()["redundant"] == [
+            {"index": "name_key_1", "covered_by": "name_key_1_created_at_-1"}
+        ]
+
+    def test_repository_queries_are_served_by_model_indexes(self):
+        recorder = QueryShapeRecorder()
+        # UserRepository.find_page past a cursor, and prefix search_by_name
+        cursor = encode_cursor(datetime.now(UTC), "user_01h455vb4pex5vsknk084sn02q")
+        recorder.record("users", after_cursor(cursor), sort=PAGE_SORT)
+        recorder.record(
+            "users", {"name_key": search.prefix_filter("al")}, sort={"name_key": 1}
+        )
+        existing = [
+            index(*index_keys(model_index)) for model_index in User.get_indexes()
+        ]
+
+        advice = advise_indexes("users", recorder.for_collection("users"), existing)
+
+        assert advice.missing == []
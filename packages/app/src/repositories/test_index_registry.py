@@ -0,0 +1,107 @@
+import logging
+
+import pytest
+from testcontainers.mongodb import MongoDbContainer
+
+from ..models.user import User
+from ..shared.database import DatabaseSettings
+from .index_registry import IndexConflictError, IndexRegistry, index_keys
+
+logger = logging.getLogger(__name__)
+
+
+class TestIndexRegistry:
+    @pytest.fixture(scope="session")
+    def mongodb_container(self):
+        logger.info("Starting MongoDB test container")
+        with MongoDbContainer() as mongo:
+            yield mongo
+
+    @pytest.fixture
+    async def database(self, mongodb_container):
+        mongodb_url = mongodb_container.get_connection_url()
+        settings = DatabaseSettings(mongodb_url=mongodb_url, db_name="test_index_db")
+        await settings.initialize()
+        await settings.db.drop_collection(User.get_collection_name())
+        yield settings.db
+        await settings.close()
+
+    @pytest.mark.asyncio
+    async def test_ensure_indexes_runs_once(self, database):
+        registry = IndexRegistry()
+
+        created = await registry.ensure_indexes(database, User)
+        assert len(created) == len(User.get_indexes())
+        assert registry.is_ensured(database, User)
+
+        assert await registry.ensure_indexes(database, User) == []
+
+    @pytest.mark.asyncio
+    async def test_marker_skips_other_processes(self, database):
+        await database.drop_collection("_index_markers")
+        await IndexRegistry(marker_collection="_index_markers").ensure_indexes(
+            database, User
+        )
+
+        other_process = IndexRegistry(marker_collection="_index_markers")
+        assert await other_process.ensure_indexes(database, User) == []
+
+    @pytest.mark.asyncio
+    async def test_marker_does_not_hide_a_dropped_index(self, database):
+        await database.drop_collection("_index_markers")
+        await IndexRegistry(marker_collection="_index_markers").ensure_indexes(
+            database, User
+        )
+        await database[User.get_collection_name()].drop_index("email_1")
+
+        restarted = IndexRegistry(marker_collection="_index_markers")
+        assert await restarted.ensure_indexes(database, User) == ["email_1"]
+
+    @pytest.mark.asyncio
+    async def test_check_drift(self, database):
+        registry = IndexRegistry()
+        await registry.ensure_indexes(database, User)
+        collection = database[User.get_collection_name()]
+        await collection.drop_index("created_at_-1_id_-1")
+        await collection.create_index([("name", 1)])
+
+        drift = await registry.check_drift(database, User)
+        assert drift.has_drift
+        assert drift.missing == [index_keys([("created_at", -1), ("id", -1)])]
+        assert drift.unexpected == [index_keys([("name", 1)])]
+
+    @pytest.mark.asyncio
+    async def test_bootstrap_fails_on_conflicting_index(self, database):
+        collection = database[User.get_collection_name()]
+        # Left over from before email became unique
+        await collection.create_index([("email", 1)])
+
+        with pytest.raises(IndexConflictError):
+            await IndexRegistry().bootstrap(database, [User], allow_conflicts=False)
+
+        (drift,) = await IndexRegistry().bootstrap(
+            database, [User], allow_conflicts=True
+        )
+        assert drift.has_errors
+        assert drift.mismatched == [index_keys([("email", 1)])]
+
+    @pytest.mark.asyncio
+    async def test_bootstrap_recreates_dropped_indexes(self, database):
+        registry = IndexRegistry()
+        await registry.bootstrap(database, [User], allow_conflicts=False)
+        await database[User.get_collection_name()].drop_index("email_1")
+
+        (drift,) = await registry.bootstrap(database, [User], allow_conflicts=False)
+        assert not drift.missing
+        assert not drift.has_errors
+        information = await database[User.get_collection_name()].index_information()
+        assert information["email_1"]["unique"]
+
+    @pytest.mark.asyncio
+    async def test_missing_unique_index_is_an_error(self, database):
+        await IndexRegistry().ensure_indexes(database, User)
+        await database[User.get_collection_name()].drop_index("email_1")
+
+        drift = await IndexRegistry().check_drift(database, User)
+        assert drift.missing_unique == [index_keys([("email", 1)])]
+        assert drift.has_errors
@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+import pytest
+
+from shared.metrics import repository_documents, repository_operation_duration
+
+from .base_repository import BatchResult
+from .instrumentation import count_documents, instrumented
+
+
+class FakeRepository:
+    collection = SimpleNamespace(name="instrumented_things")
+
+    @instrumented
+    async def find_many(self, n: int) -> list[int]:
+        return list(range(n))
+
+    @instrumented
+    async def find_twice(self, n: int) -> list[int]:
+        return await self.find_many(n) + await self.find_many(n)
+
+    @instrumented
+    async def fail(self):
+        raise RuntimeError("boom")
+
+
+class TestInstrumented:
+    @pytest.mark.parametrize(
+        "result, expected",
+        [
+            (None, 0),
+            (False, 0),
+            (True, 1),
+            (7, 7),
+            ([1, 2], 2),
+            (BatchResult(items=[1, 2, 3]), 3),
+            (SimpleNamespace(inserted_count=4, errors=[]), 4),
+            (object(), 1),
+        ],
+    )
+    def test_count_documents(self, result, expected):
+        assert count_documents(result) == expected
+
+    @pytest.mark.asyncio
+    async def test_records_latency_and_documents_once_per_call(self):
+        repo = FakeRepository()
+        await repo.find_many(3)
+        await repo.find_twice(2)
+        with pytest.raises(RuntimeError):
+            await repo.fail()
+
+        def calls(operation):
+            counts = repository_operation_duration.values[
+                ("instrumented_things", operation)
+            ]
+            return sum(counts[:-1])
+
+        # Nested calls are part of the outer call's measurement
+        assert calls("find_many") == 1
+        assert calls("find_twice") == 1
+        assert calls("fail") == 1
+        assert repository_documents.values[("instrumented_things", "find_twice")] == 4
+        assert ("instrumented_things", "fail") not in repository_documents.values
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from .single_flight import BatchLoader, SingleFlight
+
+
+class TestSingleFlight:
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_result(self):
+        flight = SingleFlight()
+        calls = 0
+        release = asyncio.Event()
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return {"id": "user_1"}
+
+        tasks = [asyncio.create_task(flight.do("key", fetch)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+
+        results = await asyncio.gather(*tasks)
+        assert calls == 1
+        assert all(result is results[0] for result in results)
+        assert flight.shared == 4
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_caller(self):
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def fetch():
+            await release.wait()
+            raise RuntimeError("boom")
+
+        tasks = [asyncio.create_task(flight.do("key", fetch)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    @pytest.mark.asyncio
+    async def test_forgotten_keys_start_a_new_call(self):
+        flight = SingleFlight()
+        calls = 0
+        release = asyncio.Event()
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return calls
+
+        first = asyncio.create_task(flight.do(("db", "users", "a"), fetch))
+        await asyncio.sleep(0)
+        flight.forget_prefix(("db", "users"))
+        second = asyncio.create_task(flight.do(("db", "users", "a"), fetch))
+        await asyncio.sleep(0)
+        release.set()
+
+        await asyncio.gather(first, second)
+        assert calls == 2
+        assert flight.shared == 0
+
+
+class TestBatchLoader:
+    @pytest.mark.asyncio
+    async def test_loads_in_the_same_tick_share_one_batch(self):
+        requested = []
+
+        async def batch_fn(keys):
+            requested.append(keys)
+            return {key: key.upper() for key in keys if key != "missing"}
+
+        loader = BatchLoader(batch_fn)
+        results = await asyncio.gather(
+            loader.load("a"), loader.load("b"), loader.load("a"), loader.load("missing")
+        )
+
+        assert results == ["A", "B", "A", None]
+        assert requested == [["a", "b", "missing"]]
+        assert loader.batches == 1
+
+    @pytest.mark.asyncio
+    async def test_batches_are_capped_at_max_batch_size(self):
+        sizes = []
+
+        async def batch_fn(keys):
+            sizes.append(len(keys))
+            return {key: key for key in keys}
+
+        loader = BatchLoader(batch_fn, max_batch_size=2)
+        results = await loader.load_many(["a", "b", "c"])
+
+        assert results == ["a", "b", "c"]
+        assert sizes == [2, 1]
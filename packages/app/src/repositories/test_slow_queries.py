@@ -0,0 +1,153 @@
+import logging
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from .slow_queries import PlanSummary, SlowQueryLog, query_shape
+
+COLLSCAN_EXPLAIN = {
+    "queryPlanner": {
+        "winningPlan": {
+            "stage": "SORT",
+            "inputStage": {"stage": "COLLSCAN", "filter": {}},
+        }
+    },
+    "executionStats": {
+        "nReturned": 2,
+        "totalDocsExamined": 1000,
+        "totalKeysExamined": 0,
+        "executionTimeMillis": 12,
+    },
+}
+
+IXSCAN_EXPLAIN = {
+    "queryPlanner": {
+        "winningPlan": {
+            # Plans run by the slot-based engine
+            "queryPlan": {
+                "stage": "FETCH",
+                "inputStage": {"stage": "IXSCAN", "indexName": "email_1"},
+            }
+        }
+    },
+    "executionStats": {
+        "nReturned": 1,
+        "totalDocsExamined": 1,
+        "totalKeysExamined": 1,
+        "executionTimeMillis": 0,
+    },
+}
+
+
+class FakeCollection:
+    name = "users"
+
+    def __init__(self, explain: dict):
+        self.commands = []
+
+        async def command(command: dict) -> dict:
+            self.commands.append(command)
+            return explain
+
+        self.database = SimpleNamespace(command=command)
+
+
+class TestQueryShape:
+    def test_strips_literals_and_keeps_operators(self):
+        query = {
+            "email": "alice@example.com",
+            "age": {"$gte": 30, "$lt": 40},
+            "id": {"$in": ["user_1", "user_2", "user_3"]},
+            "name": {"$regex": re.compile("^al")},
+            "$or": [{"active": True}, {"role": "admin"}],
+        }
+
+        assert query_shape(query) == {
+            "email": "?",
+            "age": {"$gte": "?", "$lt": "?"},
+            "id": {"$in": ["?"]},
+            "name": {"$regex": "?"},
+            "$or": [{"active": "?"}, {"role": "?"}],
+        }
+
+    def test_shape_does_not_depend_on_list_length(self):
+        assert query_shape({"id": {"$in": [1]}}) == query_shape(
+            {"id": {"$in": [1, 2, 3]}}
+        )
+
+
+class TestPlanSummary:
+    def test_collection_scan(self):
+        plan = PlanSummary.from_explain(COLLSCAN_EXPLAIN)
+
+        assert plan.stage == "COLLSCAN"
+        assert plan.indexes == []
+        assert plan.docs_examined_per_returned == 500
+
+    def test_index_scan(self):
+        plan = PlanSummary.from_explain(IXSCAN_EXPLAIN)
+
+        assert plan.stage == "IXSCAN"
+        assert plan.indexes == ["email_1"]
+        assert plan.docs_examined_per_returned == 1
+
+
+class TestSlowQueryLog:
+    @pytest.mark.asyncio
+    async def test_fast_queries_are_not_recorded(self):
+        log = SlowQueryLog(threshold_ms=1_000)
+        with log.watch(FakeCollection(COLLSCAN_EXPLAIN), "find_many", {"a": 1}):
+            pass
+
+        assert not log.entries
+
+    @pytest.mark.asyncio
+    async def test_slow_queries_are_explained_once_per_shape(self, caplog):
+        log = SlowQueryLog(threshold_ms=0)
+        collection = FakeCollection(COLLSCAN_EXPLAIN)
+
+        with caplog.at_level(logging.WARNING):
+            with log.watch(collection, "find_many", {"name": "Alice"}, limit=10):
+                pass
+            await log.drain()
+            with log.watch(collection, "find_many", {"name": "Bob"}, limit=10):
+                pass
+            await log.drain()
+
+        assert collection.commands == [
+            {
+                "explain": {"find": "users", "filter": {"name": "Alice"}, "limit": 10},
+                "verbosity": "executionStats",
+            }
+        ]
+        newest, oldest = log.recent()
+        assert newest["shape"] == oldest["shape"] == {"name": "?"}
+        assert newest["plan"]["stage"] == "COLLSCAN"
+        assert newest["plan"]["docs_examined_per_returned"] == 500
+        records = [r for r in caplog.records if hasattr(r, "slow_query")]
+        assert len(records) == 2
+        assert "Alice" not in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_concurrent_slow_queries_share_one_explain(self):
+        log = SlowQueryLog(threshold_ms=0)
+        collection = FakeCollection(COLLSCAN_EXPLAIN)
+        for name in ("Alice", "Bob", "Carol"):
+            with log.watch(collection, "find_many", {"name": name}):
+                pass
+        await log.drain()
+
+        assert len(collection.commands) == 1
+        assert [entry["plan"]["stage"] for entry in log.recent()] == ["COLLSCAN"] * 3
+
+    @pytest.mark.asyncio
+    async def test_oldest_entries_are_dropped(self):
+        log = SlowQueryLog(threshold_ms=0, explain=False, max_entries=2)
+        collection = FakeCollection(COLLSCAN_EXPLAIN)
+        for field in ("a", "b", "c"):
+            with log.watch(collection, "find_many", {field: 1}):
+                pass
+
+        assert [entry["shape"] for entry in log.recent()] == [{"c": "?"}, {"b": "?"}]
+        assert collection.commands == []
@@ -1,11 +1,17 @@
 import logging
 
 import pytest
+from bson.binary import Binary
 from faker import Faker
 from testcontainers.mongodb import MongoDbContainer
 from typeid import TypeID
 
+from exceptions.user_errors import DuplicateEmailError
+
+from ..models.typeid_codec import UuidIdCodec
 from ..models.user import User
+from ..shared.database import DatabaseSettings
+from .cache import LocalCacheBackend, RepositoryCache
 from .user_repo import UserRepository
 
 fake = Faker()
@@ -23,10 +29,18 @@ class TestUserRepository:
             yield mongo
 
     @pytest.fixture
-    async def user_repository(self, mongodb_container):
+    async def database(self, mongodb_container):
         mongodb_url = mongodb_container.get_connection_url()
-        repo = UserRepository(mongodb_url=mongodb_url, db_name="test_db")
+        settings = DatabaseSettings(mongodb_url=mongodb_url, db_name="test_db")
+        await settings.initialize()
+        yield settings.db
+        await settings.close()
+
+    @pytest.fixture
+    async def user_repository(self, database):
+        repo = UserRepository(database)
         await repo.collection.delete_many({})
+        await repo.initialize()
         return repo
 
     @pytest.mark.asyncio
@@ -50,9 +64,36 @@ class TestUserRepository:
         user = User(name=fake.name(), email=fake.email())
         await user_repository.create_user(user)
 
-        with pytest.raises(ValueError, match="already exists"):
+        with pytest.raises(DuplicateEmailError, match="already exists"):
             await user_repository.create_user(user)
 
+    @pytest.mark.asyncio
+    async def test_create_users_streams_batches(self, user_repository):
+        taken = await user_repository.create_user(
+            User(name=fake.name(), email=fake.email())
+        )
+        emails = [fake.email(), taken.email, fake.email()]
+        users = (User(name=fake.name(), email=email) for email in emails)
+
+        result = await user_repository.create_users(users, ordered=False, batch_size=2)
+
+        assert result.inserted_count == 2
+        ((position, error),) = result.errors
+        assert position == 1
+        assert error["errmsg"] == f"User with email {taken.email} already exists"
+
+    @pytest.mark.asyncio
+    async def test_update_email_to_existing_email(self, user_repository):
+        taken = await user_repository.create_user(
+            User(name=fake.name(), email=fake.email())
+        )
+        user = await user_repository.create_user(
+            User(name=fake.name(), email=fake.email())
+        )
+
+        with pytest.raises(DuplicateEmailError):
+            await user_repository.update_email(user.id, taken.email)
+
     @pytest.mark.asyncio
     async def test_find_users_by_name(self, user_repository):
         user1 = User(name="John Doe", email=fake.email())
@@ -80,3 +121,110 @@ class TestUserRepository:
         random_id = TypeID()
         user = await user_repository.get_by_id(random_id)
         assert user is None
+
+    @pytest.mark.asyncio
+    async def test_cached_lookups_are_invalidated_on_write(self, user_repository):
+        cache = RepositoryCache(LocalCacheBackend(), ttl=60)
+        cached_repository = UserRepository(user_repository.db, cache=cache)
+        user = await cached_repository.create_user(
+            User(name=fake.name(), email=fake.email())
+        )
+        old_email = user.email
+
+        assert (await cached_repository.get_by_email(old_email)).id == user.id
+        assert (await cached_repository.get_by_id(user.id)).email == old_email
+        assert (await cached_repository.get_by_id(user.id)).email == old_email
+        assert cache.stats()["hits"] == 1
+
+        new_email = fake.email()
+        updated = await cached_repository.update_email(user.id, new_email)
+        assert updated.email == new_email
+        assert (await cached_repository.get_by_id(user.id)).email == new_email
+        assert await cached_repository.get_by_email(old_email) is None
+
+        assert await cached_repository.delete(user.id)
+        assert await cached_repository.get_by_id(user.id) is None
+
+    @pytest.mark.asyncio
+    async def test_update_returns_the_stored_document(self, user_repository):
+        cache = RepositoryCache(LocalCacheBackend(), ttl=60)
+        cached_repository = UserRepository(user_repository.db, cache=cache)
+        for repository in (user_repository, cached_repository):
+            user = await repository.create_user(
+                User(name=fake.name(), email=fake.email())
+            )
+
+            updated = await repository.update(user.id, {"name": fake.name()})
+            assert updated == await user_repository.get_by_id(user.id)
+
+    @pytest.mark.asyncio
+    async def test_uuid_id_storage_and_migration(self, user_repository):
+        legacy = await user_repository.create_user(
+            User(name=fake.name(), email=fake.email())
+        )
+        uuid_repository = UserRepository(
+            user_repository.db, id_codec=UuidIdCodec(prefix="user")
+        )
+        user = await uuid_repository.create_user(
+            User(name=fake.name(), email=fake.email())
+        )
+
+        stored = await uuid_repository.collection.find_one({"email": user.email})
+        assert isinstance(stored["id"], Binary)
+        assert (await uuid_repository.get_by_id(user.id)).id == user.id
+        # String ids written before the switch are still found
+        assert (await uuid_repository.get_by_id(legacy.id)).id == legacy.id
+
+        assert await uuid_repository.migrate_ids() == 1
+        assert await uuid_repository.migrate_ids() == 0
+        stored = await uuid_repository.collection.find_one({"email": legacy.email})
+        assert isinstance(stored["id"], Binary)
+        assert (await uuid_repository.get_by_id(legacy.id)).id == legacy.id
+
+    @pytest.mark.asyncio
+    async def test_search_fields_follow_renames_and_backfill(self, user_repository):
+        user = await user_repository.create_user(
+            User(name="Zoë Quartz", email=fake.email())
+        )
+        assert await user_repository.search_by_name("ZOË q") == [
+            await user_repository.get_by_id(user.id)
+        ]
+
+        await user_repository.update(user.id, {"name": "Renamed Person"})
+        assert await user_repository.search_by_name("zoë") == []
+        assert len(await user_repository.search_by_name("med pers", contains=True)) == 1
+
+        await user_repository.collection.update_one(
+            {"email": user.email}, {"$unset": {"name_key": "", "name_ngrams": ""}}
+        )
+        assert await user_repository.search_by_name("renamed") == []
+        assert await user_repository.backfill_search_fields() == 1
+        assert len(await user_repository.search_by_name("renamed")) == 1
+
+    @pytest.mark.asyncio
+    async def test_batch_operations_keep_the_cache_consistent(self, user_repository):
+        cache = RepositoryCache(LocalCacheBackend(), ttl=60)
+        repository = UserRepository(user_repository.db, cache=cache)
+        users = [
+            await repository.create_user(User(name=fake.name(), email=fake.email()))
+            for _ in range(3)
+        ]
+        unknown = TypeID(prefix="user")
+        for user in users:
+            await repository.get_by_email(user.email)
+
+        result = await repository.get_many_by_ids([users[2].id, unknown, users[0].id])
+        assert [user.id for user in result.items] == [users[2].id, users[0].id]
+        assert result.missing == [str(unknown)]
+
+        new_email = fake.email()
+        result = await repository.update_many(
+            {users[0].id: {"email": new_email}, users[1].id: {"email": users[2].email}}
+        )
+        assert [user.email for user in result.items] == [new_email]
+        assert "already exists" in result.errors[str(users[1].id)]["errmsg"]
+        assert await repository.get_by_email(users[0].email) is None
+
+        result = await repository.delete_many([users[0].id, unknown])
+        assert result.items == [str(users[0].id)]
+        assert await repository.get_by_email(new_email) is None
@@ -1,35 +1,215 @@
 # src/repositories/user_repository.py
+from collections.abc import Iterable
 from datetime import UTC, datetime
 from typing import List, Optional
 
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
 from typeid import TypeID
 
+from config import Settings
+from exceptions.user_errors import DuplicateEmailError
+from models.typeid_codec import IdCodec, make_id_codec
 from models.user import User
 
-from .base_repository import BaseRepository
+from . import search
+from .base_repository import (
+    DEFAULT_BATCH_SIZE,
+    BaseRepository,
+    BatchResult,
+    BulkInsertResult,
+    M,
+)
+from .cache import RepositoryCache
+from .instrumentation import instrumented
+from .slow_queries import SlowQueryLog
+
+DUPLICATE_KEY_ERROR_CODE = 11000
 
 
 class UserRepository(BaseRepository[User]):
-    def __init__(self, mongodb_url: str, db_name: str):
-        super().__init__(mongodb_url, db_name, User)
+    cache_key_fields = ("id", "email")
+
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        cache: Optional[RepositoryCache] = None,
+        batch_reads: bool = False,
+        trusted_reads: bool = False,
+        id_codec: Optional[IdCodec] = None,
+        read_batch_size: int = 500,
+        slow_queries: Optional[SlowQueryLog] = None,
+    ):
+        super().__init__(
+            db,
+            User,
+            cache,
+            batch_reads,
+            trusted_reads,
+            id_codec,
+            read_batch_size,
+            slow_queries,
+        )
+
+    @classmethod
+    def from_settings(
+        cls,
+        db: AsyncIOMotorDatabase,
+        settings: Settings,
+        cache: Optional[RepositoryCache] = None,
+        slow_queries: Optional[SlowQueryLog] = None,
+    ) -> "UserRepository":
+        """Repository with read batching, hydration and id storage from `settings`."""
+        return cls(
+            db,
+            cache=cache,
+            batch_reads=settings.repository_batch_reads,
+            trusted_reads=settings.repository_trusted_reads,
+            id_codec=make_id_codec(settings.mongodb_id_storage, User.get_id_prefix()),
+            read_batch_size=settings.repository_read_batch_size,
+            slow_queries=slow_queries,
+        )
+
+    def _cache_keys(self, doc: dict) -> list[str]:
+        return [*super()._cache_keys(doc), self._cache_key("email", doc["email"])]
 
+    @instrumented
     async def find_by_email(self, email: str) -> Optional[User]:
         return await self.find_one({"email": email})
 
+    @instrumented
     async def find_users_by_name(self, name: str) -> List[User]:
-        return await self.find_many({"name": {"$regex": name, "$options": "i"}})
+        return await self.search_by_name(name, contains=True, limit=100)
+
+    @instrumented
+    async def search_by_name(
+        self,
+        text: str,
+        contains: bool = False,
+        limit: int = 20,
+        into: Optional[type[M]] = None,
+    ) -> List[User | M]:
+        """
+        Case-insensitive name search, ordered by name. Prefix search seeks on
+        the `name_key` index. Substring search narrows candidates through the
+        `name_ngrams` index before matching; texts shorter than an n-gram fall
+        back to prefix search.
+        """
+        key = search.normalize(text)
+        if not key:
+            return []
+        if contains and len(key) >= search.NGRAM_SIZE:
+            query = {
+                "name_ngrams": {"$all": search.ngrams(key)},
+                "name_key": search.contains_filter(key),
+            }
+        else:
+            query = {"name_key": search.prefix_filter(key)}
+        cursor = self.collection.find(query).sort("name_key", 1).limit(limit)
+        with self._watch("search_by_name", query, {"name_key": 1}, limit):
+            docs = await cursor.to_list(None)
+        return [self._to_model(doc, into) for doc in docs]
+
+    @instrumented
+    async def backfill_search_fields(self, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """Add search fields to documents written before they existed."""
+        return await self._rewrite(
+            {"name_key": {"$exists": False}},
+            {"name": 1},
+            lambda doc: self._search_fields(doc["name"]),
+            batch_size,
+        )
+
+    @staticmethod
+    def _search_fields(name: str) -> dict:
+        # Storage-only fields backing name search; they never reach the model
+        key = search.normalize(name)
+        return {"name_key": key, "name_ngrams": search.ngrams(key)}
+
+    def _to_document(self, user: User) -> dict:
+        return {**super()._to_document(user), **self._search_fields(user.name)}
 
+    def _with_search_fields(self, update_dict: dict) -> dict:
+        if "name" not in update_dict:
+            return update_dict
+        return {**update_dict, **self._search_fields(update_dict["name"])}
+
+    @instrumented
+    async def update(self, id: TypeID, update_dict: dict) -> Optional[User]:
+        update_dict = self._with_search_fields(update_dict)
+        try:
+            return await super().update(id, update_dict)
+        except DuplicateKeyError as e:
+            raise self._duplicate_email_error(e, update_dict.get("email")) from e
+
+    @instrumented
+    async def update_many(
+        self, updates: dict[TypeID | str, dict], into: Optional[type[M]] = None
+    ) -> BatchResult[User | M]:
+        updates = {
+            str(id): self._with_search_fields(update) for id, update in updates.items()
+        }
+        result = await super().update_many(updates, into)
+        for id, error in result.errors.items():
+            self._describe_duplicate_email(error, updates[id].get("email"))
+        return result
+
+    @instrumented
     async def update_email(self, id: TypeID, new_email: str) -> Optional[User]:
         return await self.update(
             id, {"email": new_email, "updated_at": datetime.now(UTC)}
         )
 
+    @instrumented
     async def create_user(self, user: User) -> User:
-        existing_user = await self.find_by_email(user.email)
-        if existing_user:
-            raise ValueError(f"User with email {user.email} already exists")
-        user.id = TypeID(prefix="user")
-        return await self.create(user)
+        # A single insert; the unique email index rejects duplicates atomically
+        user.id = TypeID(prefix=User.get_id_prefix())
+        try:
+            return await self.create(user)
+        except DuplicateKeyError as e:
+            raise self._duplicate_email_error(e, user.email) from e
 
-    async def get_by_email(self, email: str) -> Optional[User]:
-        return await self.find_one({"email": email})
+    @instrumented
+    async def create_users(
+        self,
+        users: Iterable[User],
+        ordered: bool = True,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> BulkInsertResult:
+        def with_new_ids():
+            # Lazily, so only create_many's current batch is held in memory
+            for user in users:
+                user.id = TypeID(prefix=User.get_id_prefix())
+                yield user
+
+        result = await self.create_many(
+            with_new_ids(), ordered=ordered, batch_size=batch_size
+        )
+        for _, error in result.errors:
+            self._describe_duplicate_email(error, error["op"].get("email"))
+        return result
+
+    @staticmethod
+    def _is_duplicate_email(details: Optional[dict]) -> bool:
+        key_pattern = (details or {}).get("keyPattern")
+        return not key_pattern or "email" in key_pattern
+
+    def _describe_duplicate_email(self, error: dict, email: Optional[str]):
+        """Replace the server message of a duplicate-email write error."""
+        is_duplicate = error.get("code") == DUPLICATE_KEY_ERROR_CODE
+        if is_duplicate and self._is_duplicate_email(error):
+            error["errmsg"] = f"User with email {email} already exists"
+
+    def _duplicate_email_error(self, error: DuplicateKeyError, email: str) -> Exception:
+        if not self._is_duplicate_email(error.details):
+            return error
+        return DuplicateEmailError(f"User with email {email} already exists")
+
+    @instrumented
+    async def get_by_email(
+        self, email: str, into: Optional[type[M]] = None
+    ) -> Optional[User | M]:
+        doc = await self._read(
+            lambda: self._fetch_one({"email": email}), self._cache_key("email", email)
+        )
+        return self._to_model(doc, into) if doc else None
@@ -1,10 +1,12 @@
+from collections.abc import Iterable
 from typing import Generic, Optional, TypeVar
 
 from pydantic import BaseModel
 from typeid import TypeID
 
 from models.base_model import BaseDocument
-from repositories.base_repository import BaseRepository
+from repositories.base_repository import BaseRepository, BatchResult
+from repositories.pagination import Page
 
 Doc = TypeVar("Doc", bound=BaseDocument)
 Res = TypeVar("Res", bound=BaseModel)
@@ -12,6 +14,10 @@ Repo = TypeVar("RepoType", bound=BaseRepository[Doc])
 
 
 class BaseService(Generic[Doc, Repo, Res]):
+    # When set, reads decode stored documents straight into this model
+    # instead of hydrating the document model and converting it
+    response_class: Optional[type[Res]] = None
+
     def __init__(self, repository: Repo):
         self.repository = repository
 
@@ -19,8 +25,40 @@ class BaseService(Generic[Doc, Repo, Res]):
         raise NotImplementedError
 
     async def get_by_id(self, id: TypeID) -> Optional[Res]:
+        if self.response_class is not None:
+            return await self.repository.get_by_id(id, into=self.response_class)
         doc = await self.repository.get_by_id(id)
         return self._to_response(doc) if doc else None
 
+    async def get_many(self, ids: Iterable[TypeID]) -> BatchResult[Res]:
+        if self.response_class is not None:
+            return await self.repository.get_many_by_ids(ids, into=self.response_class)
+        result = await self.repository.get_many_by_ids(ids)
+        result.items = [self._to_response(doc) for doc in result.items]
+        return result
+
+    async def update_many(self, updates: dict[TypeID, dict]) -> BatchResult[Res]:
+        if self.response_class is not None:
+            return await self.repository.update_many(updates, into=self.response_class)
+        result = await self.repository.update_many(updates)
+        result.items = [self._to_response(doc) for doc in result.items]
+        return result
+
     async def delete(self, id: TypeID) -> bool:
         return await self.repository.delete(id)
+
+    async def delete_many(self, ids: Iterable[TypeID]) -> BatchResult[str]:
+        return await self.repository.delete_many(ids)
+
+    async def find_page(
+        self, query: dict, limit: int = 100, cursor: Optional[str] = None
+    ) -> Page[Res]:
+        if self.response_class is not None:
+            return await self.repository.find_page(
+                query, limit=limit, cursor=cursor, into=self.response_class
+            )
+        page = await self.repository.find_page(query, limit=limit, cursor=cursor)
+        return Page(
+            items=[self._to_response(doc) for doc in page.items],
+            next_cursor=page.next_cursor,
+        )
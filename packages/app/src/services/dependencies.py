@@ -1,11 +1,105 @@
-from config import get_app_db_name, get_mongodb_url
+from typing import Optional
+
+from config import Settings, get_settings
+from repositories.cache import LocalCacheBackend, RepositoryCache
+from repositories.slow_queries import SlowQueryLog
 from repositories.user_repo import UserRepository
 from services.user_service import UserService
+from shared.database import get_database_settings
+from shared.metrics import registry
+
+_user_cache: Optional[RepositoryCache] = None
+_user_cache_config: Optional[tuple[float, int]] = None
+_slow_query_log: Optional[SlowQueryLog] = None
+_slow_query_log_config: Optional[tuple[float, bool, int]] = None
+_user_repository: Optional[UserRepository] = None
+# Settings the repository was built from; a reload rebuilds it on next use
+_user_repository_settings: Optional[Settings] = None
+
+
+def get_user_cache() -> Optional[RepositoryCache]:
+    """
+    Process-wide cache for user lookups, or None when disabled. Replaced (and
+    so emptied) only when a reload changes its TTL or size.
+    """
+    global _user_cache, _user_cache_config
+    settings = get_settings()
+    config = (settings.user_cache_ttl_seconds, settings.cache_max_entries)
+    if config[0] <= 0:
+        return None
+    if _user_cache is None or _user_cache_config != config:
+        _user_cache = RepositoryCache(
+            LocalCacheBackend(max_entries=settings.cache_max_entries),
+            ttl=settings.user_cache_ttl_seconds,
+        )
+        _user_cache_config = config
+    return _user_cache
+
+
+def get_slow_query_log() -> Optional[SlowQueryLog]:
+    """
+    Process-wide log of slow repository queries, or None when the threshold
+    is 0. Replaced (and so emptied) only when a reload changes its settings.
+    """
+    global _slow_query_log, _slow_query_log_config
+    settings = get_settings()
+    config = (
+        settings.slow_query_threshold_ms,
+        settings.slow_query_explain,
+        settings.slow_query_log_size,
+    )
+    if config[0] <= 0:
+        return None
+    if _slow_query_log is None or _slow_query_log_config != config:
+        _slow_query_log = SlowQueryLog(*config)
+        _slow_query_log_config = config
+    return _slow_query_log
+
+
+def _user_cache_events() -> dict[tuple[str, ...], float]:
+    if _user_cache is None:
+        return {}
+    return {(event,): count for event, count in _user_cache.stats().items()}
+
+
+def _user_cache_entries() -> dict[tuple[str, ...], float]:
+    backend = _user_cache.backend if _user_cache is not None else None
+    return {(): len(backend)} if isinstance(backend, LocalCacheBackend) else {}
+
+
+registry.counter(
+    "user_cache_events_total",
+    "User cache hits, misses, collapsed loads and invalidations",
+    ("event",),
+    collect=_user_cache_events,
+)
+registry.gauge(
+    "user_cache_entries",
+    "Documents held in the user cache",
+    collect=_user_cache_entries,
+)
+
+
+def get_user_repository() -> UserRepository:
+    """
+    Process-wide repository, so lookups from concurrent requests can be
+    coalesced and batched together. Rebuilt when the settings are reloaded.
+    """
+    global _user_repository, _user_repository_settings
+    settings = get_settings()
+    # Repositories share the process-wide client opened in the app lifespan
+    db = get_database_settings().db
+    if (
+        _user_repository is None
+        or _user_repository.db is not db
+        or _user_repository_settings is not settings
+    ):
+        _user_repository = UserRepository.from_settings(
+            db, settings, cache=get_user_cache(), slow_queries=get_slow_query_log()
+        )
+        _user_repository_settings = settings
+    return _user_repository
 
 
 async def get_user_service() -> UserService:
-    # Create and return UserService instance
-    mongodb_url = get_mongodb_url()
-    db_name = get_app_db_name()
-    repository = UserRepository(mongodb_url=mongodb_url, db_name=db_name)
-    return UserService(repository)
+    return UserService(get_user_repository())
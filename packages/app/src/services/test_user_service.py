@@ -5,8 +5,11 @@ import pytest
 from faker import Faker
 from typeid import TypeID
 
+from dto.user_dto import UserResponse
+
 from ..dto.user_dto import CreateUserRequest, UpdateUserRequest
 from ..models.user import User
+from ..repositories.base_repository import BulkInsertResult
 from ..repositories.user_repo import UserRepository
 from .user_service import UserService
 
@@ -64,13 +67,18 @@ class TestUserService:
     @pytest.mark.asyncio
     async def test_find_by_email(self, user_service, mock_repository):
         email = fake.email()
-        user = User(id=TypeID(prefix="user"), name=fake.name(), email=email)
+        user = UserResponse(
+            id=TypeID(prefix="user"),
+            name=fake.name(),
+            email=email,
+            created_at=datetime.now(),
+        )
         mock_repository.get_by_email.return_value = user
 
         response = await user_service.find_by_email(email)
         assert str(response.id).startswith("user_")
         assert response.email == email
-        mock_repository.get_by_email.assert_called_once_with(email)
+        mock_repository.get_by_email.assert_called_once_with(email, into=UserResponse)
 
     @pytest.mark.asyncio
     async def test_update_user_not_found(self, user_service, mock_repository):
@@ -81,3 +89,67 @@ class TestUserService:
         response = await user_service.update_user(user_id, update_request)
         assert response is None
         mock_repository.update.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_import_users_reports_row_errors(self, user_service, mock_repository):
+        async def rows():
+            yield 1, {"name": fake.name(), "email": fake.email()}
+            yield 2, {"name": "", "email": "not-an-email"}
+            yield 3, ValueError("Invalid JSON")
+            yield 4, {"name": fake.name(), "email": fake.email()}
+            yield 5, {"name": fake.name(), "email": fake.email()}
+
+        mock_repository.create_users.return_value = BulkInsertResult(
+            inserted_count=2, errors=[(1, {"errmsg": "duplicate email"})]
+        )
+
+        response = await user_service.import_users(rows(), batch_size=10)
+        assert response.inserted == 2
+        assert response.failed == 3
+        assert [(e.row, e.error) for e in response.errors][1:] == [
+            (3, "Invalid JSON"),
+            (4, "duplicate email"),
+        ]
+        assert "email" in response.errors[0].error
+        mock_repository.create_users.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_import_users_ordered_stops_at_first_error(
+        self, user_service, mock_repository
+    ):
+        async def rows():
+            yield 1, {"name": fake.name(), "email": fake.email()}
+            yield 2, {"name": fake.name()}
+            yield 3, {"name": fake.name(), "email": fake.email()}
+
+        mock_repository.create_users.return_value = BulkInsertResult(inserted_count=1)
+
+        response = await user_service.import_users(rows(), ordered=True, batch_size=10)
+        assert response.inserted == 1
+        assert response.failed == 1
+        assert response.errors[0].row == 2
+        mock_repository.create_users.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_stream_users(self, user_service, mock_repository):
+        users = [
+            UserResponse(
+                id=TypeID(prefix="user"),
+                name=fake.name(),
+                email=fake.email(),
+                created_at=datetime.now(),
+            )
+            for _ in range(3)
+        ]
+
+        async def stream():
+            for user in users:
+                yield user
+
+        mock_repository.stream.return_value = stream()
+
+        responses = [response async for response in user_service.stream_users()]
+        assert responses == users
+        _, kwargs = mock_repository.stream.call_args
+        assert kwargs["into"] is UserResponse
+        assert kwargs["projection"]["_id"] == 0
@@ -1,14 +1,36 @@
+from collections.abc import AsyncIterable, AsyncIterator
 from typing import Optional
 
+from pydantic import ValidationError
 from typeid import TypeID
 
-from dto.user_dto import CreateUserRequest, UpdateUserRequest, UserResponse
+from dto.user_dto import (
+    BatchItemError,
+    BatchUpdateUsersRequest,
+    CreateUserRequest,
+    DeleteUsersResponse,
+    ImportRowError,
+    ImportUsersResponse,
+    UpdateUserRequest,
+    UserBatchResponse,
+    UserPageResponse,
+    UserResponse,
+)
 from models.user import User
+from repositories.base_repository import DEFAULT_BATCH_SIZE
 from repositories.user_repo import UserRepository
 from services.base_service import BaseService
 
+# Per-row errors kept in an import response; the rest are only counted
+MAX_REPORTED_IMPORT_ERRORS = 100
+
+# (row number, parsed record) pairs; records that failed to parse are exceptions
+ImportRow = tuple[int, dict | Exception]
+
 
 class UserService(BaseService[User, UserRepository, UserResponse]):
+    response_class = UserResponse
+
     def __init__(self, repository: UserRepository):
         super().__init__(repository)
 
@@ -35,6 +57,115 @@ class UserService(BaseService[User, UserRepository, UserResponse]):
             return self._to_response(user) if user else None
         return await self.get_by_id(id)
 
+    async def get_users(self, ids: list[TypeID]) -> UserBatchResponse:
+        result = await self.get_many(ids)
+        return UserBatchResponse(items=result.items, missing=result.missing)
+
+    async def update_users(self, request: BatchUpdateUsersRequest) -> UserBatchResponse:
+        result = await self.update_many(
+            {
+                item.id: item.model_dump(exclude_unset=True, exclude={"id"})
+                for item in request.items
+            }
+        )
+        return UserBatchResponse(
+            items=result.items,
+            missing=result.missing,
+            errors=[
+                BatchItemError(id=id, error=error.get("errmsg", "Update failed"))
+                for id, error in result.errors.items()
+            ],
+        )
+
+    async def delete_users(self, ids: list[TypeID]) -> DeleteUsersResponse:
+        result = await self.delete_many(ids)
+        return DeleteUsersResponse(deleted=result.items, missing=result.missing)
+
+    async def list_users(
+        self, limit: int = 100, cursor: Optional[str] = None
+    ) -> UserPageResponse:
+        page = await self.find_page({}, limit=limit, cursor=cursor)
+        return UserPageResponse(items=page.items, next_cursor=page.next_cursor)
+
+    async def stream_users(
+        self, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> AsyncIterator[UserResponse]:
+        # Only fetch the fields the response exposes
+        projection = {"_id": 0, **dict.fromkeys(UserResponse.model_fields, 1)}
+        async for user in self.repository.stream(
+            {}, projection=projection, batch_size=batch_size, into=UserResponse
+        ):
+            yield user
+
+    async def search_users(
+        self, text: str, contains: bool = False, limit: int = 20
+    ) -> list[UserResponse]:
+        return await self.repository.search_by_name(
+            text, contains=contains, limit=limit, into=UserResponse
+        )
+
     async def find_by_email(self, email: str) -> Optional[UserResponse]:
-        user = await self.repository.get_by_email(email)
-        return self._to_response(user) if user else None
+        return await self.repository.get_by_email(email, into=UserResponse)
+
+    async def import_users(
+        self,
+        rows: AsyncIterable[ImportRow],
+        ordered: bool = False,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> ImportUsersResponse:
+        """
+        Validate rows incrementally and insert them in batches.
+        At most `batch_size` users are buffered at a time, so memory stays flat
+        regardless of input size. Ordered imports stop at the first failing row.
+        """
+        result = ImportUsersResponse()
+        batch: list[User] = []
+        batch_rows: list[int] = []
+
+        async def flush() -> bool:
+            write = await self.repository.create_users(
+                batch, ordered=ordered, batch_size=batch_size
+            )
+            result.inserted += write.inserted_count
+            for position, error in write.errors:
+                self._add_import_error(
+                    result, batch_rows[position], error.get("errmsg", "Insert failed")
+                )
+            batch.clear()
+            batch_rows.clear()
+            return not (ordered and write.errors)
+
+        async for row, record in rows:
+            if isinstance(record, Exception):
+                error = str(record)
+            else:
+                try:
+                    request = CreateUserRequest.model_validate(record)
+                    error = None
+                except ValidationError as e:
+                    error = "; ".join(
+                        f"{'.'.join(map(str, detail['loc'])) or 'row'}: {detail['msg']}"
+                        for detail in e.errors()
+                    )
+            if error is not None:
+                self._add_import_error(result, row, error)
+                if ordered:
+                    break
+                continue
+
+            batch.append(User(name=request.name, email=request.email))
+            batch_rows.append(row)
+            if len(batch) >= batch_size and not await flush():
+                return result
+
+        if batch:
+            await flush()
+        return result
+
+    @staticmethod
+    def _add_import_error(result: ImportUsersResponse, row: int, error: str):
+        result.failed += 1
+        if len(result.errors) < MAX_REPORTED_IMPORT_ERRORS:
+            result.errors.append(ImportRowError(row=row, error=error))
+        else:
+            result.errors_truncated = True
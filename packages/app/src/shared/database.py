@@ -2,29 +2,104 @@ from typing import Optional
 
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 
-from config import get_app_db_name, get_mongodb_url
+from config import Settings, get_settings
+from shared.metrics import pool_metrics_listener
+from shared.tracing import command_tracer
 
 
 class DatabaseSettings:
+    """
+    Owns the process-wide MongoDB client and its connection pool.
+    Repositories receive the database handle from here instead of
+    opening their own client.
+    """
+
     def __init__(
-        self, mongodb_url: Optional[str] = None, db_name: Optional[str] = None
+        self,
+        mongodb_url: Optional[str] = None,
+        db_name: Optional[str] = None,
+        min_pool_size: Optional[int] = None,
+        max_pool_size: Optional[int] = None,
+        max_idle_time_ms: Optional[int] = None,
+        wait_queue_timeout_ms: Optional[int] = None,
+        settings: Optional[Settings] = None,
     ):
-        self.mongodb_url = mongodb_url or get_mongodb_url()
-        self.database_name = db_name or get_app_db_name()
+        """
+        Explicit arguments override `settings`, which default to the current
+        `get_settings()`. Pool sizes and timeouts apply when the client is created.
+        """
+        self.settings = settings = settings or get_settings()
+        self.mongodb_url = mongodb_url or settings.mongodb_url
+        self.database_name = db_name or settings.app_db_name
+        if self.mongodb_url is None:
+            raise ValueError("Required environment variable 'MONGODB_URL' is not set")
+        if self.database_name is None:
+            raise ValueError(
+                "Required environment variable 'MONGODB_APP_DB_NAME' is not set"
+            )
+        self.min_pool_size = (
+            min_pool_size
+            if min_pool_size is not None
+            else settings.mongodb_min_pool_size
+        )
+        self.max_pool_size = (
+            max_pool_size
+            if max_pool_size is not None
+            else settings.mongodb_max_pool_size
+        )
+        self.max_idle_time_ms = (
+            max_idle_time_ms
+            if max_idle_time_ms is not None
+            else settings.mongodb_max_idle_time_ms
+        )
+        self.wait_queue_timeout_ms = (
+            wait_queue_timeout_ms
+            if wait_queue_timeout_ms is not None
+            else settings.mongodb_wait_queue_timeout_ms
+        )
         self._client: Optional[AsyncIOMotorClient] = None
         self._db: Optional[AsyncIOMotorDatabase] = None
 
-    async def initialize(self):
+    async def initialize(self, client: Optional[AsyncIOMotorClient] = None):
+        """
+        Create the client, once. `client` is used instead when given, e.g. an
+        in-memory stand-in for benchmarks.
+        """
         if self._client is None:
-            self._client = AsyncIOMotorClient(self.mongodb_url)
+            self._client = client or AsyncIOMotorClient(
+                self.mongodb_url,
+                minPoolSize=self.min_pool_size,
+                maxPoolSize=self.max_pool_size,
+                maxIdleTimeMS=self.max_idle_time_ms,
+                waitQueueTimeoutMS=self.wait_queue_timeout_ms,
+                connectTimeoutMS=self.settings.mongodb_connect_timeout_ms,
+                serverSelectionTimeoutMS=(
+                    self.settings.mongodb_server_selection_timeout_ms
+                ),
+                event_listeners=self._event_listeners(),
+            )
             self._db = self._client[self.database_name]
 
+    def _event_listeners(self) -> list:
+        listeners = []
+        if self.settings.request_tracing:
+            listeners.append(command_tracer)
+        if self.settings.metrics:
+            listeners.append(pool_metrics_listener)
+        return listeners
+
     async def close(self):
         if self._client is not None:
             self._client.close()
             self._client = None
             self._db = None
 
+    @property
+    def client(self) -> AsyncIOMotorClient:
+        if self._client is None:
+            raise RuntimeError("Database not initialized. Call initialize() first.")
+        return self._client
+
     @property
     def db(self) -> AsyncIOMotorDatabase:
         if self._db is None:
@@ -32,21 +107,28 @@ class DatabaseSettings:
         return self._db
 
     def __del__(self):
-        if self._client is not None:
+        if getattr(self, "_client", None) is not None:
             self._client.close()
 
 
-_instance: Optional[DatabaseSettings] = None
+_instances: dict[tuple[Optional[str], Optional[str]], DatabaseSettings] = {}
 
 
 def get_database_settings(
     mongodb_url: Optional[str] = None, db_name: Optional[str] = None
 ) -> DatabaseSettings:
-    """Get database settings instance."""
-    global _instance
-    if mongodb_url is None and db_name is None:
-        if _instance is None:
-            _instance = DatabaseSettings()
-        return _instance
-    else:
-        return DatabaseSettings(mongodb_url, db_name)
+    """
+    Get the shared database settings instance for a URL and database name.
+    Instances are cached so every caller reuses the same client and pool.
+    """
+    key = (mongodb_url, db_name)
+    if key not in _instances:
+        _instances[key] = DatabaseSettings(mongodb_url, db_name)
+    return _instances[key]
+
+
+async def close_database_settings():
+    """Close every shared client. Called once on application shutdown."""
+    for settings in list(_instances.values()):
+        await settings.close()
+    _instances.clear()
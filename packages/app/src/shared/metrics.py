@@ -0,0 +1,286 @@
+import asyncio
+import math
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Sequence
+from typing import Optional
+
+from pymongo import monitoring
+
+# Upper bounds, in seconds, for latency histograms: 0.5ms up to 10s
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+Labels = tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(str(value))}"'
+        for name, value in zip(names, values, strict=True)
+    )
+    return "{" + pairs + "}"
+
+
+Collector = Callable[[], dict[Labels, float]]
+
+
+class Counter:
+    """
+    Monotonic counter per label set. Updates are plain dict and int operations
+    with no lock: the event loop runs them one at a time, and an increment
+    racing in from a driver thread can at worst be lost, never corrupt state.
+
+    With `collect`, values are instead read from it at scrape time, for
+    counts something else already keeps (e.g. cache hits).
+    """
+
+    type = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        collect: Optional[Collector] = None,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+        self.values: dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self) -> Iterable[tuple[str, Labels, float]]:
+        values = self.collect() if self.collect is not None else self.values
+        for labels, value in list(values.items()):
+            yield self.name, labels, value
+
+
+class Gauge(Counter):
+    """A value that goes up and down."""
+
+    type = "gauge"
+
+    def set(self, value: float, *labels: str) -> None:
+        self.values[labels] = value
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram:
+    """
+    Histogram with fixed bucket bounds. Observing is a bisect into the bounds
+    and three in-place additions; cumulative counts are only built at scrape.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.bounds = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self.values: dict[Labels, list[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        counts = self.values.get(labels)
+        if counts is None:
+            counts = self.values[labels] = [0] * (len(self.bounds) + 2)
+        counts[bisect_left(self.bounds, value)] += 1
+        counts[-1] += value
+
+    def samples(self) -> Iterable[tuple[str, Labels, float]]:
+        for labels, counts in list(self.values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.bounds, math.inf), counts[:-1], strict=True):
+                cumulative += count
+                yield f"{self.name}_bucket", (*labels, _format_value(bound)), cumulative
+            yield f"{self.name}_sum", labels, counts[-1]
+            yield f"{self.name}_count", labels, cumulative
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: dict[str, Counter | Histogram] = {}
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        collect: Optional[Collector] = None,
+    ) -> Counter:
+        return self.register(Counter(name, help, labelnames, collect))
+
+    def gauge(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        collect: Optional[Collector] = None,
+    ) -> Gauge:
+        return self.register(Gauge(name, help, labelnames, collect))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            names = metric.labelnames
+            for sample, labels, value in metric.samples():
+                sample_names = (*names, "le") if sample.endswith("_bucket") else names
+                labels_text = _format_labels(sample_names, labels)
+                lines.append(f"{sample}{labels_text} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "Time to handle a request, by route template",
+    ("method", "route", "status"),
+)
+repository_operation_duration = registry.histogram(
+    "repository_operation_duration_seconds",
+    "Time spent in repository methods",
+    ("collection", "operation"),
+)
+repository_documents = registry.counter(
+    "repository_documents_total",
+    "Documents returned or written by repository methods",
+    ("collection", "operation"),
+)
+slow_queries_total = registry.counter(
+    "repository_slow_queries_total",
+    "Repository queries slower than SLOW_QUERY_THRESHOLD_MS",
+    ("collection", "operation"),
+)
+mongodb_pool_checkout_duration = registry.histogram(
+    "mongodb_pool_checkout_duration_seconds",
+    "Time spent waiting to check a connection out of the pool",
+    ("address",),
+)
+mongodb_pool_in_use = registry.gauge(
+    "mongodb_pool_connections_in_use",
+    "Connections currently checked out of the pool",
+    ("address",),
+)
+mongodb_pool_checkout_failures = registry.counter(
+    "mongodb_pool_checkout_failures_total",
+    "Connection checkouts that failed, by reason",
+    ("address", "reason"),
+)
+event_loop_lag = registry.histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop ran a timer; high values mean blocking work",
+)
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Feeds connection pool checkout waits and in-use counts into the metrics."""
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent):
+        address = f"{event.address[0]}:{event.address[1]}"
+        mongodb_pool_checkout_duration.observe(event.duration, address)
+        mongodb_pool_in_use.inc(address)
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent):
+        mongodb_pool_in_use.dec(f"{event.address[0]}:{event.address[1]}")
+
+    def connection_check_out_failed(
+        self, event: monitoring.ConnectionCheckOutFailedEvent
+    ):
+        address = f"{event.address[0]}:{event.address[1]}"
+        mongodb_pool_checkout_failures.inc(address, str(event.reason))
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+
+pool_metrics_listener = PoolMetricsListener()
+
+
+async def monitor_event_loop_lag(interval: float = 0.5) -> None:
+    """
+    Sleep for `interval` over and over, recording how much later than asked
+    the loop woke up. Runs until cancelled; started by the API lifespan.
+    """
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        event_loop_lag.observe(max(0.0, time.perf_counter() - started - interval))
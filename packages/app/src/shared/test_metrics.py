@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+import pytest
+
+from shared.metrics import MetricsRegistry, PoolMetricsListener, mongodb_pool_in_use
+
+
+class TestMetricsRegistry:
+    def test_renders_counters_and_gauges(self):
+        registry = MetricsRegistry()
+        requests = registry.counter("requests_total", "Requests", ("method",))
+        registry.gauge("entries", "Entries", collect=lambda: {(): 3})
+        requests.inc("GET")
+        requests.inc("GET", amount=2)
+
+        assert registry.render() == (
+            "# HELP requests_total Requests\n"
+            "# TYPE requests_total counter\n"
+            'requests_total{method="GET"} 3\n'
+            "# HELP entries Entries\n"
+            "# TYPE entries gauge\n"
+            "entries 3\n"
+        )
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        latency = registry.histogram("latency", "Latency", ("route",), (0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            latency.observe(value, "/users")
+
+        lines = registry.render().splitlines()[2:]
+        assert lines == [
+            'latency_bucket{route="/users",le="0.1"} 2',
+            'latency_bucket{route="/users",le="1.0"} 3',
+            'latency_bucket{route="/users",le="+Inf"} 4',
+            'latency_sum{route="/users"} 2.65',
+            'latency_count{route="/users"} 4',
+        ]
+
+    def test_escapes_label_values(self):
+        registry = MetricsRegistry()
+        registry.counter("errors_total", "Errors", ("reason",)).inc('bad "x"\n')
+
+        assert 'errors_total{reason="bad \\"x\\"\\n"} 1' in registry.render()
+
+    def test_rejects_duplicate_names(self):
+        registry = MetricsRegistry()
+        registry.counter("requests_total", "Requests")
+        with pytest.raises(ValueError):
+            registry.gauge("requests_total", "Requests")
+
+
+class TestPoolMetricsListener:
+    def test_tracks_connections_in_use(self):
+        listener = PoolMetricsListener()
+        event = SimpleNamespace(address=("db.test", 27017), duration=0.002)
+        before = mongodb_pool_in_use.values.get(("db.test:27017",), 0)
+
+        listener.connection_checked_out(event)
+        listener.connection_checked_out(event)
+        listener.connection_checked_in(event)
+
+        assert mongodb_pool_in_use.values[("db.test:27017",)] == before + 1
@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+from shared.tracing import CommandTracer, RequestTrace, current_trace
+
+
+class TestRequestTrace:
+    def test_commands_are_attributed_to_the_current_trace(self):
+        tracer = CommandTracer()
+        trace = RequestTrace()
+
+        tracer.succeeded(SimpleNamespace(duration_micros=1_000))
+        token = current_trace.set(trace)
+        try:
+            tracer.succeeded(SimpleNamespace(duration_micros=1_500))
+            tracer.failed(SimpleNamespace(duration_micros=500))
+        finally:
+            current_trace.reset(token)
+
+        assert trace.db_commands == 2
+        assert trace.db_ms == 2.0
+
+    def test_server_timing_splits_the_request(self):
+        trace = RequestTrace()
+        trace.started = 10.0
+        trace.endpoint_started = 10.001
+        trace.endpoint_finished = 10.011
+        trace.record_command(4_000)
+
+        assert trace.server_timing(now=10.013) == (
+            "validation;dur=1.00, app;dur=6.00, serialize;dur=2.00, "
+            'db;dur=4.00;desc="1 commands", total;dur=13.00'
+        )
+
+    def test_server_timing_without_endpoint(self):
+        trace = RequestTrace()
+        trace.started = 10.0
+
+        assert trace.server_timing(now=10.002) == "total;dur=2.00"
@@ -0,0 +1,83 @@
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from pymongo import monitoring
+
+
+class RequestTrace:
+    """
+    Where one request's time went. Durations are in milliseconds; the
+    timestamps are `time.perf_counter()` readings taken along the way.
+
+    Commands are attributed through `current_trace`, which Motor carries into
+    its executor threads. Lookups merged by a BatchLoader or SingleFlight run
+    once, so they are attributed to the request that triggered the query.
+    """
+
+    __slots__ = (
+        "started",
+        "endpoint_started",
+        "endpoint_finished",
+        "db_ms",
+        "db_commands",
+    )
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.endpoint_started: Optional[float] = None
+        self.endpoint_finished: Optional[float] = None
+        self.db_ms = 0.0
+        self.db_commands = 0
+
+    def record_command(self, duration_micros: int) -> None:
+        self.db_ms += duration_micros / 1000
+        self.db_commands += 1
+
+    def server_timing(self, now: Optional[float] = None) -> str:
+        """
+        The trace as a Server-Timing header value:
+        validation (routing, request parsing and dependencies), app (the
+        endpoint, less db), db, serialize (response validation and rendering)
+        and total.
+        """
+        now = now if now is not None else time.perf_counter()
+        metrics = []
+        if self.endpoint_started is not None:
+            metrics.append(("validation", self.endpoint_started - self.started, None))
+            if self.endpoint_finished is not None:
+                endpoint = self.endpoint_finished - self.endpoint_started
+                metrics.append(("app", max(0.0, endpoint - self.db_ms / 1000), None))
+                metrics.append(("serialize", now - self.endpoint_finished, None))
+        if self.db_commands:
+            metrics.append(("db", self.db_ms / 1000, f"{self.db_commands} commands"))
+        metrics.append(("total", now - self.started, None))
+        return ", ".join(
+            f"{name};dur={seconds * 1000:.2f}" + (f';desc="{desc}"' if desc else "")
+            for name, seconds, desc in metrics
+        )
+
+
+current_trace: ContextVar[Optional[RequestTrace]] = ContextVar(
+    "current_trace", default=None
+)
+
+
+class CommandTracer(monitoring.CommandListener):
+    """Adds every MongoDB command's duration to the current request's trace."""
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        trace = current_trace.get()
+        if trace is not None:
+            trace.record_command(event.duration_micros)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        trace = current_trace.get()
+        if trace is not None:
+            trace.record_command(event.duration_micros)
+
+
+command_tracer = CommandTracer()
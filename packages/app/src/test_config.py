@@ -0,0 +1,106 @@
+import asyncio
+import os
+import signal
+from dataclasses import FrozenInstanceError
+
+import pytest
+
+import config
+from config import (
+    Settings,
+    get_settings,
+    install_reload_signal_handler,
+    reload_settings,
+    remove_reload_signal_handler,
+)
+
+
+class TestSettings:
+    @pytest.fixture(autouse=True)
+    def isolated_settings(self, monkeypatch, tmp_path):
+        # No .env file, and whatever was loaded before is restored afterwards
+        monkeypatch.setattr(config, "env_path", tmp_path / ".env")
+        monkeypatch.setattr(config, "_settings", None)
+
+    def test_defaults(self):
+        settings = Settings.from_env({})
+
+        assert settings == Settings(web_concurrency=os.process_cpu_count() or 1)
+        assert settings.mongodb_url is None
+
+    def test_parses_and_validates_values(self):
+        settings = Settings.from_env(
+            {
+                "MONGODB_URL": "mongodb://db:27017",
+                "MONGODB_MAX_POOL_SIZE": "20",
+                "USER_CACHE_TTL_SECONDS": "0.5",
+                "REPOSITORY_BATCH_READS": "no",
+                "MONGODB_ID_STORAGE": "uuid",
+                "MONGODB_INDEX_MARKER_COLLECTION": "_index_markers",
+            }
+        )
+
+        assert settings.mongodb_url == "mongodb://db:27017"
+        assert settings.mongodb_max_pool_size == 20
+        assert settings.user_cache_ttl_seconds == 0.5
+        assert settings.repository_batch_reads is False
+        assert settings.mongodb_id_storage == "uuid"
+        assert settings.mongodb_index_marker_collection == "_index_markers"
+
+    @pytest.mark.parametrize(
+        "env",
+        [
+            {"MONGODB_MAX_POOL_SIZE": "many"},
+            {"MONGODB_MAX_POOL_SIZE": "0"},
+            {"MONGODB_MIN_POOL_SIZE": "50", "MONGODB_MAX_POOL_SIZE": "10"},
+            {"MONGODB_ID_STORAGE": "bytes"},
+            {"MONGODB_INDEX_MARKER_COLLECTION": "system.markers"},
+        ],
+    )
+    def test_rejects_invalid_values(self, env):
+        with pytest.raises(ValueError):
+            Settings.from_env(env)
+
+    def test_settings_are_immutable(self):
+        with pytest.raises(FrozenInstanceError):
+            Settings().mongodb_max_pool_size = 1
+
+    def test_settings_are_parsed_once(self, monkeypatch):
+        monkeypatch.setenv("CACHE_MAX_ENTRIES", "10")
+        settings = get_settings()
+        monkeypatch.setenv("CACHE_MAX_ENTRIES", "20")
+
+        assert get_settings() is settings
+        assert settings.cache_max_entries == 10
+
+    def test_reload_reads_env_file_and_keeps_settings_on_error(
+        self, monkeypatch, tmp_path
+    ):
+        monkeypatch.delenv("CACHE_MAX_ENTRIES", raising=False)
+        env_file = tmp_path / ".env"
+        env_file.write_text("CACHE_MAX_ENTRIES=10\n")
+        assert get_settings().cache_max_entries == 10
+
+        env_file.write_text("CACHE_MAX_ENTRIES=20\n")
+        reloaded = reload_settings()
+        assert reloaded.cache_max_entries == 20
+        assert get_settings() is reloaded
+
+        env_file.write_text("CACHE_MAX_ENTRIES=lots\n")
+        assert reload_settings() is reloaded
+
+    @pytest.mark.skipif(not hasattr(signal, "SIGHUP"), reason="no SIGHUP")
+    @pytest.mark.asyncio
+    async def test_sighup_reloads(self, monkeypatch):
+        monkeypatch.setenv("CACHE_MAX_ENTRIES", "10")
+        assert get_settings().cache_max_entries == 10
+        monkeypatch.setenv("CACHE_MAX_ENTRIES", "20")
+
+        assert install_reload_signal_handler()
+        try:
+            os.kill(os.getpid(), signal.SIGHUP)
+            await asyncio.sleep(0.05)
+        finally:
+            remove_reload_signal_handler()
+
+        assert get_settings().cache_max_entries == 20
@@ -0,0 +1,875 @@
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from .utils import add_workspace_paths
+
+
+add_workspace_paths()
+
+BENCH_DB_NAME = "bench_db"
+
+BENCHMARKS: dict[str, Callable[[argparse.Namespace], Awaitable[dict]]] = {}
+
+
+def benchmark(name: str):
+    """Registers a benchmark so it can be selected from the command line."""
+
+    def decorator(func):
+        BENCHMARKS[name] = func
+        return func
+
+    return decorator
+
+
+async def run_concurrently(
+    operation: Callable[[], Awaitable[object]], requests: int, concurrency: int
+) -> float:
+    """
+    Runs `operation` the requested number of times with bounded concurrency.
+    Returns the elapsed wall-clock time in seconds.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def worker():
+        async with semaphore:
+            await operation()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(requests)))
+    return time.perf_counter() - started
+
+
+async def run_load(
+    operation: Callable[[], Awaitable[object]], requests: int, concurrency: int
+) -> dict:
+    """
+    `run_concurrently`, also timing each operation. Reports throughput and
+    latency percentiles in milliseconds.
+    """
+    samples = []
+
+    async def timed():
+        started = time.perf_counter()
+        await operation()
+        samples.append((time.perf_counter() - started) * 1000)
+
+    elapsed = await run_concurrently(timed, requests, concurrency)
+    return {
+        "requests": requests,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(requests / elapsed, 1),
+        **latency_percentiles(samples),
+    }
+
+
+@benchmark("pool")
+async def bench_pool(args: argparse.Namespace) -> dict:
+    """
+    Compares repository throughput when every request opens its own client
+    (the previous behaviour of BaseRepository) against the shared, pooled
+    client owned by DatabaseSettings.
+    """
+    from models.user import User
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from repositories.user_repo import UserRepository
+    from shared.database import DatabaseSettings
+
+    settings = DatabaseSettings(mongodb_url=args.mongodb_url, db_name=BENCH_DB_NAME)
+    await settings.initialize()
+    try:
+        seed_repository = UserRepository(settings.db)
+        await seed_repository.collection.delete_many({})
+        user = await seed_repository.create_user(
+            User(name="Bench User", email="bench.user@example.com")
+        )
+
+        async def client_per_request():
+            client = AsyncIOMotorClient(args.mongodb_url)
+            try:
+                await UserRepository(client[BENCH_DB_NAME]).get_by_id(user.id)
+            finally:
+                client.close()
+
+        async def shared_client():
+            await UserRepository(settings.db).get_by_id(user.id)
+
+        results = {}
+        for label, operation in (
+            ("client_per_request", client_per_request),
+            ("shared_client", shared_client),
+        ):
+            elapsed = await run_concurrently(operation, args.requests, args.concurrency)
+            results[label] = {
+                "requests": args.requests,
+                "seconds": round(elapsed, 3),
+                "requests_per_second": round(args.requests / elapsed, 1),
+            }
+        return results
+    finally:
+        await settings.close()
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def latency_percentiles(samples: list[float], unit: str = "ms") -> dict:
+    """p50/p95/p99 of `samples`, keyed like "p95_ms"."""
+    return {
+        f"p{round(fraction * 100)}_{unit}": round(percentile(samples, fraction), 3)
+        for fraction in (0.50, 0.95, 0.99)
+    }
+
+
+async def time_operation(operation: Callable[[], Awaitable[object]], repeats: int) -> dict:
+    """Runs `operation` sequentially and reports latency percentiles in milliseconds."""
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        await operation()
+        samples.append((time.perf_counter() - started) * 1000)
+    return latency_percentiles(samples)
+
+
+@benchmark("pagination")
+async def bench_pagination(args: argparse.Namespace) -> dict:
+    """
+    Compares skip/limit paging (find_many) with keyset paging (find_page) at
+    increasing depths. The collection is seeded once with --documents users.
+    """
+    from models.user import User
+    from repositories.index_registry import index_registry
+    from repositories.pagination import PAGE_SORT, after_cursor, encode_cursor
+    from repositories.user_repo import UserRepository
+    from shared.database import DatabaseSettings
+
+    page_size = 50
+    settings = DatabaseSettings(mongodb_url=args.mongodb_url, db_name=BENCH_DB_NAME)
+    await settings.initialize()
+    try:
+        repository = UserRepository(settings.db)
+        await index_registry.ensure_indexes(settings.db, User)
+        if await repository.collection.count_documents({}) != args.documents:
+            print(f"Seeding {args.documents} users...", file=sys.stderr)
+            await repository.collection.delete_many({})
+            await repository.create_users(
+                (
+                    User(name=f"User {i}", email=f"user{i}@example.com")
+                    for i in range(args.documents)
+                ),
+                ordered=False,
+            )
+
+        results = {}
+        for depth in (0, args.documents // 2, args.documents - page_size):
+            cursor = None
+            if depth:
+                # Locate the document just before the page (setup, not timed)
+                anchor = await (
+                    repository.collection.find({}).sort(PAGE_SORT).skip(depth - 1)
+                ).to_list(1)
+                cursor = encode_cursor(anchor[0]["created_at"], anchor[0]["id"])
+
+            # Both variants fetch the same sorted page straight from the collection
+            async def skip_limit(skip=depth):
+                await (
+                    repository.collection.find({})
+                    .sort(PAGE_SORT)
+                    .skip(skip)
+                    .limit(page_size)
+                    .to_list(page_size)
+                )
+
+            async def keyset(cursor=cursor):
+                query = after_cursor(cursor) if cursor else {}
+                await (
+                    repository.collection.find(query)
+                    .sort(PAGE_SORT)
+                    .limit(page_size)
+                    .to_list(page_size)
+                )
+
+            results[f"depth_{depth}"] = {
+                "skip_limit": await time_operation(skip_limit, args.repeats),
+                "keyset": await time_operation(keyset, args.repeats),
+            }
+        return results
+    finally:
+        await settings.close()
+
+
+@benchmark("search")
+async def bench_search(args: argparse.Namespace) -> dict:
+    """
+    Compares the former unanchored case-insensitive regex with indexed prefix
+    and n-gram substring search as the collection grows to --documents users
+    (measured at 1%, 10% and 100% of that size).
+    """
+    from models.user import User
+    from repositories.index_registry import index_registry
+    from repositories.user_repo import UserRepository
+    from shared.database import DatabaseSettings
+
+    first_names = ["Ada", "Alan", "Grace", "Linus", "Barbara", "Edsger", "Donald", "Frances"]
+    last_names = ["Lovelace", "Turing", "Hopper", "Torvalds", "Liskov", "Dijkstra", "Knuth"]
+    settings = DatabaseSettings(mongodb_url=args.mongodb_url, db_name=BENCH_DB_NAME)
+    await settings.initialize()
+    try:
+        repository = UserRepository(settings.db)
+        await repository.collection.delete_many({})
+        await index_registry.ensure_indexes(settings.db, User)
+
+        results = {}
+        seeded = 0
+        for size in (args.documents // 100, args.documents // 10, args.documents):
+            print(f"Seeding up to {size} users...", file=sys.stderr)
+            await repository.create_users(
+                (
+                    User(
+                        name=f"{first_names[i % 8]} {last_names[i % 7]} {i}",
+                        email=f"search{i}@example.com",
+                    )
+                    for i in range(seeded, size)
+                ),
+                ordered=False,
+            )
+            seeded = size
+
+            async def regex_scan():
+                query = {"name": {"$regex": "grace hop", "$options": "i"}}
+                await repository.collection.find(query).limit(20).to_list(20)
+
+            async def prefix():
+                await repository.search_by_name("Grace Hop", limit=20)
+
+            async def contains():
+                await repository.search_by_name("ace hop", contains=True, limit=20)
+
+            results[f"documents_{size}"] = {
+                "regex_scan": await time_operation(regex_scan, args.repeats),
+                "prefix": await time_operation(prefix, args.repeats),
+                "contains": await time_operation(contains, args.repeats),
+            }
+        return results
+    finally:
+        await settings.close()
+
+
+@benchmark("throughput")
+async def bench_throughput(args: argparse.Namespace) -> dict:
+    """
+    Drives the /api/hello routes in-process through httpx's ASGI transport and
+    compares the app as built (pure ASGI version-headers middleware) with an
+    app that does the same version handling in a BaseHTTPMiddleware instead,
+    as the headers used to be added.
+    """
+    import httpx
+    from src._lib.endpoints import ApiEndpoints
+    from src._lib.middleware import API_VERSION_HEADER, ApiVersionMiddleware
+    from src._lib.responses import FastJSONResponse
+    from src._lib.shared import add_version_headers, current_api_version, resolve_api_version
+    from src.main import create_app
+    from starlette.middleware import Middleware
+    from starlette.middleware.base import BaseHTTPMiddleware
+
+    async def version_headers_middleware(request, call_next):
+        header = request.headers.get(API_VERSION_HEADER.decode())
+        api_version = resolve_api_version(header.encode() if header is not None else None)
+        if api_version is None:
+            return FastJSONResponse({"detail": "Invalid API version"}, status_code=400)
+        request.state.api_version = api_version
+        current_api_version.set(api_version)
+        response = await call_next(request)
+        add_version_headers(response, api_version)
+        return response
+
+    # The same app with ApiVersionMiddleware swapped, in place, for the
+    # BaseHTTPMiddleware version; the stack is only built on first request
+    base_http_app = create_app()
+    base_http_app.user_middleware = [
+        Middleware(BaseHTTPMiddleware, dispatch=version_headers_middleware)
+        if middleware.cls is ApiVersionMiddleware
+        else middleware
+        for middleware in base_http_app.user_middleware
+    ]
+
+    hello = f"{ApiEndpoints.API.path}{ApiEndpoints.API.HELLO.path}"
+    results = {}
+    for label, app in (("asgi_middleware", create_app()), ("base_http_middleware", base_http_app)):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for path in (hello, f"{hello}/bench"):
+
+                async def request(path=path):
+                    response = await client.get(path)
+                    response.raise_for_status()
+
+                elapsed = await run_concurrently(request, args.requests, args.concurrency)
+                results.setdefault(label, {})[path] = {
+                    "requests": args.requests,
+                    "seconds": round(elapsed, 3),
+                    "requests_per_second": round(args.requests / elapsed, 1),
+                }
+    return results
+
+
+@benchmark("hydration")
+async def bench_hydration(args: argparse.Namespace) -> dict:
+    """
+    Measures the per-document cost of turning stored user documents into API
+    responses: full validation of User then UserResponse (the previous read
+    path), trusted hydration of User, and decoding straight into UserResponse.
+    Runs in-process; no database is needed.
+    """
+    from datetime import datetime
+
+    from dto.user_dto import UserResponse
+    from models.user import User
+    from repositories.hydration import get_decoder
+    from services.user_service import UserService
+    from typeid import TypeID
+
+    docs = [
+        {
+            "_id": i,
+            "id": str(TypeID(prefix="user")),
+            "name": f"User {i}",
+            "email": f"user{i}@example.com",
+            "created_at": datetime.now(),
+            "updated_at": None,
+        }
+        for i in range(args.samples)
+    ]
+    to_response = UserService(None)._to_response
+
+    def validated(doc):
+        user = User(**{**doc, "id": TypeID.from_string(doc["id"])})
+        return to_response(user)
+
+    trusted_user = get_decoder(User, trusted=True)
+    trusted_response = get_decoder(UserResponse, trusted=True)
+
+    def trusted(doc):
+        return to_response(trusted_user(doc))
+
+    results = {}
+    for label, hydrate in (
+        ("validated", validated),
+        ("trusted_model", trusted),
+        ("trusted_direct_response", trusted_response),
+    ):
+        samples = []
+        for _ in range(args.repeats):
+            started = time.perf_counter()
+            for doc in docs:
+                hydrate(doc)
+            samples.append((time.perf_counter() - started) * 1e6 / len(docs))
+        results[label] = latency_percentiles(samples, "us_per_document")
+    return results
+
+
+def time_call(call: Callable[[], object], repeats: int) -> dict:
+    """Synchronous counterpart of `time_operation` for in-process work."""
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - started) * 1000)
+    return latency_percentiles(samples)
+
+
+@benchmark("serialization")
+async def bench_serialization(args: argparse.Namespace) -> dict:
+    """
+    Compares rendering a single user and a 1,000-user page: FastAPI's generic
+    path (jsonable_encoder + stdlib json), its response-model path (pydantic
+    dump_json), and FastJSONResponse. Runs in-process; no database is needed.
+    """
+    from datetime import datetime
+
+    from dto.user_dto import UserPageResponse, UserResponse
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from pydantic import TypeAdapter
+    from src._lib.responses import FastJSONResponse
+    from typeid import TypeID
+
+    users = [
+        UserResponse(
+            id=TypeID(prefix="user"),
+            name=f"User {i}",
+            email=f"user{i}@example.com",
+            created_at=datetime.now(),
+        )
+        for i in range(1000)
+    ]
+    payloads = {
+        "single_user": (UserResponse, users[0]),
+        "page_of_1000_users": (UserPageResponse, UserPageResponse(items=users)),
+    }
+
+    results = {}
+    for label, (model_class, payload) in payloads.items():
+        adapter = TypeAdapter(model_class)
+        results[label] = {
+            "jsonable_encoder_json": time_call(
+                lambda payload=payload: JSONResponse(jsonable_encoder(payload)),
+                args.repeats,
+            ),
+            "response_model_dump_json": time_call(
+                lambda adapter=adapter, payload=payload: adapter.dump_json(
+                    adapter.validate_python(payload)
+                ),
+                args.repeats,
+            ),
+            "fast_json_response": time_call(
+                lambda payload=payload: FastJSONResponse(payload), args.repeats
+            ),
+        }
+    return results
+
+
+@benchmark("typeid")
+async def bench_typeid(args: argparse.Namespace) -> dict:
+    """
+    Per-id cost of parsing TypeIDs (uncached TypeID.from_string against the
+    memoized parse_typeid, cold and warm) and of encoding and decoding them
+    with the string and UUID storage codecs. Runs in-process.
+    """
+    from models.typeid_codec import IdCodec, UuidIdCodec, parse_typeid
+    from typeid import TypeID
+
+    strings = [str(TypeID(prefix="user")) for _ in range(args.samples)]
+    ids = [TypeID.from_string(value) for value in strings]
+    string_codec, uuid_codec = IdCodec(), UuidIdCodec("user")
+    stored = [uuid_codec.encode(id) for id in ids]
+
+    def cold_parse(value):
+        parse_typeid.cache_clear()
+        return parse_typeid(value)
+
+    operations = {
+        "from_string": (TypeID.from_string, strings),
+        "parse_typeid_cold": (cold_parse, strings),
+        "parse_typeid_warm": (parse_typeid, strings),
+        "string_encode": (string_codec.encode, ids),
+        "string_decode": (string_codec.decode, strings),
+        "uuid_encode": (uuid_codec.encode, ids),
+        "uuid_decode": (uuid_codec.decode, stored),
+    }
+    results = {}
+    for label, (operation, values) in operations.items():
+        samples = []
+        for _ in range(args.repeats):
+            started = time.perf_counter()
+            for value in values:
+                operation(value)
+            samples.append((time.perf_counter() - started) * 1e6 / len(values))
+        results[label] = latency_percentiles(samples, "us_per_id")
+    return results
+
+
+@benchmark("version_headers")
+async def bench_version_headers(args: argparse.Namespace) -> dict:
+    """
+    Per-request cost of ApiVersionMiddleware (resolving x-api-version and
+    adding the lifecycle headers) around an app that does nothing.
+    """
+    from src._lib.middleware import API_VERSION_HEADER, ApiVersionMiddleware
+    from src._lib.shared import ApiVersion
+
+    async def empty_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    results = {}
+    for label, app in (("bare_app", empty_app), ("middleware", ApiVersionMiddleware(empty_app))):
+        for version in (None, ApiVersion.V2024_10_PREVIEW):
+            headers = [] if version is None else [(API_VERSION_HEADER, version.value.encode())]
+
+            async def call(app=app, headers=headers):
+                await app({"type": "http", "headers": headers}, receive, send)
+
+            key = "default_version" if version is None else "preview_version"
+            results.setdefault(label, {})[key] = await time_operation(call, args.samples)
+    return results
+
+
+def in_memory_client():
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        sys.exit("--in-memory needs mongomock-motor: pip install mongomock-motor")
+    return AsyncMongoMockClient()
+
+
+@benchmark("api")
+async def bench_api(args: argparse.Namespace) -> dict:
+    """
+    Load through the whole stack (middleware, routing, validation, service,
+    repository, driver, serialization) in-process via httpx's ASGI transport:
+    create users, get them one at a time, and list pages of 50. Runs against
+    MongoDB at --mongodb-url, or mongomock with --in-memory.
+    """
+    import itertools
+    import random
+
+    import httpx
+    from config import reload_settings
+    from models.user import User
+    from shared.database import get_database_settings
+    from src._lib.endpoints import ApiEndpoints
+    from src.main import create_app
+
+    os.environ["MONGODB_URL"] = args.mongodb_url
+    os.environ["MONGODB_APP_DB_NAME"] = BENCH_DB_NAME
+    reload_settings()
+    database = get_database_settings()
+    await database.initialize(client=in_memory_client() if args.in_memory else None)
+    await database.db[User.get_collection_name()].delete_many({})
+
+    app = create_app()
+    users = f"{ApiEndpoints.API.path}{ApiEndpoints.API.USERS.path}"
+    ids: list[str] = []
+    sequence = itertools.count()
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+            async def create():
+                n = next(sequence)
+                response = await client.post(
+                    users, json={"name": f"Bench User {n}", "email": f"bench{n}@example.com"}
+                )
+                response.raise_for_status()
+                ids.append(response.json()["id"])
+
+            async def get():
+                response = await client.get(
+                    f"{users}{ApiEndpoints.API.USERS.BATCH.path}",
+                    params={"ids": random.choice(ids)},
+                )
+                response.raise_for_status()
+
+            async def list_page():
+                response = await client.get(users, params={"limit": 50})
+                response.raise_for_status()
+
+            for label, operation in (("create", create), ("get", get), ("list", list_page)):
+                results[label] = await run_load(operation, args.requests, args.concurrency)
+    return results
+
+
+@benchmark("overload")
+async def bench_overload(args: argparse.Namespace) -> dict:
+    """
+    The api load test pushed past capacity: --concurrency clients list pages
+    while a quarter as many import batches of 200 users, first without and
+    then with admission control. Its read limit is set to a quarter of
+    --concurrency so the overload shows in-process. Reports status counts and
+    latencies of admitted (200) and shed (503) requests per group.
+    """
+    import collections
+    import itertools
+
+    import httpx
+    from config import reload_settings
+    from models.user import User
+    from shared.database import get_database_settings
+    from src._lib.endpoints import ApiEndpoints
+    from src._lib.streaming import NDJSON_MEDIA_TYPES
+    from src.main import create_app
+
+    os.environ["MONGODB_URL"] = args.mongodb_url
+    os.environ["MONGODB_APP_DB_NAME"] = BENCH_DB_NAME
+    os.environ["ADMISSION_READ_LIMIT"] = str(max(1, args.concurrency // 4))
+    os.environ["ADMISSION_BULK_LIMIT"] = "1"
+    users = f"{ApiEndpoints.API.path}{ApiEndpoints.API.USERS.path}"
+    imports = f"{users}{ApiEndpoints.API.USERS.IMPORT.path}"
+    sequence = itertools.count()
+
+    def import_body() -> bytes:
+        return b"".join(
+            json.dumps({"name": f"Bulk User {n}", "email": f"bulk{n}@example.com"}).encode() + b"\n"
+            for n in itertools.islice(sequence, 200)
+        )
+
+    results = {}
+    for label, enabled in (("without_admission", "false"), ("with_admission", "true")):
+        os.environ["ADMISSION_CONTROL"] = enabled
+        reload_settings()
+        database = get_database_settings()
+        await database.initialize(client=in_memory_client() if args.in_memory else None)
+        await database.db[User.get_collection_name()].delete_many({})
+
+        app = create_app()
+        samples: dict[str, dict[int, list[float]]] = collections.defaultdict(
+            lambda: collections.defaultdict(list)
+        )
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+                def timed(group: str, send: Callable[[], Awaitable[httpx.Response]]):
+                    async def operation():
+                        started = time.perf_counter()
+                        response = await send()
+                        elapsed = (time.perf_counter() - started) * 1000
+                        samples[group][response.status_code].append(elapsed)
+
+                    return operation
+
+                read = timed("read", lambda: client.get(users, params={"limit": 50}))
+                bulk = timed(
+                    "bulk",
+                    lambda: client.post(
+                        imports,
+                        content=import_body(),
+                        headers={"content-type": NDJSON_MEDIA_TYPES[0]},
+                    ),
+                )
+                await asyncio.gather(
+                    run_concurrently(read, args.requests, args.concurrency),
+                    run_concurrently(
+                        bulk, max(1, args.requests // 20), max(1, args.concurrency // 4)
+                    ),
+                )
+        await database.close()
+        results[label] = {
+            group: {
+                str(status): {"count": len(latencies), **latency_percentiles(latencies)}
+                for status, latencies in sorted(by_status.items())
+            }
+            for group, by_status in samples.items()
+        }
+    return results
+
+
+# Benchmarks run by "suite": fast, and stable enough to compare against a baseline
+SUITE = ("hydration", "typeid", "serialization", "version_headers", "api")
+
+
+@benchmark("suite")
+async def bench_suite(args: argparse.Namespace) -> dict:
+    """The micro-benchmarks plus the ASGI load test, one after another."""
+    return {name: await BENCHMARKS[name](args) for name in SUITE}
+
+
+# Runs in a fresh interpreter per sample; prints its phase timestamps as JSON
+COLDSTART_CHILD = """
+import asyncio, json, time
+started = time.perf_counter()
+import src.main
+imported = time.perf_counter()
+app = src.main.app
+created = time.perf_counter()
+
+
+async def first_request():
+    import httpx
+
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            (await client.get({path!r})).raise_for_status()
+        return ready, time.perf_counter()
+
+
+ready, responded = asyncio.run(first_request())
+print(json.dumps({{
+    "import": imported - started,
+    "create_app": created - imported,
+    "startup": ready - created,
+    "first_request": responded - ready,
+    "time_to_first_request": responded - started,
+}}))
+"""
+
+
+def parse_importtime(stderr: str, module: str) -> dict[str, float]:
+    """
+    Cumulative import time, in milliseconds, of each module imported directly
+    by `module`, from `python -X importtime` output.
+    """
+    direct: dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 1:
+            direct[name.strip()] = int(cumulative) / 1000
+        elif depth == 0:
+            if name.strip() == module:
+                return direct
+            direct = {}
+    return direct
+
+
+@benchmark("coldstart")
+async def bench_coldstart(args: argparse.Namespace) -> dict:
+    """
+    Starts a fresh interpreter per sample and times importing the API, building
+    the app, the lifespan warm-up and the first request, plus the slowest
+    direct imports of src.main. The lifespan talks to MongoDB at --mongodb-url.
+    """
+    import statistics
+    import subprocess
+
+    from src._lib.endpoints import ApiEndpoints
+
+    from .utils import get_workspace_root
+
+    workspace_root = get_workspace_root()
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(
+            [
+                str(workspace_root / "packages" / "api"),
+                str(workspace_root / "packages" / "app" / "src"),
+                os.environ.get("PYTHONPATH", ""),
+            ]
+        ),
+        "MONGODB_URL": args.mongodb_url,
+        "MONGODB_APP_DB_NAME": BENCH_DB_NAME,
+    }
+    code = COLDSTART_CHILD.format(path=f"{ApiEndpoints.API.path}{ApiEndpoints.API.HELLO.path}")
+
+    phases: dict[str, list[float]] = {}
+    imports: dict[str, list[float]] = {}
+    for _ in range(args.repeats):
+        started = time.perf_counter()
+        child = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        phases.setdefault("process", []).append(time.perf_counter() - started)
+        for phase, seconds in json.loads(child.stdout.splitlines()[-1]).items():
+            phases.setdefault(phase, []).append(seconds)
+        for module, ms in parse_importtime(child.stderr, "src.main").items():
+            imports.setdefault(module, []).append(ms)
+
+    slowest = sorted(imports.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    return {
+        "samples": args.repeats,
+        "p50_ms": {
+            phase: round(statistics.median(samples) * 1000, 1) for phase, samples in phases.items()
+        },
+        "slowest_imports_ms": {
+            module: round(statistics.median(samples), 1) for module, samples in slowest[:10]
+        },
+    }
+
+
+def flatten(results: dict, prefix: str = "") -> dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, path))
+        elif isinstance(value, (int, float)):
+            flat[path] = value
+    return flat
+
+
+# Latency changes smaller than this are timer and scheduling noise, not regressions
+NOISE_FLOOR = {"ms": 0.01, "us": 0.5}
+
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Metrics that got worse than the baseline by more than `tolerance` (a
+    fraction). Latency percentiles regress upwards, by more than the noise
+    floor, and requests_per_second downwards; other numbers, and metrics
+    missing on either side, are ignored.
+    """
+    regressions = []
+    current = flatten(results)
+    for path, expected in flatten(baseline).items():
+        actual = current.get(path)
+        metric = path.rsplit(".", 1)[-1]
+        if actual is None or not expected:
+            continue
+        if unit := re.match(r"p\d+_(ms|us)", metric):
+            worse = (
+                actual > expected * (1 + tolerance)
+                and actual - expected > NOISE_FLOOR[unit.group(1)]
+            )
+        elif metric == "requests_per_second":
+            worse = actual < expected * (1 - tolerance)
+        else:
+            continue
+        if worse:
+            regressions.append(f"{path}: {actual} (baseline {expected})")
+    return regressions
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Performance benchmarks")
+    parser.add_argument("name", choices=sorted(BENCHMARKS), help="Benchmark to run")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--documents", type=int, default=1_000_000)
+    parser.add_argument("--samples", type=int, default=10_000)
+    parser.add_argument(
+        "--mongodb-url",
+        default=os.getenv("MONGODB_URL", "mongodb://localhost:27017"),
+    )
+    parser.add_argument(
+        "--in-memory", action="store_true", help="Use mongomock instead of MongoDB (api, suite)"
+    )
+    parser.add_argument("--baseline", type=Path, help="Fail on regressions against this file")
+    parser.add_argument("--save-baseline", type=Path, help="Write these results as a baseline")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown before a metric counts as a regression (default 25%%)",
+    )
+    return parser.parse_args(argv)
+
+
+def main():
+    """
+    Runs a single benchmark and prints its results as JSON.
+    Database benchmarks expect a reachable MongoDB (see `python -m scripts.dev init`).
+    """
+    args = parse_args(sys.argv[1:])
+    results = {args.name: asyncio.run(BENCHMARKS[args.name](args))}
+    print(json.dumps(results, indent=2))
+
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(results, indent=2) + "\n")
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
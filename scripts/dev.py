@@ -6,6 +6,8 @@ from pathlib import Path
 
 import motor.motor_asyncio
 
+from .utils import add_workspace_paths
+
 
 class WorkspaceManager:
     """
@@ -87,6 +89,35 @@ class WorkspaceManager:
         await self.init_db_connection(workspace)
         print(f"{workspace} workspace database initialized")
 
+    async def migrate(self, command: str) -> None:
+        """
+        Runs a one-off data migration on the users collection. Both are safe
+        to re-run while the app is serving:
+        migrate-ids rewrites ids into the form selected by MONGODB_ID_STORAGE;
+        backfill-search adds name search fields to users written before them.
+        """
+        add_workspace_paths()
+        from config import get_settings
+        from models.user import User
+        from repositories.index_registry import index_registry
+        from repositories.user_repo import UserRepository
+        from shared.database import close_database_settings, get_database_settings
+
+        database = get_database_settings()
+        await database.initialize()
+        try:
+            repository = UserRepository.from_settings(database.db, get_settings())
+            codec = repository.id_codec
+            if command == "migrate-ids":
+                count = await repository.migrate_ids()
+                print(f"Migrated {count} user ids to {codec.storage} storage")
+            else:
+                await index_registry.ensure_indexes(database.db, User)
+                count = await repository.backfill_search_fields()
+                print(f"Added search fields to {count} users")
+        finally:
+            await close_database_settings()
+
     async def start_app(self) -> None:
         """
         Starts the app workspace. Database should be initialized separately.
@@ -144,6 +175,10 @@ async def main():
             # Exit after initialization
             sys.exit(0)
 
+        if command in ("migrate-ids", "backfill-search"):
+            await manager.migrate(command)
+            sys.exit(0)
+
         # For other commands, ensure MongoDB is running
         manager.ensure_docker_running()
 
@@ -0,0 +1,40 @@
+import argparse
+import sys
+from pathlib import Path
+
+import orjson
+
+from .utils import add_workspace_paths, get_workspace_root
+
+
+add_workspace_paths()
+
+
+def write_schema(output: Path) -> None:
+    """
+    Builds the API's OpenAPI schema and writes it to `output`.
+    Point OPENAPI_SCHEMA_FILE at the file to serve it without generating it on boot.
+    """
+    from src._lib.custom_openapi import build_openapi_schema
+    from src.main import create_app
+
+    schema = build_openapi_schema(create_app())
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_bytes(orjson.dumps(schema, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS))
+    print(f"Wrote OpenAPI schema to {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the OpenAPI schema file")
+    parser.add_argument(
+        "output",
+        nargs="?",
+        type=Path,
+        default=get_workspace_root() / "packages" / "api" / "openapi.json",
+    )
+    args = parser.parse_args(sys.argv[1:])
+    write_schema(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import argparse
+import importlib.util
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import sys
+import time
+from multiprocessing.connection import wait
+from multiprocessing.process import BaseProcess
+
+from .utils import add_workspace_paths
+
+
+add_workspace_paths()
+
+APP = "src.main:app"
+
+# A worker that exits sooner than this after starting is treated as crashing,
+# and respawned after a pause instead of immediately
+MIN_WORKER_LIFETIME_SECONDS = 1.0
+
+
+def bind_socket(host: str, port: int, backlog: int, reuse_port: bool) -> socket.socket:
+    """
+    Listening socket for the workers. By default one socket is bound by the
+    supervisor and shared, so connections queued while a worker restarts wait
+    for the next one. With `reuse_port` every worker binds its own socket and
+    the kernel spreads connections evenly across their accept queues, but
+    connections still queued on a recycled worker's socket are reset.
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def event_loop() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def http_protocol() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def run_worker(args: argparse.Namespace, sock: socket.socket | None) -> None:
+    """
+    One uvicorn server. On SIGTERM it stops accepting, lets in-flight requests
+    finish (up to --graceful-timeout), then runs the app's lifespan shutdown,
+    which closes the shared MongoDB client.
+    """
+    import uvicorn
+
+    # Leave the terminal's process group so Ctrl-C reaches only the supervisor;
+    # a second signal would make uvicorn skip the drain
+    os.setpgrp()
+    if sock is None:
+        sock = bind_socket(args.host, args.port, args.backlog, reuse_port=True)
+    # Jitter each worker's limit so recycled workers do not all restart at once
+    max_requests = None
+    if args.max_requests > 0:
+        max_requests = args.max_requests + random.randint(0, args.max_requests_jitter)
+    config = uvicorn.Config(
+        APP,
+        loop=event_loop(),
+        http=http_protocol(),
+        lifespan="on",
+        backlog=args.backlog,
+        timeout_keep_alive=args.keep_alive,
+        limit_max_requests=max_requests,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        access_log=args.access_log,
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Supervisor:
+    """
+    Keeps `workers` server processes running: respawns any that exit (workers
+    recycled after --max-requests exit on purpose), forwards SIGHUP so every
+    worker reloads its settings, and drains all of them on SIGTERM or SIGINT.
+    """
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.context = multiprocessing.get_context("spawn")
+        self.sock = (
+            None
+            if args.reuse_port
+            else bind_socket(args.host, args.port, args.backlog, reuse_port=False)
+        )
+        self.workers: dict[int, tuple[BaseProcess, float]] = {}
+        self.stopping = False
+
+    def spawn(self) -> None:
+        process = self.context.Process(
+            target=run_worker, args=(self.args, self.sock), name="api-worker"
+        )
+        process.start()
+        self.workers[process.sentinel] = (process, time.monotonic())
+
+    def signal_workers(self, signum: int) -> None:
+        for process, _ in self.workers.values():
+            if process.is_alive():
+                os.kill(process.pid, signum)
+
+    def handle_stop(self, signum, frame) -> None:
+        self.stopping = True
+
+    def handle_reload(self, signum, frame) -> None:
+        self.signal_workers(signal.SIGHUP)
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self.handle_stop)
+        signal.signal(signal.SIGINT, self.handle_stop)
+        signal.signal(signal.SIGHUP, self.handle_reload)
+
+        for _ in range(self.args.workers):
+            self.spawn()
+        print(
+            f"Serving {APP} on {self.args.host}:{self.args.port} with "
+            f"{self.args.workers} workers ({event_loop()}, {http_protocol()})"
+        )
+
+        while not self.stopping:
+            for sentinel in wait(list(self.workers), timeout=0.5):
+                process, started = self.workers.pop(sentinel)
+                process.join()
+                if self.stopping:
+                    break
+                if time.monotonic() - started < MIN_WORKER_LIFETIME_SECONDS:
+                    print(f"Worker {process.pid} exited with {process.exitcode}, restarting")
+                    time.sleep(MIN_WORKER_LIFETIME_SECONDS)
+                self.spawn()
+
+        self.drain()
+
+    def drain(self) -> None:
+        """SIGTERM every worker, wait for them to finish, then kill stragglers."""
+        self.signal_workers(signal.SIGTERM)
+        deadline = time.monotonic() + self.args.graceful_timeout + 5
+        for process, _ in self.workers.values():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                print(f"Worker {process.pid} did not drain in time, killing it")
+                process.kill()
+                process.join()
+        if self.sock is not None:
+            self.sock.close()
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    from config import get_settings
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Run the API with multiple worker processes")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=settings.web_concurrency)
+    parser.add_argument("--backlog", type=int, default=settings.web_backlog)
+    parser.add_argument("--keep-alive", type=int, default=settings.web_keep_alive_seconds)
+    parser.add_argument("--max-requests", type=int, default=settings.web_max_requests)
+    parser.add_argument("--max-requests-jitter", type=int, default=settings.web_max_requests_jitter)
+    parser.add_argument(
+        "--graceful-timeout", type=int, default=settings.web_graceful_timeout_seconds
+    )
+    parser.add_argument(
+        "--reuse-port",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="Bind one socket per worker with SO_REUSEPORT instead of sharing one",
+    )
+    parser.add_argument("--access-log", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main():
+    """
+    Production entry point: a supervisor process running --workers uvicorn
+    servers (WEB_CONCURRENCY, the usable CPU count by default). Knobs default
+    to the WEB_* settings; see packages/app/.env.example.
+    """
+    Supervisor(parse_args(sys.argv[1:])).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -19,3 +19,18 @@ def ensure_virtualenv():
     if not os.environ.get("VIRTUAL_ENV"):
         print("Please activate a virtual environment first")
         sys.exit(1)
+
+
+def add_workspace_paths():
+    """
+    Makes the workspace packages importable from scripts.
+    The api package is imported as `src.*` and the app package by module name,
+    mirroring how the test suites put them on the path.
+    """
+    workspace_root = get_workspace_root()
+    for path in (
+        workspace_root / "packages" / "api",
+        workspace_root / "packages" / "app" / "src",
+    ):
+        if str(path) not in sys.path:
+            sys.path.insert(0, str(path))